@@ -0,0 +1,286 @@
+"""
+各Lambdaハンドラーのモジュールを新しいPythonプロセスで読み込み、コールドスタートの読み込み時間を計測する
+
+    python scripts/bench_cold_start.py --output cold_start.json
+    python scripts/bench_cold_start.py --output head.json --compare base.json
+
+モジュールごとに読み込みの所要時間、ピークRSS、-X importtimeによるトップレベルのimportの内訳を記録する。
+環境変数はソースコードから参照しているものをダミー値で設定し、AWSクライアントは実際のboto3で作成する
+（通信は発生しない）。--stub-boto3を指定するとboto3とbotocoreをスタブに置き換え、自前のコードだけを計測する。
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+LAYER_DIR = os.path.join(SRC_DIR, "layer", "python")
+
+# 内訳を必ず記録するトップレベルのパッケージ
+TRACKED_IMPORTS = ("boto3", "botocore", "yaml", "jsonschema")
+
+# 内訳に記録するトップレベルのimportの件数
+TOP_IMPORTS = 10
+
+# 比較で回帰とみなす増加率と最小の増加量
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_MIN_DELTA_MS = 5.0
+
+# importtimeの出力のうちハンドラーの読み込みが始まる位置の目印
+IMPORTTIME_MARKER = "-- bench: handler import --"
+
+# 子プロセスで実行する計測コード
+BOOTSTRAP = """
+import sys, time, json, resource, importlib.util
+sys.stderr.write("%s\\n" % MARKER)
+sys.stderr.flush()
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location(sys.argv[2], sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+wall_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({"wall_ms": wall_ms, "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+""".replace("MARKER", repr(IMPORTTIME_MARKER))
+
+# --stub-boto3で使うスタブ
+STUB_MODULES = {
+    "boto3/__init__.py": (
+        "class _Client:\n"
+        "    def __getattr__(self, name):\n"
+        "        raise RuntimeError('boto3 is stubbed for benchmarking')\n"
+        "def client(*args, **kwargs):\n"
+        "    return _Client()\n"
+        "class _Events:\n"
+        "    def register(self, *args, **kwargs):\n"
+        "        pass\n"
+        "class Session:\n"
+        "    events = _Events()\n"
+        "DEFAULT_SESSION = None\n"
+        "def setup_default_session(**kwargs):\n"
+        "    global DEFAULT_SESSION\n"
+        "    DEFAULT_SESSION = Session()\n"
+    ),
+    "botocore/__init__.py": "",
+    "botocore/config.py": "class Config:\n    def __init__(self, *args, **kwargs):\n        pass\n",
+    "botocore/exceptions.py": (
+        "class BotoCoreError(Exception):\n    pass\n"
+        "class ClientError(Exception):\n"
+        "    def __init__(self, error_response=None, operation_name=None):\n"
+        "        super().__init__(error_response)\n"
+        "        self.response = error_response or {}\n"
+        "class ConnectionError(BotoCoreError):\n    pass\n"
+        "class ReadTimeoutError(BotoCoreError):\n    pass\n"
+    ),
+}
+
+ENVIRONMENT_PATTERN = re.compile(r"""os\.environ\[\s*["']([A-Z0-9_]+)["']""")
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def discover_handlers() -> list:
+    """
+    計測するハンドラーのモジュールを探す
+
+    Returns:
+        list: (名前, ファイルパス)のリスト
+    """
+    handlers = []
+    api_dir = os.path.join(SRC_DIR, "api")
+    if os.path.exists(os.path.join(api_dir, "router.py")):
+        handlers.append(("api/router", os.path.join(api_dir, "router.py")))
+    for group in ("api", "common"):
+        group_dir = os.path.join(SRC_DIR, group)
+        for function_name in sorted(os.listdir(group_dir)):
+            function_dir = os.path.join(group_dir, function_name)
+            if not os.path.isdir(function_dir):
+                continue
+            for file_name in sorted(os.listdir(function_dir)):
+                if file_name.endswith(".py"):
+                    handlers.append((f"{group}/{function_name}/{file_name[:-3]}", os.path.join(function_dir, file_name)))
+    return handlers
+
+
+def stub_environment() -> dict:
+    """
+    ソースコードで必須としている環境変数（os.environ[...]）を探し、ダミー値を設定した環境を作成する
+    """
+    environment = dict(os.environ)
+    for directory, _, file_names in os.walk(SRC_DIR):
+        for file_name in file_names:
+            if file_name.endswith(".py"):
+                with open(os.path.join(directory, file_name), "r") as f:
+                    for name in ENVIRONMENT_PATTERN.findall(f.read()):
+                        environment.setdefault(name, f"bench-{name.lower()}")
+    environment.setdefault("AWS_DEFAULT_REGION", "ap-northeast-1")
+    environment.setdefault("AWS_REGION", environment["AWS_DEFAULT_REGION"])
+    environment.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    environment.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    environment["PYTHONDONTWRITEBYTECODE"] = "1"
+    return environment
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    -X importtimeの出力からトップレベルのimportごとの累積時間（ミリ秒）を集計する
+
+    インタープリターの起動時のimportは除き、ハンドラーの読み込み中のものだけを集計する。
+    """
+    totals = {}
+    _, _, handler_output = stderr.partition(IMPORTTIME_MARKER)
+    for line in handler_output.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        _, cumulative_us, indent, name = match.groups()
+        # インデントが1つのものがトップレベルのimport
+        if len(indent) == 1:
+            package = name.split(".")[0]
+            totals[package] = totals.get(package, 0.0) + int(cumulative_us) / 1000
+        # 記録対象のパッケージは他のパッケージから読み込まれた場合も記録する
+        elif name in TRACKED_IMPORTS and name not in totals:
+            totals[name] = int(cumulative_us) / 1000
+    return totals
+
+
+def measure(path: str, module_name: str, environment: dict, python_path: list) -> dict:
+    """
+    新しいプロセスでモジュールを1回読み込んで計測する
+    """
+    env = {**environment, "PYTHONPATH": os.pathsep.join(python_path)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOTSTRAP, path, module_name],
+        cwd=os.path.dirname(path),
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}"
+        return {"error": error}
+    return {**json.loads(result.stdout.strip().splitlines()[-1]), "imports": parse_importtime(result.stderr)}
+
+
+def benchmark(handlers: list, repeat: int, stub_boto3: bool) -> dict:
+    """
+    全てのハンドラーをrepeat回ずつ計測し、中央値をまとめる
+    """
+    environment = stub_environment()
+    with tempfile.TemporaryDirectory() as stub_dir:
+        python_path = [LAYER_DIR]
+        if stub_boto3:
+            for relative_path, content in STUB_MODULES.items():
+                os.makedirs(os.path.join(stub_dir, os.path.dirname(relative_path)), exist_ok=True)
+                with open(os.path.join(stub_dir, relative_path), "w") as f:
+                    f.write(content)
+            python_path.insert(0, stub_dir)
+
+        modules = {}
+        for name, path in handlers:
+            runs = [measure(path, name.replace("/", "_"), environment, [os.path.dirname(path)] + python_path) for _ in range(repeat)]
+            errors = [run["error"] for run in runs if "error" in run]
+            if errors:
+                modules[name] = {"error": errors[0]}
+                print(f"{name:70s} error: {errors[0]}", file=sys.stderr)
+                continue
+
+            imports = {}
+            for package in {package for run in runs for package in run["imports"]}:
+                imports[package] = round(statistics.median(run["imports"].get(package, 0.0) for run in runs), 2)
+            top = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+            modules[name] = {
+                "wall_ms": round(statistics.median(run["wall_ms"] for run in runs), 2),
+                "peak_rss_kb": int(statistics.median(run["peak_rss_kb"] for run in runs)),
+                "imports": dict(top + [(package, imports.get(package, 0.0)) for package in TRACKED_IMPORTS])
+            }
+            print(f"{name:70s} {modules[name]['wall_ms']:9.2f} ms {modules[name]['peak_rss_kb'] / 1024:8.1f} MiB", file=sys.stderr)
+    return modules
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base: dict, head: dict, threshold: float, min_delta_ms: float) -> list:
+    """
+    2つのレポートを比較し、読み込み時間が悪化したモジュールを返す
+
+    Returns:
+        list: (名前, 比較元のミリ秒, 比較先のミリ秒)のリスト
+    """
+    regressions = []
+    print(f"{'module':70s} {'base ms':>9s} {'head ms':>9s} {'delta':>8s}")
+    for name in sorted(set(base["modules"]) | set(head["modules"])):
+        base_ms = base["modules"].get(name, {}).get("wall_ms")
+        head_ms = head["modules"].get(name, {}).get("wall_ms")
+        if base_ms is None or head_ms is None:
+            print(f"{name:70s} {base_ms if base_ms is not None else '-':>9} {head_ms if head_ms is not None else '-':>9}")
+            continue
+        delta = head_ms - base_ms
+        ratio = delta / base_ms if base_ms else 0.0
+        marker = ""
+        if delta >= min_delta_ms and ratio >= threshold:
+            regressions.append((name, base_ms, head_ms))
+            marker = "  REGRESSION"
+        print(f"{name:70s} {base_ms:9.2f} {head_ms:9.2f} {ratio:+7.1%}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="レポートを書き出すJSONファイル")
+    parser.add_argument("--repeat", type=int, default=5, help="モジュールごとの計測回数（中央値を記録する）")
+    parser.add_argument("--filter", help="名前にこの文字列を含むモジュールだけを計測する")
+    parser.add_argument("--stub-boto3", action="store_true", help="boto3とbotocoreをスタブに置き換える")
+    parser.add_argument("--compare", metavar="BASE", help="比較元のレポート（悪化していれば終了コード1）")
+    parser.add_argument("--head", metavar="HEAD", help="計測せずにこのレポートを比較先として使う")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回帰とみなす増加率")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS, help="回帰とみなす最小の増加量（ミリ秒）")
+    args = parser.parse_args()
+
+    if args.head:
+        with open(args.head, "r") as f:
+            report = json.load(f)
+    else:
+        handlers = [handler for handler in discover_handlers() if not args.filter or args.filter in handler[0]]
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "stub_boto3": args.stub_boto3
+            },
+            "modules": benchmark(handlers, args.repeat, args.stub_boto3)
+        }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            base = json.load(f)
+        if base.get("meta", {}).get("stub_boto3") != report.get("meta", {}).get("stub_boto3"):
+            print("warning: comparing reports measured with and without --stub-boto3", file=sys.stderr)
+        regressions = compare(base, report, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} module(s) regressed", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+各API関数のschema.yamlから操作ごとのJSONスキーマ（schemas.json）を作成する
+
+Lambda関数の初期化時にYAMLを読み込まないよう、デプロイ前に実行して結果をコミットする。
+
+    python scripts/build_schemas.py          # schemas.jsonを作成する
+    python scripts/build_schemas.py --check  # schemas.jsonが最新か確認する（CI用）
+"""
+import os
+import sys
+import json
+import argparse
+
+import yaml
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src", "layer", "python"))
+
+import schema_validators  # noqa: E402
+
+API_DIR = os.path.join(ROOT_DIR, "src", "api")
+
+
+def build(function_dir: str) -> str:
+    with open(os.path.join(function_dir, schema_validators.OPENAPI_SCHEMA_FILE), "r") as f:
+        operations = schema_validators.extract_operation_schemas(yaml.safe_load(f))
+    return json.dumps(operations, ensure_ascii=False, indent=2, sort_keys=True) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="schemas.jsonを書き換えずに差分があれば失敗する")
+    args = parser.parse_args()
+
+    stale = []
+    for name in sorted(os.listdir(API_DIR)):
+        function_dir = os.path.join(API_DIR, name)
+        if not os.path.exists(os.path.join(function_dir, schema_validators.OPENAPI_SCHEMA_FILE)):
+            continue
+
+        output_path = os.path.join(function_dir, schema_validators.COMPILED_SCHEMAS_FILE)
+        content = build(function_dir)
+        current = None
+        if os.path.exists(output_path):
+            with open(output_path, "r") as f:
+                current = f.read()
+
+        if current == content:
+            continue
+        if args.check:
+            stale.append(os.path.relpath(output_path, ROOT_DIR))
+        else:
+            with open(output_path, "w") as f:
+                f.write(content)
+            print(f"Wrote {os.path.relpath(output_path, ROOT_DIR)}")
+
+    if stale:
+        print("Outdated schemas (run python scripts/build_schemas.py): " + ", ".join(stale), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
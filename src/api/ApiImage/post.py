@@ -1,26 +1,40 @@
-import boto3
+import aws_clients
 import os
 import json
 import utils
 import uuid
 import logging
+import event_logging
 
 # AWSクライアント
-s3 = boto3.client("s3")
+# 同じクライアントで署名し、認証情報の取得や署名の準備をURLごとに繰り返さない
+s3 = aws_clients.lazy("s3")
 
 # 環境変数
 TENANT_TABLE_NAME = os.environ["TENANT_TABLE_NAME"]
 S3_BUCKET_SPECIFICATIONS = os.environ["S3_BUCKET_SPECIFICATIONS"]
 S3_BUCKET_STATIC_ASSETS = os.environ["S3_BUCKET_STATIC_ASSETS"]
 
+# 1回のリクエストで署名できるURLの最大数
+MAX_BATCH_ITEMS = 100
+
+# URLの有効期限（秒）
+PRESIGNED_URL_EXPIRES_IN = 3600
+
+# アップロードできる画像の形式
+IMAGE_TYPES = ["png", "jpg", "jpeg"]
+
 # ログの設定
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+class InvalidImageRequest(ValueError):
+    pass
+
+
 def lambda_handler(event, context):
-    logger.info(f"Event: {event}")
-    logger.info(f"Context: {context}")
+    event_logging.log_event(logger, event)
 
     # tenant_idを取得
     tenant_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("custom:tenant_id")
@@ -34,16 +48,26 @@ def lambda_handler(event, context):
         }
     
     # リクエストボディをJSONとしてパース
-    body = json.loads(event.get("body", {}))
+    body = json.loads(utils.get_request_body(event, {}))
 
     try:
 
         type = body.get("type")
 
+        # itemsが指定された場合は複数の画像のURLをまとめて作成する
+        items = body.get("items")
+        if items is not None:
+            if not isinstance(items, list) or not items or len(items) > MAX_BATCH_ITEMS:
+                return {
+                    "statusCode": 400,
+                    "headers": utils.get_response_headers(),
+                    "body": json.dumps({"message": "Invalid request body"})
+                }
+        else:
+            items = [body]
+
         if type == "specification":
             specification_id = body.get("specification_id")
-            key = body.get("key")
-            method = body.get("method")
             # キーに不正な値がないかチェックする
             if not utils.is_valid_uuid(specification_id):
                 return {
@@ -51,93 +75,20 @@ def lambda_handler(event, context):
                     "headers": utils.get_response_headers(),
                     "body": json.dumps({"message": "Invalid request body"})
                 }
-            if method == "get":
-                if not utils.is_valid_image_key(key):
-                    return {
-                        "statusCode": 400,
-                        "headers": utils.get_response_headers(),
-                        "body": json.dumps({"message": "Invalid request body"})
-                    }
-                # 取得、削除が可能なURLを生成
-                pre_signed_url = s3.generate_presigned_url(
-                    ClientMethod="get_object",
-                    Params={
-                        "Bucket": S3_BUCKET_SPECIFICATIONS,
-                        "Key": f"{tenant_id}/{specification_id}/{key}"
-                    },
-                    ExpiresIn=3600
-                )
-            elif method == "put":
-                image_type = body.get("image_type")
-                if image_type not in ["png", "jpg", "jpeg"]:
-                    return {
-                        "statusCode": 400,
-                        "headers": utils.get_response_headers(),
-                        "body": json.dumps({"message": "Invalid request body"})
-                    }
-                if not key:
-                    key = f"{str(uuid.uuid4())}.{image_type}"
-                # キーに不正な値がないかチェックする
-                if not utils.is_valid_image_key(key):
-                    return {
-                        "statusCode": 400,
-                        "headers": utils.get_response_headers(),
-                        "body": json.dumps({"message": "Invalid request body"})
-                    }
-                # アップロード、削除が可能なURLを生成
-                pre_signed_url = s3.generate_presigned_url(
-                    ClientMethod="put_object",
-                    Params={
-                        "Bucket": S3_BUCKET_SPECIFICATIONS,
-                        "Key": f"{tenant_id}/{specification_id}/{key}",
-                        "ContentType": f"image/{image_type}"
-                    },
-                    ExpiresIn=3600
-                )
-            elif method == "delete":
-                if not utils.is_valid_image_key(key):
-                    return {
-                        "statusCode": 400,
-                        "headers": utils.get_response_headers(),
-                        "body": json.dumps({"message": "Invalid request body"})
-                    }
-                # 取得、削除が可能なURLを生成
-                pre_signed_url = s3.generate_presigned_url(
-                    ClientMethod="delete_object",
-                    Params={
-                        "Bucket": S3_BUCKET_SPECIFICATIONS,
-                        "Key": f"{tenant_id}/{specification_id}/{key}"
-                    },
-                    ExpiresIn=3600
-                )
+            prefix = f"{tenant_id}/{specification_id}/"
+            methods = ("get", "put", "delete")
+            sign = sign_specification_image
         elif type == "brand_logo":
-            key = body.get("key")
-            method = body.get("method")
             tenant_info = utils.get_tenant_info(tenant_id, TENANT_TABLE_NAME)
             if tenant_info is None or tenant_info.get("logo_key") is None:
                 return {
                     "statusCode": 400,
                     "headers": utils.get_response_headers(),
                     "body": json.dumps({"message": "Invalid request body"})
-                } 
-            if method == "get":
-                if not utils.is_valid_image_key(key):
-                    return {
-                        "statusCode": 400,
-                        "headers": utils.get_response_headers(),
-                        "body": json.dumps({"message": "Invalid request body"})
-                    }
-                # 取得、削除が可能なURLを生成
-                pre_signed_url = s3.generate_presigned_url(
-                    ClientMethod="get_object",
-                    Params={
-                        "Bucket": S3_BUCKET_STATIC_ASSETS,
-                        "Key": f"{tenant_id}/logo/{key}"
-                    },
-                    ExpiresIn=3600
-                )
-        elif type == "profile":
-            pass
+                }
+            prefix = f"{tenant_id}/logo/"
+            methods = ("get",)
+            sign = sign_brand_logo
         else:
             return {
                 "statusCode": 400,
@@ -145,12 +96,89 @@ def lambda_handler(event, context):
                 "body": json.dumps({"message": "Invalid request body"})
             }
 
+        # 全ての項目を検証してから署名する（1件でも不正な場合は何も返さない）
+        try:
+            requests = [validate_item(item, methods) for item in items]
+        except InvalidImageRequest:
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": "Invalid request body"})
+            }
+
+        results = [
+            {"pre_signed_url": sign(prefix, method, key, image_type), "key": key, "method": method}
+            for method, key, image_type in requests
+        ]
+
+        if "items" in body:
+            response_body = {"items": results}
+        else:
+            response_body = {"pre_signed_url": results[0]["pre_signed_url"], "key": results[0]["key"]}
+
         return {
             "statusCode": 200,
             "headers": utils.get_response_headers(),
-            "body": json.dumps({"pre_signed_url": pre_signed_url, "key": key})
+            "body": json.dumps(response_body)
         }
 
     except Exception as e:
         logger.error(f"Error: {e}")
         return utils.get_response_internal_server_error()
+
+
+def validate_item(item: dict, methods: tuple) -> tuple:
+    """
+    署名する画像の指定を検証する
+
+    アップロードでキーが指定されていない場合は新しいキーを作成する。
+
+    Args:
+        item: {"key": キー, "method": "get" | "put" | "delete", "image_type": アップロードする画像の形式}
+        methods: 画像の種類ごとに許可するメソッド
+
+    Returns:
+        tuple: (method, key, image_type)
+
+    Raises:
+        InvalidImageRequest: 指定が不正な場合
+    """
+    if not isinstance(item, dict) or item.get("method") not in methods:
+        raise InvalidImageRequest()
+    method = item.get("method")
+    key = item.get("key")
+    image_type = item.get("image_type")
+    if method == "put":
+        if image_type not in IMAGE_TYPES:
+            raise InvalidImageRequest()
+        if not key:
+            key = f"{str(uuid.uuid4())}.{image_type}"
+    # キーに不正な値がないかチェックする
+    if not isinstance(key, str) or not utils.is_valid_image_key(key):
+        raise InvalidImageRequest()
+    return method, key, image_type
+
+
+def sign_specification_image(prefix: str, method: str, key: str, image_type: str):
+    """
+    仕様書の画像の取得・アップロード・削除のURLを作成する
+    """
+    params = {"Bucket": S3_BUCKET_SPECIFICATIONS, "Key": prefix + key}
+    if method == "put":
+        params["ContentType"] = f"image/{image_type}"
+    return s3.generate_presigned_url(
+        ClientMethod=f"{method}_object",
+        Params=params,
+        ExpiresIn=PRESIGNED_URL_EXPIRES_IN
+    )
+
+
+def sign_brand_logo(prefix: str, method: str, key: str, image_type: str):
+    """
+    ブランドロゴの取得のURLを作成する
+    """
+    return s3.generate_presigned_url(
+        ClientMethod="get_object",
+        Params={"Bucket": S3_BUCKET_STATIC_ASSETS, "Key": prefix + key},
+        ExpiresIn=PRESIGNED_URL_EXPIRES_IN
+    )
@@ -1,14 +1,15 @@
-
-from get import lambda_handler as get_handler
-from post import lambda_handler as post_handler
-import utils
+import aws_metrics
 
 
+@aws_metrics.instrument
 def lambda_handler(event, context):
     http_method = event.get("httpMethod", "").upper()
     if http_method == "GET":
+        from get import lambda_handler as get_handler
         return get_handler(event, context)
     elif http_method == "POST":
+        from post import lambda_handler as post_handler
         return post_handler(event, context)
     else:
-        return utils.get_response_not_allowed_method()
+        from utils import get_response_not_allowed_method
+        return get_response_not_allowed_method()
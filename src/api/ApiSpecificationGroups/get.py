@@ -1,22 +1,30 @@
 import os
-import boto3
+import aws_clients
 import json
 import logging
 import utils
+import dynamo_codec
+import compression
+import event_logging
+import etags
+import specification_group_counts
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
+dynamodb = aws_clients.lazy("dynamodb")
 
 # 環境変数
 SPECIFICATION_GROUPS_TABLE_NAME = os.environ["SPECIFICATION_GROUPS_TABLE_NAME"]
 
+# レスポンスとして返す仕様書グループの属性
+RESPONSE_FIELDS = ("specification_group_id", "specification_group_name")
+
 # ログの設定
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+@compression.compressible
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     # tenant_idを取得
     tenant_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("custom:tenant_id")
@@ -37,7 +45,8 @@ def lambda_handler(event, context):
             ExpressionAttributeValues={
                 ":tenant_id": {"S": tenant_id}
             },
-            ProjectionExpression="specification_group_id, specification_group_name"
+            ProjectionExpression="specification_group_id, specification_group_name, "
+                                 f"{specification_group_counts.COUNT_ATTRIBUTE}, {specification_group_counts.STATUS_COUNTS_ATTRIBUTE}"
         )
 
         if "Items" not in specification_groups:
@@ -48,11 +57,25 @@ def lambda_handler(event, context):
                 "body": json.dumps({"message": "specification groups not found"})
             }
 
+        # 仕様書グループに保持している仕様書数をDynamoDB形式のまま付けて返す（仕様書は読まない）
+        body = dynamo_codec.dumps_items([
+            {
+                **{name: item[name] for name in RESPONSE_FIELDS if name in item},
+                "specification_counts": specification_group_counts.to_counts_attribute(item)
+            }
+            for item in specification_groups["Items"]
+        ])
+
+        # 本文からETagを作成し、変わっていなければ本文を返さない
+        etag = etags.body_etag(body)
+        if etags.is_not_modified(event, etag):
+            return etags.get_response_not_modified(etag)
+
         # データを返す
         return {
             "statusCode": 200,
-            "headers": utils.get_response_headers(),
-            "body": json.dumps(list(map(utils.dynamo_to_python, specification_groups["Items"])))
+            "headers": etags.get_response_headers(etag),
+            "body": body
         }
 
     except Exception as e:
@@ -1,13 +1,16 @@
 import os
-import boto3
+import aws_clients
 import json
 import logging
 import uuid
 from datetime import datetime
 import utils
+import dynamo_codec
+import specification_group_counts
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
+dynamodb = aws_clients.lazy("dynamodb")
 
 # 環境変数
 SPECIFICATION_GROUPS_TABLE_NAME = os.environ["SPECIFICATION_GROUPS_TABLE_NAME"]
@@ -17,8 +20,7 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # tenant_idを取得
@@ -32,7 +34,7 @@ def lambda_handler(event, context):
             }
         
         # リクエストボディをJSONとしてパース
-        body = json.loads(event.get("body", {}))
+        body = json.loads(utils.get_request_body(event, {}))
 
         # specification_idを生成
         specification_group_id = str(uuid.uuid4())
@@ -46,13 +48,16 @@ def lambda_handler(event, context):
                 "body": json.dumps({"message": "specification_group_name is required"})
             }
 
-        put_item = utils.python_to_dynamo({
+        put_item = dynamo_codec.item_to_dynamo({
             "specification_group_id": specification_group_id,
             "tenant_id": tenant_id,
             "specification_group_name": specification_group_name,
             "updated_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00")
         })
 
+        # 仕様書数は仕様書テーブルの変更から増減するため、0件で作成する
+        put_item.update(specification_group_counts.INITIAL_COUNTS)
+
         # テーブルにデータを挿入
         response_specification_groups_table = dynamodb.put_item(
             TableName=SPECIFICATION_GROUPS_TABLE_NAME,
@@ -1,11 +1,12 @@
 import os
 import json
-import boto3
+import aws_clients
 import logging
 import utils
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
+dynamodb = aws_clients.lazy("dynamodb")
 
 # 環境変数
 SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
@@ -17,8 +18,7 @@ logger.setLevel(logging.INFO)
 
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # パスパラメータからspecification_idを取得
@@ -47,16 +47,19 @@ def lambda_handler(event, context):
                 })
             }
         
-        # 仕様書グループに紐づく仕様書を取得
+        # 仕様書グループに紐づく仕様書が1件でもあるか確認する（全件は読まない）
+        # 仕様書グループの仕様書数はDynamoDB Streams経由で遅れて反映される表示用の値のため、削除の判定には使わない
         specifications = dynamodb.query(
             TableName=SPECIFICATIONS_TABLE_NAME,
             IndexName="SpecificationGroupIdIndex",
             KeyConditionExpression="specification_group_id = :specification_group_id",
-            ExpressionAttributeValues={":specification_group_id": {"S": specification_group_id}}
+            ExpressionAttributeValues={":specification_group_id": {"S": specification_group_id}},
+            Select="COUNT",
+            Limit=1
         )
 
         # 仕様書グループに紐づく仕様書が存在する場合は409エラーを返す
-        if "Items" in specifications and len(specifications["Items"]) > 0:
+        if specifications.get("Count", 0) > 0:
             return {
                 "statusCode": 409,
                 "headers": utils.get_response_headers(),
@@ -1,12 +1,14 @@
 import os
-import boto3
+import aws_clients
 import json
 import logging
 import utils
+import dynamo_codec
 from datetime import datetime
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
+dynamodb = aws_clients.lazy("dynamodb")
 
 # 環境変数
 SPECIFICATION_GROUPS_TABLE_NAME = os.environ["SPECIFICATION_GROUPS_TABLE_NAME"]
@@ -16,8 +18,7 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # パスパラメータからspecification_group_idを取得
@@ -61,10 +62,7 @@ def lambda_handler(event, context):
             }
 
          # リクエストボディをパース
-        body = json.loads(event.get("body", "{}"))
-        
-        # 数値をDecimal型に変換
-        body = utils.num_to_decimal(body)
+        body = json.loads(utils.get_request_body(event, "{}"))
         
         # 更新式と属性の準備
         update_expression = "SET "
@@ -76,12 +74,12 @@ def lambda_handler(event, context):
         for item in update_items:
             update_expression += f"#{item} = :{item}, "
             expression_attribute_names[f"#{item}"] = item
-            expression_attribute_values[f":{item}"] = utils.value_to_dynamo(body[item])
+            expression_attribute_values[f":{item}"] = dynamo_codec.to_dynamo(body[item])
 
         # updated_atを追加
         update_expression += "#updated_at = :updated_at"
         expression_attribute_names["#updated_at"] = "updated_at"
-        expression_attribute_values[":updated_at"] = utils.value_to_dynamo(datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00"))
+        expression_attribute_values[":updated_at"] = dynamo_codec.to_dynamo(datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00"))
 
         # 仕様書情報を更新
         update_specification_group_response = dynamodb.update_item(
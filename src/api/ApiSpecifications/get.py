@@ -1,26 +1,39 @@
 import os
-import boto3
+import aws_clients
 import json
 import logging
 import utils
+import dynamo_codec
+import compression
+import pagination
+import specification_attributes
+import etags
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
+dynamodb = aws_clients.lazy("dynamodb")
 
 # 環境変数
-SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
+SPECIFICATION_SUMMARIES_TABLE_NAME = os.environ["SPECIFICATION_SUMMARIES_TABLE_NAME"]
+
+# ページネーションの設定
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
 
 # ログの設定
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+@compression.compressible
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     # クエリパラメータを取得
-    specification_group_id = event.get("queryStringParameters", {}).get("specification_group_id", None)
-    status = event.get("queryStringParameters", {}).get("status", None)
+    query_params = event.get("queryStringParameters") or {}
+    specification_group_id = query_params.get("specification_group_id", None)
+    status = query_params.get("status", None)
+    cursor = query_params.get("cursor", None)
+    fields = query_params.get("fields") or specification_attributes.SPECIFICATION_LIST_FIELDS
 
     # tenant_idを取得
     tenant_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("custom:tenant_id")
@@ -33,47 +46,89 @@ def lambda_handler(event, context):
             "body": json.dumps({"message": "tenant_id is required"})
         }
 
+    try:
+        limit = pagination.parse_limit(query_params.get("limit"), DEFAULT_LIMIT, MAX_LIMIT)
+    except ValueError:
+        return {
+            "statusCode": 400,
+            "headers": utils.get_response_headers(),
+            "body": json.dumps({"message": "Invalid limit"})
+        }
+
+    # 取得する属性を絞り込む（一覧はサマリーに含まれる属性のみ）
+    try:
+        projection_expression, projection_attribute_names = utils.get_projection(
+            fields,
+            specification_attributes.SPECIFICATION_LIST_FIELDS,
+            required_fields=("specification_id",)
+        )
+    except ValueError:
+        return {
+            "statusCode": 400,
+            "headers": utils.get_response_headers(),
+            "body": json.dumps({"message": "Invalid fields"})
+        }
+
     try:
         if specification_group_id:
             if status:
                 # グループとステータスに紐づく仕様書を取得
-                specifications = dynamodb.query(
-                    TableName=SPECIFICATIONS_TABLE_NAME,
-                    IndexName="SpecificationGroupIdIndex", 
-                    KeyConditionExpression="specification_group_id = :specification_group_id AND #tenant_id_status = :tenant_id_status",
-                    ExpressionAttributeNames={
+                query = {
+                    "IndexName": "SpecificationGroupIdIndex",
+                    "KeyConditionExpression": "specification_group_id = :specification_group_id AND #tenant_id_status = :tenant_id_status",
+                    "ExpressionAttributeNames": {
                         "#tenant_id_status": "tenant_id#status"
                     },
-                    ExpressionAttributeValues={
+                    "ExpressionAttributeValues": {
                         ":specification_group_id": {"S": specification_group_id},
                         ":tenant_id_status": {"S": tenant_id + "#" + status}
                     }
-                )
+                }
+                scope = f"{tenant_id}|summaries|SpecificationGroupIdIndex|{specification_group_id}|{status}"
             else:
                 # グループに紐づく仕様書を取得
-                specifications = dynamodb.query(
-                    TableName=SPECIFICATIONS_TABLE_NAME,
-                    IndexName="SpecificationGroupIdIndex", 
-                    KeyConditionExpression="specification_group_id = :specification_group_id AND begins_with(#tenant_id_status, :tenant_id_status)",
-                    ExpressionAttributeNames={
+                query = {
+                    "IndexName": "SpecificationGroupIdIndex",
+                    "KeyConditionExpression": "specification_group_id = :specification_group_id AND begins_with(#tenant_id_status, :tenant_id_status)",
+                    "ExpressionAttributeNames": {
                         "#tenant_id_status": "tenant_id#status"
                     },
-                    ExpressionAttributeValues={
+                    "ExpressionAttributeValues": {
                         ":specification_group_id": {"S": specification_group_id},
                         ":tenant_id_status": {"S": tenant_id + "#"}
                     }
-                )
+                }
+                scope = f"{tenant_id}|summaries|SpecificationGroupIdIndex|{specification_group_id}"
         else:
             # テナントIDに紐づく仕様書を取得
-            specifications = dynamodb.query(
-                TableName=SPECIFICATIONS_TABLE_NAME,
-                IndexName="TenantIdIndex", 
-                KeyConditionExpression="tenant_id = :tenant_id",
-                ExpressionAttributeValues={
+            query = {
+                "KeyConditionExpression": "tenant_id = :tenant_id",
+                "ExpressionAttributeValues": {
                     ":tenant_id": {"S": tenant_id}
                 }
-            )
+            }
+            scope = f"{tenant_id}|summaries"
+
+        # カーソルが指定されている場合は続きから取得
+        if cursor:
+            try:
+                query["ExclusiveStartKey"] = pagination.decode_cursor(cursor, scope)
+            except pagination.InvalidCursorError:
+                return {
+                    "statusCode": 400,
+                    "headers": utils.get_response_headers(),
+                    "body": json.dumps({"message": "Invalid cursor"})
+                }
 
+        query["ProjectionExpression"] = projection_expression
+        query["ExpressionAttributeNames"] = {**query.get("ExpressionAttributeNames", {}), **projection_attribute_names}
+
+        # 一覧用サマリーから取得
+        specifications = dynamodb.query(
+            TableName=SPECIFICATION_SUMMARIES_TABLE_NAME,
+            Limit=limit,
+            **query
+        )
 
         if "Items" not in specifications:
             logger.error("specifications not found")
@@ -83,10 +138,22 @@ def lambda_handler(event, context):
                 "body": json.dumps({"message": "specifications not found"})
             }
 
+        # 続きがある場合は次のカーソルを返す
+        next_cursor = None
+        if "LastEvaluatedKey" in specifications:
+            next_cursor = pagination.encode_cursor(specifications["LastEvaluatedKey"], scope)
+
+        body = '{"specifications":' + dynamo_codec.dumps_items(specifications["Items"]) + ',"next_cursor":' + json.dumps(next_cursor) + "}"
+
+        # 一覧は更新日時を持たないため本文からETagを作成し、変わっていなければ本文を返さない
+        etag = etags.body_etag(body)
+        if etags.is_not_modified(event, etag):
+            return etags.get_response_not_modified(etag)
+
         return {
             "statusCode": 200,
-            "headers": utils.get_response_headers(),
-            "body": json.dumps(list(map(utils.dynamo_to_python, specifications["Items"])), default=utils.decimal_to_num)
+            "headers": etags.get_response_headers(etag),
+            "body": body
         }
 
     except Exception as e:
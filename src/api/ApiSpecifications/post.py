@@ -1,17 +1,19 @@
 import os
 import json
-import yaml
-import boto3
+import aws_clients
 from botocore.exceptions import ClientError
-from jsonschema import validate, ValidationError
 import uuid
 from datetime import datetime
 import logging
 import utils
+import dynamo_codec
+import specification_attributes
+import schema_validators
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
-sqs = boto3.client("sqs")
+dynamodb = aws_clients.lazy("dynamodb")
+sqs = aws_clients.lazy("sqs")
 
 # 環境変数
 SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
@@ -22,21 +24,12 @@ CREATE_SPECIFICATION_SQS_QUEUE_URL = os.environ["CREATE_SPECIFICATION_SQS_QUEUE_
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# スキーマの読み込み
-def load_schema():
-    schema_path = os.path.join(os.path.dirname(__file__), "schema.yaml")
-    with open(schema_path, "r") as f:
-        schema = yaml.safe_load(f)
-    return schema["paths"]["/v1/specifications"]["post"]
-
-# スキーマの取得
-request_schema = load_schema()["requestBody"]["content"]["application/json"]["schema"]
-response_schema = load_schema()["responses"]["200"]["content"]["application/json"]["schema"]
+# スキーマの検証関数（ビルド済みのschemas.jsonから作成し、コンテナ内で使い回す）
+validators = schema_validators.load(os.path.dirname(__file__), "POST /v1/specifications")
 
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     tenant_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("custom:tenant_id")
 
@@ -49,18 +42,18 @@ def lambda_handler(event, context):
         }
 
     # リクエストボディをJSONとしてパース
-    body = json.loads(event.get("body", {}))
+    body = json.loads(utils.get_request_body(event, {}))
 
     # スキーマバリデーション
-    # try:
-    #     validate(instance=body, schema=request_schema)
-    # except ValidationError:
-    #     logger.error("Invalid request body")
-    #     return {
-    #         "statusCode": 400,
-    #         "headers": utils.get_response_headers(),
-    #         "body": json.dumps({"message": "Invalid request body"})
-    #     }
+    try:
+        validators.request(body)
+    except schema_validators.SchemaValidationError as e:
+        logger.error(f"Invalid request body: {e}")
+        return {
+            "statusCode": 400,
+            "headers": utils.get_response_headers(),
+            "body": json.dumps({"message": "Invalid request body"})
+        }
 
     try:
         # specification_idを生成
@@ -69,12 +62,9 @@ def lambda_handler(event, context):
         # リクエストユーザー情報の取得
         request_user_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("sub")
 
-        request_user_data = dynamodb.get_item(
-            TableName=USERS_TABLE_NAME,
-            Key={"user_id": {"S": request_user_id}, "tenant_id": {"S": tenant_id}}
-        )
+        request_user_data = utils.get_user_item(request_user_id, tenant_id, USERS_TABLE_NAME)
 
-        if "Item" not in request_user_data:
+        if request_user_data is None:
             logger.error("User not found")
             return {
                 "statusCode": 400,
@@ -83,9 +73,9 @@ def lambda_handler(event, context):
             }
 
         # リクエストユーザー名を取得
-        request_user_name = utils.dynamo_to_python(request_user_data.get("Item", {})).get("user_name")
+        request_user_name = dynamo_codec.item_to_python(request_user_data).get("user_name")
 
-        put_item = utils.python_to_dynamo({
+        specification = {
             "specification_id": specification_id,
             "tenant_id": tenant_id,
             "tenant_id#status": tenant_id + "#" + "DRAFT",
@@ -100,8 +90,13 @@ def lambda_handler(event, context):
                 "user_id": request_user_id,
                 "user_name": request_user_name
             },
-            "updated_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00")
-        })
+            "updated_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+            # ETagに使う版数（更新のたびに1ずつ上げる）
+            "version": 1
+        }
+        # 更新時にPDFの再作成が必要か判定するため、PDFの作成に使う属性のハッシュを保存
+        specification["render_hashes"] = specification_attributes.render_hashes(specification)
+        put_item = dynamo_codec.item_to_dynamo(specification)
 
         # テーブルにデータを挿入
         response_specifications_table = dynamodb.put_item(
@@ -141,11 +136,11 @@ def lambda_handler(event, context):
         }
 
         # スキーマバリデーション
-        # try:
-        #     validate(instance=response_data, schema=response_schema)
-        # except ValidationError:
-        #     logger.error("Failed to validate response data")
-        #     return utils.get_response_internal_server_error()
+        try:
+            validators.response(response_data)
+        except schema_validators.SchemaValidationError:
+            logger.error("Failed to validate response data")
+            return utils.get_response_internal_server_error()
 
         return {
             "statusCode": 201,
@@ -1,16 +1,28 @@
-from get import lambda_handler as get_handler
-from put import lambda_handler as put_handler
-from delete import lambda_handler as delete_handler
-import utils
+import importlib
+import aws_metrics
 
+# POSTはリソースごとに処理するモジュールを分ける
+POST_HANDLERS = {
+    "/v1/specifications:batchGet": "batch_get",
+    "/v1/specifications:batchUpdateStatus": "batch_update_status",
+    "/v1/specifications:batchDelete": "batch_delete",
+}
 
+
+@aws_metrics.instrument
 def lambda_handler(event, context):
     http_method = event.get("httpMethod", "").upper()
     if http_method == "GET":
+        from get import lambda_handler as get_handler
         return get_handler(event, context)
     elif http_method == "PUT":
+        from put import lambda_handler as put_handler
         return put_handler(event, context)
     elif http_method == "DELETE":
+        from delete import lambda_handler as delete_handler
         return delete_handler(event, context)
+    elif http_method == "POST" and event.get("resource") in POST_HANDLERS:
+        return importlib.import_module(POST_HANDLERS[event["resource"]]).lambda_handler(event, context)
     else:
-        return utils.get_response_not_allowed_method()
+        from utils import get_response_not_allowed_method
+        return get_response_not_allowed_method()
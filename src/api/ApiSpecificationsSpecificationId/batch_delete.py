@@ -0,0 +1,116 @@
+import os
+import json
+import aws_clients
+import logging
+import utils
+import bulk_writes
+import specification_drafts
+import event_logging
+
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
+sqs = aws_clients.lazy("sqs")
+
+# 環境変数
+SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
+PURGE_SPECIFICATION_SQS_QUEUE_URL = os.environ["PURGE_SPECIFICATION_SQS_QUEUE_URL"]
+SPECIFICATION_DRAFTS_TABLE_NAME = os.environ["SPECIFICATION_DRAFTS_TABLE_NAME"]
+
+# 1回のリクエストで指定できる最大件数
+MAX_BATCH_IDS = 500
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def lambda_handler(event, context):
+    event_logging.log_event(logger, event)
+
+    try:
+        # tenant_idを取得
+        tenant_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("custom:tenant_id")
+
+        # tenant_idが存在しない場合は400エラーを返す
+        if not tenant_id:
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": "tenant_id is required"})
+            }
+
+        # リクエストボディをJSONとしてパース
+        body = json.loads(utils.get_request_body(event) or "{}")
+        specification_ids = body.get("specification_ids") if isinstance(body, dict) else None
+
+        if (
+            not isinstance(specification_ids, list)
+            or not specification_ids
+            or len(specification_ids) > MAX_BATCH_IDS
+            or not all(isinstance(specification_id, str) and specification_id for specification_id in specification_ids)
+        ):
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": f"specification_ids must be a list of 1 to {MAX_BATCH_IDS} ids"})
+            }
+
+        # 同じ仕様書を1つのトランザクションに含められないため重複を除く
+        unique_ids = list(dict.fromkeys(specification_ids))
+
+        # 仕様書を100件ずつトランザクションで削除
+        results = {}
+        for i in range(0, len(unique_ids), bulk_writes.TRANSACT_WRITE_CHUNK_SIZE):
+            chunk = unique_ids[i:i + bulk_writes.TRANSACT_WRITE_CHUNK_SIZE]
+            transact_items = [
+                {
+                    "Delete": {
+                        "TableName": SPECIFICATIONS_TABLE_NAME,
+                        "Key": {
+                            "specification_id": {"S": specification_id},
+                            "tenant_id": {"S": tenant_id}
+                        },
+                        "ConditionExpression": "attribute_exists(specification_id)"
+                    }
+                }
+                for specification_id in chunk
+            ]
+            for specification_id, reason in zip(chunk, bulk_writes.transact_write_items(dynamodb, transact_items)):
+                if reason is None:
+                    results[specification_id] = {"specification_id": specification_id, "result": "DELETED"}
+                elif reason == "ConditionalCheckFailed":
+                    results[specification_id] = {"specification_id": specification_id, "result": "NOT_FOUND"}
+                else:
+                    logger.error(f"Failed to delete specification {specification_id}: {reason}")
+                    results[specification_id] = {"specification_id": specification_id, "result": "FAILED"}
+
+        # 反映されていない自動保存の下書きを破棄する
+        deleted_ids = [specification_id for specification_id in unique_ids if results[specification_id]["result"] != "FAILED"]
+        specification_drafts.discard_drafts(dynamodb, SPECIFICATION_DRAFTS_TABLE_NAME, tenant_id, deleted_ids)
+
+        # S3の仕様書ファイルはバックグラウンドで削除する
+        # 既に削除済みの仕様書も、前回の削除依頼が失敗している場合に備えて依頼する
+        purge_ids = [specification_id for specification_id in unique_ids if results[specification_id]["result"] != "FAILED"]
+        entries = [
+            {
+                "Id": str(index),
+                "MessageBody": json.dumps({
+                    "tenant_id": tenant_id,
+                    "specification_id": specification_id
+                })
+            }
+            for index, specification_id in enumerate(purge_ids)
+        ]
+        failed_entry_ids = bulk_writes.send_message_batch(sqs, PURGE_SPECIFICATION_SQS_QUEUE_URL, entries)
+        for index, specification_id in enumerate(purge_ids):
+            results[specification_id]["purge_queued"] = str(index) not in failed_entry_ids
+
+        return {
+            "statusCode": 200,
+            "headers": utils.get_response_headers(),
+            "body": json.dumps({"results": [results[specification_id] for specification_id in unique_ids]})
+        }
+
+    except Exception as e:
+        logger.error(e)
+        return utils.get_response_internal_server_error()
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import random
+import aws_clients
+import logging
+import utils
+import dynamo_codec
+import compression
+import specification_attributes
+import event_logging
+
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
+
+# 環境変数
+SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
+
+# BatchGetItemで1回に取得できる最大件数
+BATCH_GET_CHUNK_SIZE = 100
+
+# 1回のリクエストで指定できる最大件数
+# 仕様書全体を返すため、Lambdaのレスポンスの上限（6MB）を超えないよう編集画面でまとめて読む件数程度にする
+MAX_BATCH_GET_IDS = 50
+
+# UnprocessedKeysを再試行する最大回数
+MAX_BATCH_GET_ATTEMPTS = 8
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@compression.compressible
+def lambda_handler(event, context):
+    event_logging.log_event(logger, event)
+
+    try:
+        # tenant_idを取得
+        tenant_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("custom:tenant_id")
+
+        # tenant_idが存在しない場合は400エラーを返す
+        if not tenant_id:
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({
+                    "message": "tenant_id is required"
+                })
+            }
+
+        # リクエストボディをJSONとしてパース
+        body = json.loads(utils.get_request_body(event) or "{}")
+        specification_ids = body.get("specification_ids") if isinstance(body, dict) else None
+
+        if (
+            not isinstance(specification_ids, list)
+            or not specification_ids
+            or len(specification_ids) > MAX_BATCH_GET_IDS
+            or not all(isinstance(specification_id, str) and specification_id for specification_id in specification_ids)
+        ):
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({
+                    "message": f"specification_ids must be a list of 1 to {MAX_BATCH_GET_IDS} ids"
+                })
+            }
+
+        # fieldsが指定されている場合は取得する属性を絞り込む（単体取得と同じ）
+        query_params = event.get("queryStringParameters") or {}
+        projection = {}
+        if query_params.get("fields"):
+            try:
+                projection_expression, projection_attribute_names = utils.get_projection(
+                    query_params["fields"],
+                    specification_attributes.SPECIFICATION_FIELDS,
+                    required_fields=("specification_id",)
+                )
+            except ValueError:
+                return {
+                    "statusCode": 400,
+                    "headers": utils.get_response_headers(),
+                    "body": json.dumps({"message": "Invalid fields"})
+                }
+            projection = {
+                "ProjectionExpression": projection_expression,
+                "ExpressionAttributeNames": projection_attribute_names
+            }
+
+        # BatchGetItemは同じキーを重複して指定できないため、順序を保ったまま重複を除く
+        unique_ids = list(dict.fromkeys(specification_ids))
+
+        items = {}
+        for i in range(0, len(unique_ids), BATCH_GET_CHUNK_SIZE):
+            keys = [
+                {"specification_id": {"S": specification_id}, "tenant_id": {"S": tenant_id}}
+                for specification_id in unique_ids[i:i + BATCH_GET_CHUNK_SIZE]
+            ]
+            for item in batch_get_items(keys, projection):
+                items[item["specification_id"]["S"]] = item
+
+        # リクエストされた順に並べ、存在しないIDは別に返す
+        found = [items[specification_id] for specification_id in unique_ids if specification_id in items]
+        not_found = [specification_id for specification_id in unique_ids if specification_id not in items]
+
+        # レスポンスに不要なデータを除いてDynamoDBのデータから直接JSONに変換
+        specifications_body = dynamo_codec.dumps_items(found, exclude=("tenant_id", "tenant_id#status", "render_hashes"))
+
+        return {
+            "statusCode": 200,
+            "headers": utils.get_response_headers(),
+            "body": '{"specifications":' + specifications_body + ',"not_found":' + json.dumps(not_found) + "}"
+        }
+
+    except Exception as e:
+        logger.error(e)
+        return utils.get_response_internal_server_error()
+
+
+def batch_get_items(keys: list, projection: dict) -> list:
+    """
+    BatchGetItemで仕様書をまとめて取得し、UnprocessedKeysは待機して再試行する
+
+    Args:
+        keys: 仕様書のキー（100件まで）
+        projection: ProjectionExpressionとExpressionAttributeNames
+
+    Returns:
+        list: DynamoDB形式のアイテム
+
+    Raises:
+        RuntimeError: 最大回数まで再試行しても取得できないキーがある場合
+    """
+    request_items = {SPECIFICATIONS_TABLE_NAME: {"Keys": keys, **projection}}
+    items = []
+    for attempt in range(MAX_BATCH_GET_ATTEMPTS):
+        response = dynamodb.batch_get_item(RequestItems=request_items)
+        items.extend(response.get("Responses", {}).get(SPECIFICATIONS_TABLE_NAME, []))
+        request_items = response.get("UnprocessedKeys") or {}
+        if not request_items:
+            return items
+        time.sleep(random.uniform(0, min(0.05 * (2 ** attempt), 1)))
+    raise RuntimeError("Failed to get specifications")
@@ -0,0 +1,122 @@
+import os
+import json
+import aws_clients
+import logging
+import utils
+import bulk_writes
+import metrics
+from datetime import datetime
+import event_logging
+
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
+
+# 環境変数
+SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
+
+# 1回のリクエストで指定できる最大件数
+MAX_BATCH_IDS = 500
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def lambda_handler(event, context):
+    event_logging.log_event(logger, event)
+
+    try:
+        # tenant_idを取得
+        tenant_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("custom:tenant_id")
+
+        # tenant_idが存在しない場合は400エラーを返す
+        if not tenant_id:
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": "tenant_id is required"})
+            }
+
+        # リクエストボディをJSONとしてパース
+        body = json.loads(utils.get_request_body(event) or "{}")
+        if not isinstance(body, dict):
+            body = {}
+        specification_ids = body.get("specification_ids")
+        status = body.get("status")
+
+        if (
+            not isinstance(specification_ids, list)
+            or not specification_ids
+            or len(specification_ids) > MAX_BATCH_IDS
+            or not all(isinstance(specification_id, str) and specification_id for specification_id in specification_ids)
+        ):
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": f"specification_ids must be a list of 1 to {MAX_BATCH_IDS} ids"})
+            }
+
+        if not isinstance(status, str) or not status:
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": "status is required"})
+            }
+
+        # 同じ仕様書を1つのトランザクションに含められないため重複を除く
+        unique_ids = list(dict.fromkeys(specification_ids))
+        updated_at = datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+        # 仕様書のステータスを100件ずつトランザクションで更新
+        results = {}
+        for i in range(0, len(unique_ids), bulk_writes.TRANSACT_WRITE_CHUNK_SIZE):
+            chunk = unique_ids[i:i + bulk_writes.TRANSACT_WRITE_CHUNK_SIZE]
+            transact_items = [
+                {
+                    "Update": {
+                        "TableName": SPECIFICATIONS_TABLE_NAME,
+                        "Key": {
+                            "specification_id": {"S": specification_id},
+                            "tenant_id": {"S": tenant_id}
+                        },
+                        "UpdateExpression": "SET #status = :status, #tenant_id_status = :tenant_id_status, #updated_at = :updated_at ADD #version :one",
+                        "ConditionExpression": "attribute_exists(specification_id)",
+                        "ExpressionAttributeNames": {
+                            "#status": "status",
+                            "#tenant_id_status": "tenant_id#status",
+                            "#updated_at": "updated_at",
+                            "#version": "version"
+                        },
+                        "ExpressionAttributeValues": {
+                            ":status": {"S": status},
+                            ":tenant_id_status": {"S": f"{tenant_id}#{status}"},
+                            ":updated_at": {"S": updated_at},
+                            ":one": {"N": "1"}
+                        }
+                    }
+                }
+                for specification_id in chunk
+            ]
+            for specification_id, reason in zip(chunk, bulk_writes.transact_write_items(dynamodb, transact_items)):
+                if reason is None:
+                    results[specification_id] = {"specification_id": specification_id, "result": "UPDATED"}
+                elif reason == "ConditionalCheckFailed":
+                    results[specification_id] = {"specification_id": specification_id, "result": "NOT_FOUND"}
+                else:
+                    logger.error(f"Failed to update specification {specification_id}: {reason}")
+                    results[specification_id] = {"specification_id": specification_id, "result": "FAILED"}
+
+        # ステータスはPDFの作成に使わないため再作成は依頼しない
+        updated_count = sum(1 for result in results.values() if result["result"] == "UPDATED")
+        if updated_count:
+            metrics.put_metrics({"RendersSkipped": updated_count})
+
+        return {
+            "statusCode": 200,
+            "headers": utils.get_response_headers(),
+            "body": json.dumps({"results": [results[specification_id] for specification_id in unique_ids]})
+        }
+
+    except Exception as e:
+        logger.error(e)
+        return utils.get_response_internal_server_error()
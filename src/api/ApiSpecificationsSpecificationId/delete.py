@@ -1,16 +1,19 @@
 import os
 import json
-import boto3
+import aws_clients
 import logging
 import utils
+import specification_drafts
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
-s3 = boto3.client("s3")
+dynamodb = aws_clients.lazy("dynamodb")
+sqs = aws_clients.lazy("sqs")
 
 # 環境変数
 SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
-S3_BUCKET_SPECIFICATIONS = os.environ["S3_BUCKET_SPECIFICATIONS"]
+PURGE_SPECIFICATION_SQS_QUEUE_URL = os.environ["PURGE_SPECIFICATION_SQS_QUEUE_URL"]
+SPECIFICATION_DRAFTS_TABLE_NAME = os.environ["SPECIFICATION_DRAFTS_TABLE_NAME"]
 
 # ログの設定
 logger = logging.getLogger(__name__)
@@ -18,8 +21,7 @@ logger.setLevel(logging.INFO)
 
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # パスパラメータからspecification_idを取得
@@ -60,12 +62,18 @@ def lambda_handler(event, context):
         if response["ResponseMetadata"]["HTTPStatusCode"] != 200:
             return utils.get_response_internal_server_error()
         
-        # S3から仕様書ファイルを削除
-        prefix = f"{tenant_id}/{specification_id}/"
-        s3_delete_success = delete_s3_folder(S3_BUCKET_SPECIFICATIONS, prefix)
+        # 反映されていない自動保存の下書きを破棄する
+        specification_drafts.discard_drafts(dynamodb, SPECIFICATION_DRAFTS_TABLE_NAME, tenant_id, [specification_id])
 
-        if not s3_delete_success:
-            logger.warning(f"Failed to delete S3 objects for specification {specification_id}, but DynamoDB deletion was successful")
+        # S3の仕様書ファイルはバックグラウンドで削除する
+        # 送信に失敗した場合は500を返し、再度の削除リクエストで送り直す
+        sqs.send_message(
+            QueueUrl=PURGE_SPECIFICATION_SQS_QUEUE_URL,
+            MessageBody=json.dumps({
+                "tenant_id": tenant_id,
+                "specification_id": specification_id
+            })
+        )
 
         return {
             "statusCode": 200,
@@ -76,36 +84,3 @@ def lambda_handler(event, context):
         logger.error(e)
         return utils.get_response_internal_server_error()
 
-
-def delete_s3_folder(bucket_name: str, prefix: str) -> bool:
-    """
-    S3のフォルダ内のすべてのオブジェクトを削除する
-    
-    Args:
-        bucket_name: S3バケット名
-        prefix: 削除するフォルダのプレフィックス
-        
-    Returns:
-        bool: 削除が成功した場合はTrue、失敗した場合はFalse
-    """
-    try:
-        # フォルダ内のすべてのオブジェクトをリストアップ
-        paginator = s3.get_paginator('list_objects_v2')
-        pages = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
-        
-        # 各オブジェクトを削除
-        for page in pages:
-            if 'Contents' in page:
-                objects_to_delete = [{'Key': obj['Key']} for obj in page['Contents']]
-                if objects_to_delete:
-                    s3.delete_objects(
-                        Bucket=bucket_name,
-                        Delete={'Objects': objects_to_delete}
-                    )
-        
-        logger.info(f"Successfully deleted all objects in {prefix}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error deleting S3 objects in {prefix}: {e}")
-        return False
\ No newline at end of file
@@ -1,12 +1,17 @@
 import os
 import json
-import boto3
+import aws_clients
 import logging
 import utils
+import dynamo_codec
+import compression
+import specification_attributes
+import etags
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
-s3 = boto3.client("s3")
+dynamodb = aws_clients.lazy("dynamodb")
+s3 = aws_clients.lazy("s3")
 
 # 環境変数
 SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
@@ -17,9 +22,9 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+@compression.compressible
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # パスパラメータからdを取得
@@ -48,13 +53,51 @@ def lambda_handler(event, context):
                 })
             }
 
+        # fieldsが指定されている場合は取得する属性を絞り込む（ETagに使う属性は常に取得する）
+        query_params = event.get("queryStringParameters") or {}
+        fields = query_params.get("fields") or ""
+        projection = {}
+        if fields:
+            try:
+                projection_expression, projection_attribute_names = utils.get_projection(
+                    fields,
+                    specification_attributes.SPECIFICATION_FIELDS,
+                    required_fields=("specification_id", "updated_at", "version")
+                )
+            except ValueError:
+                return {
+                    "statusCode": 400,
+                    "headers": utils.get_response_headers(),
+                    "body": json.dumps({"message": "Invalid fields"})
+                }
+            projection = {
+                "ProjectionExpression": projection_expression,
+                "ExpressionAttributeNames": projection_attribute_names
+            }
+
+        key = {
+            "specification_id": {"S": specification_id},
+            "tenant_id": {"S": tenant_id}
+        }
+
+        # If-None-Matchが指定された場合は更新日時と版数だけを取得して比較し、一致すれば本文を返さない
+        if etags.get_if_none_match(event):
+            response = dynamodb.get_item(
+                TableName=SPECIFICATIONS_TABLE_NAME,
+                Key=key,
+                ProjectionExpression="#updated_at, #version",
+                ExpressionAttributeNames={"#updated_at": "updated_at", "#version": "version"}
+            )
+            if "Item" in response:
+                etag = get_etag(response["Item"], fields)
+                if etags.is_not_modified(event, etag):
+                    return etags.get_response_not_modified(etag)
+
         # 仕様書情報を取得
         response = dynamodb.get_item(
             TableName=SPECIFICATIONS_TABLE_NAME,
-            Key={
-                "specification_id": {"S": specification_id},
-                "tenant_id": {"S": tenant_id}
-            }
+            Key=key,
+            **projection
         )
 
         # 仕様書が存在しない場合
@@ -67,21 +110,29 @@ def lambda_handler(event, context):
                 })
             }
 
-        # レスポンスに不要なデータを削除
-        specification_item = response["Item"]
-        specification_item.pop("tenant_id", None)
-        specification_item.pop("tenant_id#status", None)
-
-        # DynamoDBのデータをPythonオブジェクトに変換
-        specification_data = utils.dynamo_to_python(specification_item)
+        # レスポンスに不要なデータを除いてDynamoDBのデータから直接JSONに変換
+        specification_body = dynamo_codec.dumps_item(response["Item"], exclude=("tenant_id", "tenant_id#status", "render_hashes"))
 
         # 仕様書情報を返す
         return {
             "statusCode": 200,
-            "headers": utils.get_response_headers(),
-            "body": json.dumps(specification_data, default=utils.decimal_to_num)
+            "headers": etags.get_response_headers(get_etag(response["Item"], fields)),
+            "body": specification_body
         }
 
     except Exception as e:
         logger.error(e)
         return utils.get_response_internal_server_error()
+
+
+def get_etag(item: dict, fields: str) -> str:
+    """
+    仕様書の更新日時と版数、取得する属性からETagを作成する
+
+    版数はPDFの作成（specification_fileの更新）でも上がるため、updated_atが変わらない更新も反映される。
+    """
+    return etags.make_etag(
+        item.get("updated_at", {}).get("S"),
+        item.get("version", {}).get("N", "0"),
+        fields
+    )
@@ -1,40 +1,37 @@
 import os
 import json
-import boto3
+import aws_clients
 import logging
 import utils
+import metrics
+import specification_drafts
+import specification_updates
+import schema_validators
 import uuid
 import base64
-from datetime import datetime
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
-sqs = boto3.client("sqs")
-s3 = boto3.client("s3")
+dynamodb = aws_clients.lazy("dynamodb")
+sqs = aws_clients.lazy("sqs")
+s3 = aws_clients.lazy("s3")
 
 # 環境変数
 SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
 CREATE_SPECIFICATION_SQS_QUEUE_URL = os.environ["CREATE_SPECIFICATION_SQS_QUEUE_URL"]
 S3_BUCKET_SPECIFICATIONS = os.environ["S3_BUCKET_SPECIFICATIONS"]
+SPECIFICATION_DRAFTS_TABLE_NAME = os.environ["SPECIFICATION_DRAFTS_TABLE_NAME"]
+COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL = os.environ["COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL"]
 
-# スキーマの読み込み
-# def load_schema():
-#     schema_path = os.path.join(os.path.dirname(__file__), "schema.yaml")
-#     with open(schema_path, "r") as f:
-#         schema = yaml.safe_load(f)
-#     return schema["paths"]["/v1/specifications/{specification_id}"]["put"]
-
-# スキーマの取得
-# request_schema = load_schema()["requestBody"]["content"]["application/json"]["schema"]
-# response_schema = load_schema()["responses"]["200"]["content"]["application/json"]["schema"]
+# スキーマの検証関数（ビルド済みのschemas.jsonから作成し、コンテナ内で使い回す）
+validators = schema_validators.load(os.path.dirname(__file__), "PUT /v1/specifications/{specification_id}")
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # パスパラメータからuser_idを取得
@@ -62,89 +59,73 @@ def lambda_handler(event, context):
             }
 
         # リクエストボディをパース
-        body = json.loads(event.get("body", "{}"))
-        
-        # 数値をDecimal型に変換
-        body = utils.num_to_decimal(body)
-        
-        # 更新式と属性の準備
-        update_expression = "SET "
-        expression_attribute_names = {}
-        expression_attribute_values = {}
-        
-        # 通常の更新項目を追加
-        update_items = list(filter(lambda x: x in body, [
-            "brand_name",
-            "product_name",
-            "product_code",
-            "specification_group_id",
-            "type",
-            "progress",
-            "fit",
-            "custom_fit",
-            "fabric",
-            "tag",
-            "care_label",
-            "patch",
-            "oem_points",
-            "sample",
-            "main_production",
-            "information"
-        ]))
-        for item in update_items:
-            update_expression += f"#{item} = :{item}, "
-            expression_attribute_names[f"#{item}"] = item
-            expression_attribute_values[f":{item}"] = utils.value_to_dynamo(body[item])
-
-        if body.get("status") is not None:
-            update_expression += "#status = :status, "
-            expression_attribute_names["#status"] = "status"
-            expression_attribute_values[":status"] = utils.value_to_dynamo(body["status"])
-            update_expression += "#tenant_id_status = :tenant_id_status, "
-            expression_attribute_names["#tenant_id_status"] = "tenant_id#status"
-            expression_attribute_values[":tenant_id_status"] = utils.value_to_dynamo(f"{tenant_id}#{body['status']}")
-        
-        # updated_atを追加
-        update_expression += "#updated_at = :updated_at"
-        expression_attribute_names["#updated_at"] = "updated_at"
-        expression_attribute_values[":updated_at"] = utils.value_to_dynamo(datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00"))
+        body = json.loads(utils.get_request_body(event, "{}"))
+        query_params = event.get("queryStringParameters") or {}
+
+        # スキーマバリデーション（自動保存も同じスキーマで検証する）
+        try:
+            validators.request(body)
+        except schema_validators.SchemaValidationError as e:
+            logger.error(f"Invalid request body: {e}")
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": "Invalid request body"})
+            }
+
+        # 自動保存の場合は下書きにマージし、一定時間編集がなければまとめて反映する
+        if query_params.get("mode") == "autosave":
+            if specification_drafts.save_draft(dynamodb, SPECIFICATION_DRAFTS_TABLE_NAME, tenant_id, specification_id, body):
+                specification_drafts.schedule_commit(sqs, COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL, tenant_id, specification_id)
+            return {
+                "statusCode": 202,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({
+                    "specification_id": specification_id
+                })
+            }
+
+        # 明示的な保存の場合は、まだ反映していない下書きにリクエストの内容を重ねて反映する
+        draft = specification_drafts.get_draft(dynamodb, SPECIFICATION_DRAFTS_TABLE_NAME, tenant_id, specification_id)
+        if draft is not None:
+            body = {**specification_drafts.draft_values(draft), **body}
 
         # 仕様書情報を更新
-        update_specification_response = dynamodb.update_item(
-            TableName=SPECIFICATIONS_TABLE_NAME,
-            Key={
-                "specification_id": {"S": specification_id},
-                "tenant_id": {"S": tenant_id}
-            },
-            UpdateExpression=update_expression,
-            ExpressionAttributeNames=expression_attribute_names,
-            ExpressionAttributeValues=expression_attribute_values
-        )
+        try:
+            render_changed = specification_updates.update_specification(
+                dynamodb, SPECIFICATIONS_TABLE_NAME, tenant_id, specification_id, body
+            )
+        except specification_updates.SpecificationNotFoundError:
+            # 削除済みの仕様書の下書きは反映先がないため破棄する
+            if draft is not None:
+                specification_drafts.delete_draft(dynamodb, SPECIFICATION_DRAFTS_TABLE_NAME, tenant_id, specification_id, draft["revision"])
+            return {
+                "statusCode": 404,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({
+                    "message": "Specification not found"
+                })
+            }
+
+        # 反映した下書きを削除（反映中に自動保存された場合は予約済みの反映に任せる）
+        if draft is not None:
+            specification_drafts.delete_draft(dynamodb, SPECIFICATION_DRAFTS_TABLE_NAME, tenant_id, specification_id, draft["revision"])
 
-        if update_specification_response["ResponseMetadata"]["HTTPStatusCode"] != 200:
+        # PDFの作成に使う属性が変わっていない場合は再作成しない
+        # 同じキーで画像を差し替えた場合などは render=force で再作成できる
+        if not render_changed and query_params.get("render") != "force":
+            metrics.put_metrics({"RendersSkipped": 1})
             return {
-                "statusCode": 500,
+                "statusCode": 200,
                 "headers": utils.get_response_headers(),
-                "body": json.dumps({"message": "Internal server error"})
+                "body": json.dumps({
+                    "specification_id": specification_id
+                })
             }
 
         # キューにメッセージを送信
-        response_sqs = sqs.send_message(
-            QueueUrl=CREATE_SPECIFICATION_SQS_QUEUE_URL,
-            MessageBody=json.dumps({
-                "specification_id": specification_id,
-                "tenant_id": tenant_id
-            }),
-            MessageAttributes={
-                "specification_id": {
-                    "DataType": "String",
-                    "StringValue": specification_id
-                },
-                "tenant_id": {
-                    "DataType": "String",
-                    "StringValue": tenant_id
-                }
-            }
+        response_sqs = specification_updates.send_render_message(
+            sqs, CREATE_SPECIFICATION_SQS_QUEUE_URL, tenant_id, specification_id
         )
 
         if response_sqs.get("ResponseMetadata", {}).get("HTTPStatusCode") != 200:
@@ -155,6 +136,8 @@ def lambda_handler(event, context):
                 "body": json.dumps({"message": "Internal server error"})
             }
 
+        metrics.put_metrics({"RendersQueued": 1})
+
         return {
             "statusCode": 200,
             "headers": utils.get_response_headers(),
@@ -1,12 +1,14 @@
 import json
 import logging
-import boto3
+import aws_clients
 import os
 import utils
+import dynamo_codec
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
-s3 = boto3.client("s3")
+dynamodb = aws_clients.lazy("dynamodb")
+s3 = aws_clients.lazy("s3")
 
 #環境変数
 SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
@@ -17,8 +19,7 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # パスパラメータからspecification_idを取得
@@ -59,7 +60,7 @@ def lambda_handler(event, context):
                 "body": json.dumps({"message": "specification not found"})
             }
 
-        specification_data = utils.dynamo_to_python(response["Item"])
+        specification_data = dynamo_codec.item_to_python(response["Item"])
         
         if not specification_data["specification_file"]:
             return {
@@ -1,6 +1,13 @@
+import aws_metrics
+
+
+@aws_metrics.instrument
 def lambda_handler(event, context):
     http_method = event.get("httpMethod", "").upper()
-    if http_method == "POST":
+    if http_method == "GET":
+        from get import lambda_handler as get_handler
+        return get_handler(event, context)
+    elif http_method == "POST":
         from post import lambda_handler as post_handler
         return post_handler(event, context)
     else:
@@ -0,0 +1,78 @@
+import json
+import logging
+import aws_clients
+import os
+import utils
+import dynamo_codec
+import event_logging
+
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
+
+#環境変数
+DUPLICATE_JOBS_TABLE_NAME = os.environ["DUPLICATE_JOBS_TABLE_NAME"]
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+def lambda_handler(event, context):
+    event_logging.log_event(logger, event)
+
+    try:
+        # パスパラメータからspecification_idとjob_idを取得
+        path_params = event.get("pathParameters") or {}
+        specification_id = path_params.get("specification_id")
+        job_id = path_params.get("job_id")
+
+        # specification_idまたはjob_idが存在しない場合は400エラーを返す
+        if not specification_id or not job_id:
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": "specification_id and job_id are required"})
+            }
+
+        # tenant_idを取得
+        tenant_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("custom:tenant_id")
+
+        # tenant_idが存在しない場合は400エラーを返す
+        if not tenant_id:
+            return {
+                "statusCode": 400,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": "tenant_id is required"})
+            }
+
+        # 複製ジョブを取得
+        response = dynamodb.get_item(
+            TableName=DUPLICATE_JOBS_TABLE_NAME,
+            Key={"job_id": {"S": job_id}, "tenant_id": {"S": tenant_id}}
+        )
+
+        # 別の仕様書のジョブは存在しないものとして扱う
+        if "Item" not in response or response["Item"]["specification_id"]["S"] != specification_id:
+            return {
+                "statusCode": 404,
+                "headers": utils.get_response_headers(),
+                "body": json.dumps({"message": "Duplicate job not found"})
+            }
+
+        job = dynamo_codec.item_to_python(response["Item"])
+
+        return {
+            "statusCode": 200,
+            "headers": utils.get_response_headers(),
+            "body": json.dumps({
+                "job_id": job["job_id"],
+                "specification_id": job["duplicate_specification_id"],
+                "status": job["status"],
+                "copied": job["copied"],
+                "total": job.get("total"),
+                "error": job.get("error")
+            }, default=dynamo_codec.json_default)
+        }
+
+    except Exception as e:
+        logger.error(e)
+        return utils.get_response_internal_server_error()
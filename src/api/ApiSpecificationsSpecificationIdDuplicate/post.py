@@ -1,29 +1,38 @@
 import json
 import logging
-import boto3
+import aws_clients
 import os
 import utils
+import dynamo_codec
+import specification_attributes
+import s3_transfer
 import uuid
+import time
 from datetime import datetime
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
-s3 = boto3.client("s3")
-sqs = boto3.client("sqs")
+dynamodb = aws_clients.lazy("dynamodb")
+s3 = aws_clients.lazy("s3", read_timeout=aws_clients.TRANSFER_READ_TIMEOUT)
+sqs = aws_clients.lazy("sqs")
 
 #環境変数
 SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
 USERS_TABLE_NAME = os.environ["USERS_TABLE_NAME"]
 S3_BUCKET_SPECIFICATIONS = os.environ["S3_BUCKET_SPECIFICATIONS"]
 CREATE_SPECIFICATION_SQS_QUEUE_URL = os.environ["CREATE_SPECIFICATION_SQS_QUEUE_URL"]
+DUPLICATE_JOBS_TABLE_NAME = os.environ["DUPLICATE_JOBS_TABLE_NAME"]
+DUPLICATE_SPECIFICATION_SQS_QUEUE_URL = os.environ["DUPLICATE_SPECIFICATION_SQS_QUEUE_URL"]
+
+# 複製ジョブの保持期間（秒）
+DUPLICATE_JOB_TTL_SECONDS = 7 * 24 * 60 * 60
 
 # ログの設定
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # パスパラメータからspecification_idを取得
@@ -53,12 +62,9 @@ def lambda_handler(event, context):
         # リクエストユーザー情報の取得
         request_user_id = event.get("requestContext", {}).get("authorizer", {}).get("claims", {}).get("sub")
 
-        request_user_data = dynamodb.get_item(
-            TableName=USERS_TABLE_NAME,
-            Key={"user_id": {"S": request_user_id}, "tenant_id": {"S": tenant_id}}
-        )
+        request_user_data = utils.get_user_item(request_user_id, tenant_id, USERS_TABLE_NAME)
 
-        if "Item" not in request_user_data:
+        if request_user_data is None:
             logger.error("User not found")
             return {
                 "statusCode": 400,
@@ -67,7 +73,7 @@ def lambda_handler(event, context):
             }
 
         # リクエストユーザー名を取得
-        request_user_name = utils.dynamo_to_python(request_user_data.get("Item", {})).get("user_name")
+        request_user_name = dynamo_codec.item_to_python(request_user_data).get("user_name")
         
         # テーブルからspecification_idを取得
         response = dynamodb.get_item(
@@ -83,30 +89,46 @@ def lambda_handler(event, context):
                 "body": json.dumps({"message": "specification not found"})
             }
         
-        specification_data = utils.dynamo_to_python(response["Item"])
+        # DynamoDBの形式のまま複製し、変更する属性だけを変換する
+        specification_item = response["Item"]
         duplicate_specification_id = str(uuid.uuid4())
+        product_name = dynamo_codec.to_python(specification_item["product_name"])
         
         # データの複製
-        specification_data["specification_id"] = duplicate_specification_id
-        specification_data["status"] = "DRAFT"
-        specification_data["tenant_id#status"] = f"{tenant_id}#DRAFT"
-        specification_data["product_name"] = f"{specification_data['product_name']} (Copy)"
-        specification_data["updated_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00")
-        specification_data["updated_by"] = {
-            "user_id": request_user_id,
-            "user_name": request_user_name
-        }
+        specification_item.update(dynamo_codec.item_to_dynamo({
+            "specification_id": duplicate_specification_id,
+            "status": "DRAFT",
+            "tenant_id#status": f"{tenant_id}#DRAFT",
+            "product_name": f"{product_name} (Copy)",
+            "updated_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+            "version": 1,
+            "updated_by": {
+                "user_id": request_user_id,
+                "user_name": request_user_name
+            }
+        }))
+
+        # 変更した製品名のハッシュを更新し、複製元のハッシュが残らないようにする
+        if "render_hashes" in specification_item:
+            specification_item["render_hashes"]["M"]["product_name"] = {
+                "S": specification_attributes.render_hash(f"{product_name} (Copy)")
+            }
 
         # テーブルにデータを保存
         response_specifications_table = dynamodb.put_item(
             TableName=SPECIFICATIONS_TABLE_NAME,
-            Item=utils.python_to_dynamo(specification_data)
+            Item=specification_item
         )
         
         if response_specifications_table.get("ResponseMetadata", {}).get("HTTPStatusCode") != 200:
             logger.error("Failed to insert data into specifications table")
             return utils.get_response_internal_server_error()
         
+        # 非同期モードの場合はS3のコピーと仕様書の作成をワーカーに任せてすぐに返す
+        query_params = event.get("queryStringParameters") or {}
+        if query_params.get("async") == "true":
+            return start_duplicate_job(tenant_id, specification_id, duplicate_specification_id)
+
         # S3のフォルダ内のすべてのオブジェクトを複製
         # まず、元のフォルダ内のすべてのオブジェクトをリストアップ
         paginator = s3.get_paginator('list_objects_v2')
@@ -123,46 +145,18 @@ def lambda_handler(event, context):
                 logger.warning(f"No objects found in source folder: {source_prefix}")
                 # フォルダが空でもエラーにはしない（新規作成の場合など）
             else:
-                # 各オブジェクトを個別にコピー
-                for obj in source_objects:
-                    source_key = obj['Key']
-                    # 新しいキー名を生成（specification_id部分を新しいIDに置換）
-                    destination_key = source_key.replace(f"{tenant_id}/{specification_id}/", f"{tenant_id}/{duplicate_specification_id}/")
-                    
-                    # オブジェクトをコピー
-                    copy_source = {
-                        'Bucket': S3_BUCKET_SPECIFICATIONS,
-                        'Key': source_key
-                    }
-                    
-                    response_s3 = s3.copy_object(
-                        Bucket=S3_BUCKET_SPECIFICATIONS,
-                        CopySource=copy_source,
-                        Key=destination_key
-                    )
-                    
-                    if response_s3.get("ResponseMetadata", {}).get("HTTPStatusCode") != 200:
-                        logger.error(f"Failed to copy object from s3: {source_key}")
-                        return utils.get_response_internal_server_error()
-                
-                # コピーしたフォルダのうち{specification_id}.pdfを削除
-                pdf_key = f"{tenant_id}/{duplicate_specification_id}/{specification_id}.pdf"
-
-                try:
-                    response_s3 = s3.delete_object(
-                        Bucket=S3_BUCKET_SPECIFICATIONS,
-                        Key=pdf_key
-                    )
-
-                    if response_s3.get("ResponseMetadata", {}).get("HTTPStatusCode") != 204:
-                        logger.warning(f"Failed to delete PDF file: {pdf_key}")
-                        # PDFファイルの削除に失敗してもエラーにはしない
-                        pass
-
-                except Exception as e:
-                    logger.warning(f"Exception occurred while deleting PDF file: {e}")
-                    # PDFファイルの削除に失敗してもエラーにはしない
-                    pass
+                # 元の仕様書のPDFは複製しない（複製後に新しく作成される）
+                pdf_key = f"{source_prefix}{specification_id}.pdf"
+                destination_prefix = f"{tenant_id}/{duplicate_specification_id}/"
+
+                copies = [
+                    (obj["Key"], destination_prefix + obj["Key"][len(source_prefix):], obj["Size"])
+                    for obj in source_objects
+                    if obj["Key"] != pdf_key
+                ]
+
+                # オブジェクトを並列でコピー
+                s3_transfer.copy_objects(s3, S3_BUCKET_SPECIFICATIONS, copies)
 
         except Exception as e:
             logger.error(f"Failed to copy S3 objects: {e}")
@@ -204,3 +198,45 @@ def lambda_handler(event, context):
     except Exception as e:
         logger.error(e)
         return utils.get_response_internal_server_error()
+
+
+def start_duplicate_job(tenant_id: str, specification_id: str, duplicate_specification_id: str) -> dict:
+    """
+    複製ジョブを登録してワーカーのキューに送る
+
+    Args:
+        tenant_id: テナントID
+        specification_id: 複製元の仕様書ID
+        duplicate_specification_id: 複製先の仕様書ID
+
+    Returns:
+        dict: 202レスポンス
+    """
+    job_id = str(uuid.uuid4())
+    dynamodb.put_item(
+        TableName=DUPLICATE_JOBS_TABLE_NAME,
+        Item=dynamo_codec.item_to_dynamo({
+            "job_id": job_id,
+            "tenant_id": tenant_id,
+            "specification_id": specification_id,
+            "duplicate_specification_id": duplicate_specification_id,
+            "status": "QUEUED",
+            "copied": 0,
+            "created_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+            "expires_at": int(time.time()) + DUPLICATE_JOB_TTL_SECONDS
+        })
+    )
+
+    sqs.send_message(
+        QueueUrl=DUPLICATE_SPECIFICATION_SQS_QUEUE_URL,
+        MessageBody=json.dumps({"job_id": job_id, "tenant_id": tenant_id})
+    )
+
+    return {
+        "statusCode": 202,
+        "headers": utils.get_response_headers(),
+        "body": json.dumps({
+            "specification_id": duplicate_specification_id,
+            "job_id": job_id
+        })
+    }
@@ -1,3 +1,7 @@
+import aws_metrics
+
+
+@aws_metrics.instrument
 def lambda_handler(event, context):
     http_method = event.get("httpMethod", "").upper()
     if http_method == "GET":
@@ -1,11 +1,10 @@
 import os
 import json
-import boto3
 import logging
 import utils
-
-# AWSクライアント
-dynamodb = boto3.client("dynamodb")
+import dynamo_codec
+import event_logging
+import etags
 
 # 環境変数
 TENANTS_TABLE_NAME = os.environ["TENANTS_TABLE_NAME"]
@@ -16,8 +15,7 @@ logger.setLevel(logging.INFO)
 
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     # クエリパラメータを取得
     query_params = event.get("queryStringParameters", {})
@@ -37,16 +35,11 @@ def lambda_handler(event, context):
                 })
             }
         
-        tenant = dynamodb.get_item(
-            TableName=TENANTS_TABLE_NAME,
-            Key={
-                "tenant_id": {"S": tenant_id},
-                "kind": {"S": kind}
-            }
-        )
+        # ウォームコンテナではキャッシュから取得する
+        tenant = utils.get_tenant_item(tenant_id, TENANTS_TABLE_NAME, kind)
 
         # テナントが存在しない場合
-        if "Item" not in tenant:
+        if tenant is None:
             return {
                 "statusCode": 404,
                 "headers": utils.get_response_headers(),
@@ -55,15 +48,19 @@ def lambda_handler(event, context):
                 })
             }
         
-        tenant_item = tenant["Item"]
-        tenant_item.pop("tenant_id", None)
-        tenant_item.pop("kind", None)
+        # レスポンスに不要なデータを除いてDynamoDBのデータから直接JSONに変換
+        tenant_body = dynamo_codec.dumps_item(tenant, exclude=("tenant_id", "kind"))
+
+        # 本文からETagを作成し、変わっていなければ本文を返さない
+        etag = etags.body_etag(tenant_body)
+        if etags.is_not_modified(event, etag):
+            return etags.get_response_not_modified(etag)
 
         # テナント情報を返す
         return {
             "statusCode": 200,
-            "headers": utils.get_response_headers(),
-            "body": json.dumps(utils.dynamo_to_python(tenant_item), default=utils.decimal_to_num)
+            "headers": etags.get_response_headers(etag),
+            "body": tenant_body
         }
 
     except Exception as e:
@@ -1,11 +1,13 @@
 import os
 import json
-import boto3
+import aws_clients
 import logging
 import utils
+import dynamo_codec
+import event_logging
 
 # AWSクライアント
-dynamodb = boto3.client("dynamodb")
+dynamodb = aws_clients.lazy("dynamodb")
 
 # 環境変数
 TENANTS_TABLE_NAME = os.environ["TENANTS_TABLE_NAME"]
@@ -16,8 +18,7 @@ logger.setLevel(logging.INFO)
 
 
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
-    logger.info(f"Received context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # tenant_idを取得
@@ -34,7 +35,7 @@ def lambda_handler(event, context):
             }
         
         # リクエストボディをJSONとしてパース
-        body = json.loads(event.get("body", "{}"))
+        body = json.loads(utils.get_request_body(event, "{}"))
 
         update_items = list(filter(lambda x: x in body, ["tenant_name", "contact", "billing_information", "shipping_information"]))
 
@@ -45,19 +46,22 @@ def lambda_handler(event, context):
         }
 
         expression_attribute_values = {
-            f":{item}": utils.value_to_dynamo(body[item]) for item in update_items
+            f":{item}": dynamo_codec.to_dynamo(body[item]) for item in update_items
         }
         
-        # テナント情報を更新
+        kind = body.get("kind", "TENANT")
+
+        # テナント情報を更新し、更新後のアイテムを受け取る
         update_tenant_response = dynamodb.update_item(
             TableName=TENANTS_TABLE_NAME,
             Key={
                 "tenant_id": {"S": tenant_id},
-                "kind": {"S": body.get("kind", "TENANT")}
+                "kind": {"S": kind}
             },
             UpdateExpression=update_expression,
             ExpressionAttributeNames=expression_attribute_names,
-            ExpressionAttributeValues=expression_attribute_values
+            ExpressionAttributeValues=expression_attribute_values,
+            ReturnValues="ALL_NEW"
         )
 
         if update_tenant_response["ResponseMetadata"]["HTTPStatusCode"] != 200:
@@ -66,28 +70,23 @@ def lambda_handler(event, context):
                 "headers": utils.get_response_headers(),
                 "body": json.dumps({"message": "Internal server error"})
             }
-        
-        # テナント情報を取得
-        get_tenant_response = dynamodb.get_item(
-            TableName=TENANTS_TABLE_NAME,
-            Key={
-                "tenant_id": {"S": tenant_id},
-                "kind": {"S": body.get("kind", "TENANT")}
-            }
-        )
 
-        if "Item" not in get_tenant_response:
+        if "Attributes" not in update_tenant_response:
             return {
                 "statusCode": 404,
                 "headers": utils.get_response_headers(),
                 "body": json.dumps({"message": "Tenant not found"})
             }
 
+        # このコンテナのキャッシュを更新後の値に置き換える
+        tenant = update_tenant_response["Attributes"]
+        utils.tenant_cache.set((tenant_id, kind), tenant)
+
         # テナント情報を返す
         return {
             "statusCode": 200,
             "headers": utils.get_response_headers(),
-            "body": json.dumps(utils.dynamo_to_python(get_tenant_response["Item"]))
+            "body": dynamo_codec.dumps_item(tenant)
         }
 
     except Exception as e:
@@ -1,14 +1,17 @@
 import os
 import json
-import boto3
+import aws_clients
+import dynamo_codec
+import compression
 
-# AWSリソース
-dynamodb = boto3.resource("dynamodb")
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
 
 # 環境変数
-users_table = dynamodb.Table(os.environ["USERS_TABLE_NAME"])
+USERS_TABLE_NAME = os.environ["USERS_TABLE_NAME"]
 
 
+@compression.compressible
 def lambda_handler(event, context):
     headers = {
         "Content-Type": "application/json",
@@ -27,18 +30,19 @@ def lambda_handler(event, context):
 
     try:
         # tenant_idに一致するユーザーを取得
-        response = users_table.query(
+        response = dynamodb.query(
+            TableName=USERS_TABLE_NAME,
             IndexName="TenantIdIndex",
             KeyConditionExpression="tenant_id = :tenant_id",
             ExpressionAttributeValues={
-                ":tenant_id": tenant_id
+                ":tenant_id": {"S": tenant_id}
             }
         )
 
         return {
             "statusCode": 200,
             "headers": headers,
-            "body": json.dumps(response.get("Items", []))
+            "body": json.dumps(list(map(dynamo_codec.item_to_python, response.get("Items", []))), default=dynamo_codec.json_default)
         }
 
     except Exception as e:
@@ -1,25 +1,21 @@
-import json
-from get import lambda_handler as get_handler
-from put import lambda_handler as put_handler
+import aws_metrics
 
 
+@aws_metrics.instrument
 def lambda_handler(event, context):
     # HTTPメソッドを取得
     http_method = event.get("httpMethod", "").upper()
 
-    # メソッドに応じて適切なハンドラーを呼び出し
+    # メソッドに応じて適切なハンドラーを呼び出し（初回の呼び出し時に読み込む）
     if http_method == "GET":
+        from get import lambda_handler as get_handler
         return get_handler(event, context)
     elif http_method == "PUT":
+        from put import lambda_handler as put_handler
         return put_handler(event, context)
     # elif http_method == "DELETE":
+    #     from delete import lambda_handler as delete_handler
     #     return delete_handler(event, context)
     else:
-        return {
-            "statusCode": 405,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*"
-            },
-            "body": json.dumps({"message": "Method not allowed"})
-        }
+        from utils import get_response_not_allowed_method
+        return get_response_not_allowed_method()
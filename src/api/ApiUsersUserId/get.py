@@ -1,28 +1,21 @@
 import os
 import json
-import boto3
+import aws_clients
 from botocore.exceptions import ClientError
-import yaml
-from jsonschema import validate, ValidationError
+import dynamo_codec
+import schema_validators
 
-# AWSリソース
-dynamodb = boto3.resource("dynamodb")
-s3 = boto3.client("s3")
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
+s3 = aws_clients.lazy("s3")
 
 # 環境変数
-users_table = dynamodb.Table(os.environ["USERS_TABLE_NAME"])
+USERS_TABLE_NAME = os.environ["USERS_TABLE_NAME"]
 s3_bucket = os.environ.get("S3_BUCKET_STATIC_ASSETS", "bucket-floor-studios-core-main-static-assets")
 s3_region = os.environ.get("AWS_REGION", "ap-northeast-1")
 
-# スキーマの読み込み
-def load_schema():
-    schema_path = os.path.join(os.path.dirname(__file__), "schema.yaml")
-    with open(schema_path, "r") as f:
-        schema = yaml.safe_load(f)
-    return schema["paths"]["/v1/users/{user_id}"]["get"]
-
-# スキーマの取得
-response_schema = load_schema()["responses"]["200"]["content"]["application/json"]["schema"]
+# スキーマの検証関数（ビルド済みのschemas.jsonから作成し、コンテナ内で使い回す）
+validators = schema_validators.load(os.path.dirname(__file__), "GET /v1/users/{user_id}")
 
 def lambda_handler(event, context):
     # CORSヘッダーを定義
@@ -59,10 +52,11 @@ def lambda_handler(event, context):
             }
 
         # ユーザー情報を取得
-        response = users_table.get_item(
+        response = dynamodb.get_item(
+            TableName=USERS_TABLE_NAME,
             Key={
-                "user_id": user_id,
-                "tenant_id": tenant_id
+                "user_id": {"S": user_id},
+                "tenant_id": {"S": tenant_id}
             }
         )
 
@@ -77,7 +71,7 @@ def lambda_handler(event, context):
             }
         
         # ユーザー情報を取得
-        user_data = response["Item"]
+        user_data = dynamo_codec.item_to_python(response["Item"])
         
         # プロフィール画像のURLを生成
         # profile_image_key = f"{tenant_id}/{user_id}/profile.png"
@@ -100,8 +94,8 @@ def lambda_handler(event, context):
         
         # レスポンスのスキーマバリデーション
         try:
-            validate(instance=user_data, schema=response_schema)
-        except ValidationError:
+            validators.response(user_data)
+        except schema_validators.SchemaValidationError:
             return {
                 "statusCode": 500,
                 "headers": headers,
@@ -114,7 +108,7 @@ def lambda_handler(event, context):
         return {
             "statusCode": 200,
             "headers": headers,
-            "body": json.dumps(user_data)
+            "body": json.dumps(user_data, default=dynamo_codec.json_default)
         }
 
     except ClientError as e:
@@ -1,27 +1,20 @@
 import os
 import json
-import yaml
-import boto3
+import aws_clients
 from botocore.exceptions import ClientError
-from jsonschema import validate, ValidationError
+import dynamo_codec
+import utils
+import schema_validators
 
-# AWSリソース
-dynamodb = boto3.resource("dynamodb")
-s3 = boto3.client("s3")
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
+s3 = aws_clients.lazy("s3")
 
 # 環境変数
-users_table = dynamodb.Table(os.environ["USERS_TABLE_NAME"])
+USERS_TABLE_NAME = os.environ["USERS_TABLE_NAME"]
 
-# スキーマの読み込み
-def load_schema():
-    schema_path = os.path.join(os.path.dirname(__file__), "schema.yaml")
-    with open(schema_path, "r") as f:
-        schema = yaml.safe_load(f)
-    return schema["paths"]["/v1/users/{user_id}"]["put"]
-
-# スキーマの取得
-request_schema = load_schema()["requestBody"]["content"]["application/json"]["schema"]
-response_schema = load_schema()["responses"]["200"]["content"]["application/json"]["schema"]
+# スキーマの検証関数（ビルド済みのschemas.jsonから作成し、コンテナ内で使い回す）
+validators = schema_validators.load(os.path.dirname(__file__), "PUT /v1/users/{user_id}")
 
 
 def lambda_handler(event, context):
@@ -57,12 +50,12 @@ def lambda_handler(event, context):
             }
 
         # リクエストボディをJSONとしてパース
-        body = json.loads(event.get("body", "{}"))
+        body = json.loads(utils.get_request_body(event, "{}"))
         
         # スキーマバリデーション
         try:
-            validate(instance=body, schema=request_schema)
-        except ValidationError:
+            validators.request(body)
+        except schema_validators.SchemaValidationError:
             return {
                 "statusCode": 400,
                 "headers": headers,
@@ -78,18 +71,20 @@ def lambda_handler(event, context):
         }
 
         expression_attribute_values = {
-            f":{item}": body[item] for item in update_items
+            f":{item}": dynamo_codec.to_dynamo(body[item]) for item in update_items
         }
 
-        # ユーザー情報を更新
-        update_user_response = users_table.update_item(
+        # ユーザー情報を更新し、更新後のユーザー情報を取得
+        update_user_response = dynamodb.update_item(
+            TableName=USERS_TABLE_NAME,
             Key={
-                "user_id": user_id,
-                "tenant_id": tenant_id
+                "user_id": {"S": user_id},
+                "tenant_id": {"S": tenant_id}
             },
             UpdateExpression=update_expression,
             ExpressionAttributeNames=expression_attribute_names,
-            ExpressionAttributeValues=expression_attribute_values
+            ExpressionAttributeValues=expression_attribute_values,
+            ReturnValues="ALL_NEW"
         )
 
         if update_user_response["ResponseMetadata"]["HTTPStatusCode"] != 200:
@@ -99,26 +94,23 @@ def lambda_handler(event, context):
                 "body": json.dumps({"message": "Internal server error"})
             }
 
-        # ユーザー情報を取得
-        get_user_response = users_table.get_item(
-            Key={
-                "user_id": user_id,
-                "tenant_id": tenant_id
-            }
-        )
-
         # ユーザー情報が存在しない場合は404エラーを返す
-        if "Item" not in get_user_response:
+        if "Attributes" not in update_user_response:
             return {
                 "statusCode": 404,
                 "headers": headers,
                 "body": json.dumps({"message": "User not found"})
             }
 
+        # 同じコンテナ（単一関数のルーター）のキャッシュに変更後のユーザー情報を書き込む
+        utils.user_cache.set((tenant_id, user_id), update_user_response["Attributes"])
+
+        user_data = dynamo_codec.item_to_python(update_user_response["Attributes"])
+
         # レスポンスのスキーマバリデーション
         try:
-            validate(instance=get_user_response["Item"], schema=response_schema)
-        except ValidationError:
+            validators.response(user_data)
+        except schema_validators.SchemaValidationError:
             return {
                 "statusCode": 500,
                 "headers": headers,
@@ -129,7 +121,7 @@ def lambda_handler(event, context):
         return {
             "statusCode": 200,
             "headers": headers,
-            "body": json.dumps(get_user_response["Item"])
+            "body": json.dumps(user_data, default=dynamo_codec.json_default)
         }
 
     except ClientError:
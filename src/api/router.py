@@ -0,0 +1,114 @@
+import os
+import re
+import logging
+import importlib.util
+import utils
+import aws_metrics
+
+# ルート定義
+# (リソース, HTTPメソッド) -> (関数ディレクトリ, モジュール名)
+ROUTES = {
+    ("/v1/tenant", "GET"): ("ApiTenant", "get"),
+    ("/v1/tenant", "PUT"): ("ApiTenant", "put"),
+    ("/v1/users", "GET"): ("ApiUsers", "get"),
+    ("/v1/users/{user_id}", "GET"): ("ApiUsersUserId", "get"),
+    ("/v1/users/{user_id}", "PUT"): ("ApiUsersUserId", "put"),
+    ("/v1/specifications", "GET"): ("ApiSpecifications", "get"),
+    ("/v1/specifications", "POST"): ("ApiSpecifications", "post"),
+    ("/v1/specifications/{specification_id}", "GET"): ("ApiSpecificationsSpecificationId", "get"),
+    ("/v1/specifications/{specification_id}", "PUT"): ("ApiSpecificationsSpecificationId", "put"),
+    ("/v1/specifications/{specification_id}", "DELETE"): ("ApiSpecificationsSpecificationId", "delete"),
+    ("/v1/specifications:batchGet", "POST"): ("ApiSpecificationsSpecificationId", "batch_get"),
+    ("/v1/specifications:batchUpdateStatus", "POST"): ("ApiSpecificationsSpecificationId", "batch_update_status"),
+    ("/v1/specifications:batchDelete", "POST"): ("ApiSpecificationsSpecificationId", "batch_delete"),
+    ("/v1/specifications/{specification_id}/download", "GET"): ("ApiSpecificationsSpecificationIdDownload", "get"),
+    ("/v1/specifications/{specification_id}/duplicate", "POST"): ("ApiSpecificationsSpecificationIdDuplicate", "post"),
+    ("/v1/specifications/{specification_id}/duplicate/{job_id}", "GET"): ("ApiSpecificationsSpecificationIdDuplicate", "get"),
+    ("/v1/specifications/{specification_id}/preview", "GET"): ("ApiSpecificationsSpecificationIdPreview", "get"),
+    ("/v1/specificationgroups", "GET"): ("ApiSpecificationGroups", "get"),
+    ("/v1/specificationgroups", "POST"): ("ApiSpecificationGroups", "post"),
+    ("/v1/specificationgroups/{specification_group_id}", "PUT"): ("ApiSpecificationGroupsSpecificationGroupId", "put"),
+    ("/v1/specificationgroups/{specification_group_id}", "DELETE"): ("ApiSpecificationGroupsSpecificationGroupId", "delete"),
+    ("/v1/image", "POST"): ("ApiImage", "post"),
+}
+
+# /{proxy+}で受けた場合にパスからリソースを求めるための正規表現
+RESOURCE_PATTERNS = [
+    (resource, re.compile(re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(resource))))
+    for resource in dict.fromkeys(resource for resource, _ in ROUTES)
+]
+
+# 読み込み済みのハンドラー（初回の呼び出し時に読み込む）
+_handlers = {}
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@aws_metrics.instrument
+def lambda_handler(event, context):
+    resource, path_parameters = resolve_resource(event)
+    if resource is None:
+        return utils.get_response_not_found()
+
+    # /{proxy+}で受けた場合もルート定義のリソースで集計する
+    aws_metrics.set_route(f"{event.get('httpMethod', '').upper()} {resource}")
+
+    route = ROUTES.get((resource, event.get("httpMethod", "").upper()))
+    if route is None:
+        return utils.get_response_not_allowed_method()
+
+    # 個別の関数にデプロイした場合と同じ形のイベントを渡す
+    if resource != event.get("resource"):
+        event = {**event, "resource": resource, "pathParameters": path_parameters}
+
+    return get_handler(*route)(event, context)
+
+
+def resolve_resource(event: dict):
+    """
+    イベントからルート定義のリソースとパスパラメータを求める
+
+    リソースごとにAPIを定義した場合はresourceをそのまま使い、
+    /{proxy+}でまとめて受けた場合はpathをルート定義と照合する。
+
+    Returns:
+        tuple: (リソース, パスパラメータ)（一致するリソースがない場合はリソースがNone）
+    """
+    resource = event.get("resource")
+    if any(resource == route_resource for route_resource, _ in RESOURCE_PATTERNS):
+        return resource, event.get("pathParameters")
+
+    path = event.get("path") or ""
+    for route_resource, pattern in RESOURCE_PATTERNS:
+        match = pattern.fullmatch(path)
+        if match:
+            return route_resource, match.groupdict() or None
+    return None, None
+
+
+def get_handler(function_dir: str, module_name: str):
+    """
+    ハンドラーのモジュールを初回の呼び出し時に読み込む
+
+    各関数ディレクトリには同じ名前のモジュール（get.pyなど）があるため、
+    ディレクトリごとに別の名前で読み込む。AWSクライアントもモジュールの読み込み時に作成されるため、
+    使われないルートのクライアントは作成しない。
+
+    Args:
+        function_dir: 関数ディレクトリ名
+        module_name: モジュール名
+
+    Returns:
+        function: モジュールのlambda_handler
+    """
+    key = (function_dir, module_name)
+    if key not in _handlers:
+        path = os.path.join(os.path.dirname(__file__), function_dir, f"{module_name}.py")
+        spec = importlib.util.spec_from_file_location(f"{function_dir}_{module_name}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _handlers[key] = module.lambda_handler
+        logger.info(f"Loaded handler {function_dir}/{module_name}")
+    return _handlers[key]
@@ -1,23 +1,25 @@
 import os
-import boto3
+import aws_clients
 import json
 from botocore.exceptions import ClientError
 import uuid
 import logging
+import aws_metrics
+import event_logging
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-dynamodb = boto3.client("dynamodb")
-cognito = boto3.client('cognito-idp')
+dynamodb = aws_clients.lazy("dynamodb")
+cognito = aws_clients.lazy("cognito-idp")
 
 TENANTS_TABLE_NAME = os.environ["TENANTS_TABLE_NAME"]
 USERS_TABLE_NAME = os.environ["USERS_TABLE_NAME"]
 
 
+@aws_metrics.instrument
 def lambda_handler(event, context):
-    logger.info(f"Event: {event}")
-    logger.info(f"Context: {context}")
+    event_logging.log_event(logger, event)
 
     try:
         # 新規ユーザー登録時のみ処理を実行
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import math
+import aws_clients
+import logging
+import aws_metrics
+import metrics
+import specification_drafts
+import specification_updates
+
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
+sqs = aws_clients.lazy("sqs")
+
+# 環境変数
+SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
+SPECIFICATION_DRAFTS_TABLE_NAME = os.environ["SPECIFICATION_DRAFTS_TABLE_NAME"]
+CREATE_SPECIFICATION_SQS_QUEUE_URL = os.environ["CREATE_SPECIFICATION_SQS_QUEUE_URL"]
+COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL = os.environ["COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL"]
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@aws_metrics.instrument
+def lambda_handler(event, context):
+    batch_item_failures = []
+    for record in event["Records"]:
+        try:
+            message = json.loads(record["body"])
+            commit_draft(message["tenant_id"], message["specification_id"])
+        except Exception as e:
+            logger.exception(e)
+            batch_item_failures.append({"itemIdentifier": record["messageId"]})
+
+    return {"batchItemFailures": batch_item_failures}
+
+
+def commit_draft(tenant_id: str, specification_id: str):
+    """
+    一定時間編集されていない下書きを仕様書に反映し、必要な場合はPDFの作成を依頼する
+
+    まだ編集中の場合は、残りの待機時間で反映を予約し直す。
+
+    Args:
+        tenant_id: テナントID
+        specification_id: 仕様書ID
+    """
+    draft = specification_drafts.get_draft(dynamodb, SPECIFICATION_DRAFTS_TABLE_NAME, tenant_id, specification_id)
+
+    # 明示的な保存で反映済みの場合は何もしない
+    if draft is None:
+        return
+
+    idle_seconds = time.time() - float(draft["saved_at"])
+    if idle_seconds < specification_drafts.AUTOSAVE_IDLE_SECONDS:
+        specification_drafts.schedule_commit(
+            sqs,
+            COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL,
+            tenant_id,
+            specification_id,
+            math.ceil(specification_drafts.AUTOSAVE_IDLE_SECONDS - idle_seconds)
+        )
+        return
+
+    try:
+        render_changed = specification_updates.update_specification(
+            dynamodb, SPECIFICATIONS_TABLE_NAME, tenant_id, specification_id, specification_drafts.draft_values(draft)
+        )
+    except specification_updates.SpecificationNotFoundError:
+        # 仕様書が削除されている場合は下書きを破棄し、メッセージは処理済みにする
+        logger.info(f"Discarding draft of deleted specification {specification_id}")
+        if not specification_drafts.delete_draft(
+            dynamodb, SPECIFICATION_DRAFTS_TABLE_NAME, tenant_id, specification_id, draft["revision"]
+        ):
+            specification_drafts.schedule_commit(sqs, COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL, tenant_id, specification_id)
+        return
+
+    if render_changed:
+        specification_updates.send_render_message(sqs, CREATE_SPECIFICATION_SQS_QUEUE_URL, tenant_id, specification_id)
+        metrics.put_metrics({"RendersQueued": 1, "DraftsCommitted": 1}, autosaves=draft["revision"])
+    else:
+        metrics.put_metrics({"RendersSkipped": 1, "DraftsCommitted": 1}, autosaves=draft["revision"])
+
+    # 反映中に自動保存された場合は、その内容を反映するため予約し直す
+    if not specification_drafts.delete_draft(
+        dynamodb, SPECIFICATION_DRAFTS_TABLE_NAME, tenant_id, specification_id, draft["revision"]
+    ):
+        specification_drafts.schedule_commit(sqs, COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL, tenant_id, specification_id)
+
+    logger.info(f"Committed draft of {specification_id} after {draft['revision']} autosaves")
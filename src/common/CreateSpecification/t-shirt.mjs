@@ -1619,8 +1619,13 @@ export const tShirtSpecification = async (specification, tenantId) => {
                 "specification_id": { "S": specification.specification_id },
                 "tenant_id": { "S": tenantId }
             },
-            UpdateExpression: "set specification_file = :specification_file",
+            // ETagに使う版数も上げ、作成したPDFが仕様書の取得に反映されるようにする
+            UpdateExpression: "set specification_file = :specification_file add #version :one",
+            ExpressionAttributeNames: {
+                "#version": "version"
+            },
             ExpressionAttributeValues: {
+                ":one": { "N": "1" },
                 ":specification_file": {
                     "M": {
                         "object": { "S": `${specification.specification_id}.pdf` },
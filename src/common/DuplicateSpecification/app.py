@@ -0,0 +1,237 @@
+import os
+import json
+import aws_clients
+import logging
+import aws_metrics
+import dynamo_codec
+import s3_transfer
+from botocore.exceptions import ClientError
+
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
+s3 = aws_clients.lazy("s3", read_timeout=aws_clients.TRANSFER_READ_TIMEOUT)
+sqs = aws_clients.lazy("sqs")
+
+# 環境変数
+DUPLICATE_JOBS_TABLE_NAME = os.environ["DUPLICATE_JOBS_TABLE_NAME"]
+DUPLICATE_SPECIFICATION_SQS_QUEUE_URL = os.environ["DUPLICATE_SPECIFICATION_SQS_QUEUE_URL"]
+CREATE_SPECIFICATION_SQS_QUEUE_URL = os.environ["CREATE_SPECIFICATION_SQS_QUEUE_URL"]
+S3_BUCKET_SPECIFICATIONS = os.environ["S3_BUCKET_SPECIFICATIONS"]
+# キューのRedrivePolicyのmaxReceiveCount（この回数目の受信で失敗するとデッドレターキューに移る）
+DUPLICATE_MAX_RECEIVE_COUNT = int(os.environ.get("DUPLICATE_MAX_RECEIVE_COUNT", "5"))
+
+# 1回のチェックポイントまでにコピーするオブジェクト数
+COPY_BATCH_SIZE = 50
+
+# 処理を中断して続きをキューに戻す残り時間（ミリ秒）
+TIME_MARGIN_MS = 60000
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class CheckpointConflictError(Exception):
+    pass
+
+
+@aws_metrics.instrument
+def lambda_handler(event, context):
+    for record in event["Records"]:
+        message = json.loads(record["body"])
+        try:
+            run_job(message["job_id"], message["tenant_id"], context)
+        except Exception as e:
+            # 最後の受信で失敗した場合はメッセージがデッドレターキューに移るため、ジョブをFAILEDにする
+            receive_count = int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+            if receive_count >= DUPLICATE_MAX_RECEIVE_COUNT:
+                logger.error(f"Duplicate job {message['job_id']} failed after {receive_count} attempts: {e}")
+                fail_job(message["job_id"], message["tenant_id"], str(e))
+            raise
+
+
+def run_job(job_id: str, tenant_id: str, context):
+    """
+    複製ジョブのS3コピーをチェックポイントから再開し、完了したら仕様書の作成を依頼する
+
+    Args:
+        job_id: ジョブID
+        tenant_id: テナントID
+        context: Lambdaのコンテキスト
+    """
+    response = dynamodb.get_item(
+        TableName=DUPLICATE_JOBS_TABLE_NAME,
+        Key={"job_id": {"S": job_id}, "tenant_id": {"S": tenant_id}},
+        ConsistentRead=True
+    )
+    if "Item" not in response:
+        logger.warning(f"Duplicate job not found: {job_id}")
+        return
+
+    job = response["Item"]
+    status = job["status"]["S"]
+    if status in ("COMPLETED", "FAILED"):
+        logger.info(f"Duplicate job {job_id} is already {status}")
+        return
+
+    source_prefix = f"{tenant_id}/{job['specification_id']['S']}/"
+    destination_prefix = f"{tenant_id}/{job['duplicate_specification_id']['S']}/"
+    # 元の仕様書のPDFは複製しない（複製後に新しく作成される）
+    pdf_key = f"{source_prefix}{job['specification_id']['S']}.pdf"
+
+    copied = int(job["copied"]["N"])
+    start_after = job["start_after"]["S"] if "start_after" in job else None
+
+    try:
+        if "total" not in job:
+            total = count_objects(source_prefix, pdf_key)
+            update_job(job_id, tenant_id, copied, {"status": "RUNNING", "total": total})
+
+        for batch in list_batches(source_prefix, pdf_key, start_after):
+            copies = [
+                (obj["Key"], destination_prefix + obj["Key"][len(source_prefix):], obj["Size"])
+                for obj in batch
+            ]
+            s3_transfer.copy_objects(s3, S3_BUCKET_SPECIFICATIONS, copies)
+
+            # コピーが終わった位置を記録し、途中で止まってもここから再開できるようにする
+            update_job(job_id, tenant_id, copied, {"copied": copied + len(batch), "start_after": batch[-1]["Key"]})
+            copied += len(batch)
+
+            if context is not None and context.get_remaining_time_in_millis() < TIME_MARGIN_MS:
+                logger.info(f"Duplicate job {job_id} paused after {copied} objects")
+                sqs.send_message(
+                    QueueUrl=DUPLICATE_SPECIFICATION_SQS_QUEUE_URL,
+                    MessageBody=json.dumps({"job_id": job_id, "tenant_id": tenant_id})
+                )
+                return
+
+    except CheckpointConflictError:
+        # 同じジョブのメッセージが重複して配信され、別の実行が先に進めている
+        logger.warning(f"Duplicate job {job_id} was advanced by another worker")
+        return
+    except s3_transfer.CopyError as e:
+        logger.error(f"Duplicate job {job_id} failed: {e}")
+        update_job(job_id, tenant_id, copied, {"status": "FAILED", "error": str(e)})
+        return
+
+    # 複製した仕様書の作成を依頼する
+    duplicate_specification_id = job["duplicate_specification_id"]["S"]
+    sqs.send_message(
+        QueueUrl=CREATE_SPECIFICATION_SQS_QUEUE_URL,
+        MessageBody=json.dumps({
+            "specification_id": duplicate_specification_id,
+            "tenant_id": tenant_id
+        }),
+        MessageAttributes={
+            "specification_id": {
+                "DataType": "String",
+                "StringValue": duplicate_specification_id
+            },
+            "tenant_id": {
+                "DataType": "String",
+                "StringValue": tenant_id
+            }
+        }
+    )
+
+    update_job(job_id, tenant_id, copied, {"status": "COMPLETED"})
+    logger.info(f"Duplicate job {job_id} completed with {copied} objects")
+
+
+def list_batches(source_prefix: str, pdf_key: str, start_after: str = None):
+    """
+    コピー元のオブジェクトをキーの順にCOPY_BATCH_SIZE件ずつ返す
+
+    Args:
+        source_prefix: コピー元のプレフィックス
+        pdf_key: コピーしないPDFのキー
+        start_after: このキーより後のオブジェクトから返す
+
+    Yields:
+        list: list_objects_v2のContentsの要素
+    """
+    paginator = s3.get_paginator("list_objects_v2")
+    params = {"Bucket": S3_BUCKET_SPECIFICATIONS, "Prefix": source_prefix}
+    if start_after:
+        params["StartAfter"] = start_after
+
+    batch = []
+    for page in paginator.paginate(**params):
+        for obj in page.get("Contents", []):
+            if obj["Key"] == pdf_key:
+                continue
+            batch.append(obj)
+            if len(batch) == COPY_BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def count_objects(source_prefix: str, pdf_key: str) -> int:
+    paginator = s3.get_paginator("list_objects_v2")
+    total = 0
+    for page in paginator.paginate(Bucket=S3_BUCKET_SPECIFICATIONS, Prefix=source_prefix):
+        total += sum(1 for obj in page.get("Contents", []) if obj["Key"] != pdf_key)
+    return total
+
+
+def fail_job(job_id: str, tenant_id: str, error: str):
+    """
+    完了していないジョブをFAILEDにする
+
+    Args:
+        job_id: ジョブID
+        tenant_id: テナントID
+        error: エラーメッセージ
+    """
+    try:
+        dynamodb.update_item(
+            TableName=DUPLICATE_JOBS_TABLE_NAME,
+            Key={"job_id": {"S": job_id}, "tenant_id": {"S": tenant_id}},
+            UpdateExpression="set #status = :failed, #error = :error",
+            ConditionExpression="attribute_exists(#status) AND NOT #status IN (:completed, :failed)",
+            ExpressionAttributeNames={"#status": "status", "#error": "error"},
+            ExpressionAttributeValues={
+                ":failed": {"S": "FAILED"},
+                ":completed": {"S": "COMPLETED"},
+                ":error": {"S": error}
+            }
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        logger.info(f"Duplicate job {job_id} is already finished")
+
+
+def update_job(job_id: str, tenant_id: str, expected_copied: int, values: dict):
+    """
+    ジョブの進捗を更新する
+
+    Args:
+        job_id: ジョブID
+        tenant_id: テナントID
+        expected_copied: 更新前のコピー済み件数（別の実行が進めていないことを確認する）
+        values: 更新する属性
+
+    Raises:
+        CheckpointConflictError: 別の実行がジョブを進めていた場合
+    """
+    names = {f"#{key}": key for key in values}
+    names["#copied"] = "copied"
+    attribute_values = {f":{key}": dynamo_codec.to_dynamo(value) for key, value in values.items()}
+    attribute_values[":expected_copied"] = {"N": str(expected_copied)}
+    try:
+        dynamodb.update_item(
+            TableName=DUPLICATE_JOBS_TABLE_NAME,
+            Key={"job_id": {"S": job_id}, "tenant_id": {"S": tenant_id}},
+            UpdateExpression="set " + ", ".join(f"#{key} = :{key}" for key in values),
+            ConditionExpression="#copied = :expected_copied",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=attribute_values
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            raise CheckpointConflictError(job_id) from e
+        raise
@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import aws_clients
+import logging
+import aws_metrics
+import metrics
+import s3_transfer
+
+# AWSクライアント
+s3 = aws_clients.lazy("s3", read_timeout=aws_clients.TRANSFER_READ_TIMEOUT)
+
+# 環境変数
+S3_BUCKET_SPECIFICATIONS = os.environ["S3_BUCKET_SPECIFICATIONS"]
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@aws_metrics.instrument
+def lambda_handler(event, context):
+    batch_item_failures = []
+    for record in event["Records"]:
+        try:
+            message = json.loads(record["body"])
+            purge_specification(message["tenant_id"], message["specification_id"])
+        except Exception as e:
+            logger.exception(e)
+            batch_item_failures.append({"itemIdentifier": record["messageId"]})
+
+    return {"batchItemFailures": batch_item_failures}
+
+
+def purge_specification(tenant_id: str, specification_id: str):
+    """
+    削除された仕様書のS3オブジェクトをすべて削除する
+
+    失敗した場合は例外を送出し、メッセージを再試行させる。
+
+    Args:
+        tenant_id: テナントID
+        specification_id: 仕様書ID
+    """
+    prefix = f"{tenant_id}/{specification_id}/"
+    started_at = time.perf_counter()
+    try:
+        result = s3_transfer.delete_prefix(s3, S3_BUCKET_SPECIFICATIONS, prefix)
+    except s3_transfer.DeleteError:
+        metrics.put_metrics({"PurgeFailed": 1}, specification_id=specification_id)
+        raise
+
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    logger.info(f"Purged {result['deleted']} s3 objects in {prefix} ({elapsed_ms:.0f} ms)")
+
+    purge_metrics = metrics.Metrics()
+    purge_metrics.put("PurgedObjects", result["deleted"])
+    purge_metrics.put("PurgeBatches", result["batches"])
+    purge_metrics.put("PurgeRetriedKeys", result["retried"])
+    purge_metrics.put("PurgeDuration", elapsed_ms, "Milliseconds")
+    purge_metrics.set_property("specification_id", specification_id)
+    purge_metrics.flush()
@@ -0,0 +1,277 @@
+import os
+import time
+import aws_clients
+import logging
+import aws_metrics
+import specification_attributes
+import specification_group_counts
+from botocore.exceptions import ClientError
+
+# AWSクライアント
+dynamodb = aws_clients.lazy("dynamodb")
+
+# 環境変数
+SPECIFICATIONS_TABLE_NAME = os.environ["SPECIFICATIONS_TABLE_NAME"]
+SPECIFICATION_SUMMARIES_TABLE_NAME = os.environ["SPECIFICATION_SUMMARIES_TABLE_NAME"]
+SPECIFICATION_GROUPS_TABLE_NAME = os.environ["SPECIFICATION_GROUPS_TABLE_NAME"]
+
+# バックフィルを中断して再実行を依頼する残り時間（ミリ秒）
+BACKFILL_TIME_MARGIN_MS = 30000
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@aws_metrics.instrument
+def lambda_handler(event, context):
+    # DynamoDB Streams以外から呼ばれた場合は既存データのバックフィルを行う
+    if "Records" not in event:
+        return backfill(event, context)
+
+    batch_item_failures = []
+    for record in event["Records"]:
+        try:
+            process_record(record)
+        except Exception as e:
+            logger.exception(e)
+            # 同じ仕様書の古い変更で上書きしないよう、失敗したレコード以降はすべて再試行させる
+            batch_item_failures.append({"itemIdentifier": record["dynamodb"]["SequenceNumber"]})
+            break
+
+    return {"batchItemFailures": batch_item_failures}
+
+
+def process_record(record: dict):
+    """
+    仕様書テーブルの変更を一覧用サマリーと仕様書グループの仕様書数に反映する
+
+    サマリーには反映した仕様書の版数（version）を持たせ、それより新しい変更だけを書き込む。
+    バッチ全体が再試行された場合も、反映済みのレコードでサマリーを戻したり仕様書数を二重に数えたりしない。
+    グループとステータスが変わる変更は、サマリーの書き込みと仕様書数の増減を1つのトランザクションで行う。
+
+    Args:
+        record: DynamoDB Streamsのレコード
+    """
+    change = record["dynamodb"]
+    old_image, new_image = change.get("OldImage"), change.get("NewImage")
+
+    if record["eventName"] == "REMOVE":
+        keys = change["Keys"]
+        delete = {
+            "TableName": SPECIFICATION_SUMMARIES_TABLE_NAME,
+            "Key": {
+                "tenant_id": keys["tenant_id"],
+                "specification_id": keys["specification_id"]
+            }
+        }
+        deltas = specification_group_counts.get_deltas(old_image, None)
+        if not deltas:
+            dynamodb.delete_item(**delete)
+            return
+        # サマリーが残っている場合のみ減らす（再試行で二重に減らさない）
+        write_summary_with_group_counts(
+            {"Delete": {**delete, "ConditionExpression": "attribute_exists(specification_id)"}},
+            deltas
+        )
+        return
+
+    summary = specification_attributes.to_summary(new_image)
+
+    # 一覧に表示する属性が変わっていない場合は書き込まない
+    # （サマリーにグループとステータスが含まれるため、仕様書グループの仕様書数も変わらない）
+    if old_image is not None and specification_attributes.to_summary(old_image) == summary:
+        return
+
+    put = {"TableName": SPECIFICATION_SUMMARIES_TABLE_NAME, "Item": to_versioned_summary(new_image)}
+    if "version" in new_image:
+        put["ConditionExpression"] = "attribute_not_exists(#version) OR #version < :version"
+        put["ExpressionAttributeNames"] = {"#version": "version"}
+        put["ExpressionAttributeValues"] = {":version": new_image["version"]}
+
+    deltas = specification_group_counts.get_deltas(old_image, new_image)
+    if deltas:
+        write_summary_with_group_counts({"Put": put}, deltas)
+        return
+
+    try:
+        dynamodb.put_item(**put)
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        logger.info("Specification summary already reflects this change")
+
+
+def to_versioned_summary(item: dict) -> dict:
+    """
+    DynamoDB形式の仕様書アイテムから反映した版数を含むサマリーを作成する（版数は一覧では返さない）
+    """
+    summary = specification_attributes.to_summary(item)
+    if "version" in item:
+        summary["version"] = item["version"]
+    return summary
+
+
+def write_summary_with_group_counts(summary_write: dict, deltas: dict):
+    """
+    サマリーの書き込みと仕様書グループの仕様書数の増減を1つのトランザクションで行う
+
+    ADDは冪等ではないため、サマリーを仕様書数に反映済みかどうかの目印にする。
+    サマリーの書き込みの条件（版数が新しい、削除の場合はサマリーが残っている）に一致しない場合は
+    反映済みとして仕様書数も増減しない。boto3による再試行は同じClientRequestTokenを使うため二重に適用されない。
+    削除済みの仕様書グループと、仕様書数をまだ数え直していない仕様書グループ（ステータスごとの仕様書数のマップがない）は
+    作成・更新せず、その増減だけを除いて書き込む。
+
+    Args:
+        summary_write: サマリーのPutまたはDelete（条件付き）
+        deltas: (tenant_id, specification_group_id) -> {ステータス: 増減}
+    """
+    transact_items = [summary_write]
+    for (tenant_id, specification_group_id), counts in deltas.items():
+        transact_items.append({
+            "Update": {
+                "TableName": SPECIFICATION_GROUPS_TABLE_NAME,
+                "Key": {
+                    "specification_group_id": {"S": specification_group_id},
+                    "tenant_id": {"S": tenant_id}
+                },
+                **specification_group_counts.get_add_expression(counts)
+            }
+        })
+
+    while True:
+        try:
+            dynamodb.transact_write_items(TransactItems=transact_items)
+            return
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = [reason.get("Code") for reason in e.response.get("CancellationReasons") or []]
+            if len(reasons) != len(transact_items):
+                raise
+
+            if reasons[0] == "ConditionalCheckFailed":
+                logger.info("Specification summary already reflects this change, skip counting")
+                return
+
+            missing_groups = [i for i, code in enumerate(reasons) if i and code == "ConditionalCheckFailed"]
+            if not missing_groups or any(code not in ("None", "ConditionalCheckFailed") for code in reasons):
+                raise
+            logger.info(f"Specification groups not found or not counted yet, skip counting: {[transact_items[i]['Update']['Key'] for i in missing_groups]}")
+            transact_items = [item for i, item in enumerate(transact_items) if i not in missing_groups]
+
+
+def backfill(event, context):
+    """
+    既存の仕様書から一覧用サマリーを作成し、仕様書グループの仕様書数を数え直す
+
+    仕様書数は全件をスキャンし終えた時点でまとめて置き換えるため、
+    途中で中断した場合は数えた仕様書数（group_counts）も返し、続きの実行に渡す。
+
+    Args:
+        event: {"exclusive_start_key": ..., "group_counts": ...} 前回の続きから実行する場合に指定
+        context: Lambdaのコンテキスト
+
+    Returns:
+        dict: 未処理のデータが残っている場合はexclusive_start_keyとgroup_countsを返す
+    """
+    projection_attribute_names = {
+        f"#a{i}": name for i, name in enumerate((*specification_attributes.SPECIFICATION_SUMMARY_ATTRIBUTES, "version"))
+    }
+    scan_params = {
+        "TableName": SPECIFICATIONS_TABLE_NAME,
+        "ProjectionExpression": ", ".join(projection_attribute_names),
+        "ExpressionAttributeNames": projection_attribute_names
+    }
+    if event.get("exclusive_start_key"):
+        scan_params["ExclusiveStartKey"] = event["exclusive_start_key"]
+
+    # tenant_id -> specification_group_id -> ステータス -> 仕様書数
+    group_counts = event.get("group_counts") or {}
+
+    written = 0
+    while True:
+        response = dynamodb.scan(**scan_params)
+        summaries = [to_versioned_summary(item) for item in response.get("Items", [])]
+        for i in range(0, len(summaries), 25):
+            write_summaries(summaries[i:i + 25])
+        written += len(summaries)
+
+        for summary in summaries:
+            group_status = specification_group_counts.get_group_status(summary)
+            if group_status is not None:
+                tenant_id, specification_group_id, status = group_status
+                counts = group_counts.setdefault(tenant_id, {}).setdefault(specification_group_id, {})
+                counts[status] = counts.get(status, 0) + 1
+
+        if "LastEvaluatedKey" not in response:
+            groups = write_group_counts(group_counts)
+            logger.info(f"Backfilled {written} specification summaries and counts of {groups} specification groups")
+            return {"written": written, "exclusive_start_key": None}
+
+        scan_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        if context is not None and context.get_remaining_time_in_millis() < BACKFILL_TIME_MARGIN_MS:
+            logger.info(f"Backfilled {written} specification summaries, continue from {response['LastEvaluatedKey']}")
+            return {"written": written, "exclusive_start_key": response["LastEvaluatedKey"], "group_counts": group_counts}
+
+
+def write_group_counts(group_counts: dict) -> int:
+    """
+    数え直した仕様書数で全ての仕様書グループの仕様書数を置き換える
+
+    仕様書が0件のグループは0にし、ステータスごとの仕様書数は数え直した結果のマップで置き換える。
+    置き換えの間にストリームで反映された増減は上書きされるため、更新の少ない時間帯に実行する。
+
+    Args:
+        group_counts: tenant_id -> specification_group_id -> ステータス -> 仕様書数
+
+    Returns:
+        int: 更新した仕様書グループの数
+    """
+    scan_params = {"TableName": SPECIFICATION_GROUPS_TABLE_NAME, "ProjectionExpression": "specification_group_id, tenant_id"}
+    updated = 0
+    while True:
+        response = dynamodb.scan(**scan_params)
+        for group in response.get("Items", []):
+            tenant_id = group["tenant_id"]["S"]
+            specification_group_id = group["specification_group_id"]["S"]
+            counts = group_counts.get(tenant_id, {}).get(specification_group_id, {})
+
+            try:
+                dynamodb.update_item(
+                    TableName=SPECIFICATION_GROUPS_TABLE_NAME,
+                    Key={
+                        "specification_group_id": group["specification_group_id"],
+                        "tenant_id": group["tenant_id"]
+                    },
+                    ConditionExpression="attribute_exists(specification_group_id)",
+                    **specification_group_counts.get_set_expression(counts)
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+        if "LastEvaluatedKey" not in response:
+            return updated
+        scan_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def write_summaries(summaries: list, max_attempts: int = 5):
+    """
+    サマリーをまとめて書き込み、未処理のアイテムは待機して再試行する
+
+    Args:
+        summaries: DynamoDB形式のサマリー（25件まで）
+        max_attempts: 最大試行回数
+    """
+    request_items = {
+        SPECIFICATION_SUMMARIES_TABLE_NAME: [{"PutRequest": {"Item": summary}} for summary in summaries]
+    }
+    for attempt in range(max_attempts):
+        response = dynamodb.batch_write_item(RequestItems=request_items)
+        request_items = response.get("UnprocessedItems") or {}
+        if not request_items:
+            return
+        time.sleep(min(0.05 * (2 ** attempt), 1))
+    raise RuntimeError("Failed to write specification summaries")
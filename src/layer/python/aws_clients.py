@@ -0,0 +1,94 @@
+import os
+import threading
+import boto3
+from botocore.config import Config
+import aws_metrics  # noqa: F401 クライアントの作成前に計測用のフックを登録する
+
+# 接続と応答待ちのタイムアウト（秒）
+# API（タイムアウト10秒）の中で再試行を含めて応答を返せるよう短くする
+CONNECT_TIMEOUT = float(os.environ.get("AWS_CLIENT_CONNECT_TIMEOUT", "1"))
+READ_TIMEOUT = float(os.environ.get("AWS_CLIENT_READ_TIMEOUT", "2"))
+
+# S3のコピーなど時間のかかる操作に使う応答待ちのタイムアウト（秒）
+TRANSFER_READ_TIMEOUT = float(os.environ.get("AWS_CLIENT_TRANSFER_READ_TIMEOUT", "60"))
+
+# 初回を含めた最大試行回数
+MAX_ATTEMPTS = int(os.environ.get("AWS_CLIENT_MAX_ATTEMPTS", "3"))
+
+# クライアントごとの接続プールの大きさ（s3_transferの並列コピーに合わせる）
+MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_CLIENT_MAX_POOL_CONNECTIONS", "25"))
+
+# 全てのクライアントに共通の設定
+CONFIG = Config(
+    connect_timeout=CONNECT_TIMEOUT,
+    read_timeout=READ_TIMEOUT,
+    retries={"mode": "adaptive", "total_max_attempts": MAX_ATTEMPTS},
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    tcp_keepalive=True
+)
+
+# 作成済みのクライアント
+# (サービス名, 設定の上書き) -> クライアント
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(service_name: str, **config):
+    """
+    コンテナ内で共有するAWSクライアントを取得する（初回のみ作成する）
+
+    Args:
+        service_name: サービス名（"dynamodb"など）
+        config: 共通の設定から上書きするbotocoreのConfigの項目
+
+    Returns:
+        botocoreのクライアント
+    """
+    key = (service_name, tuple(sorted(config.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = boto3.client(service_name, config=CONFIG.merge(Config(**config)) if config else CONFIG)
+                _clients[key] = client
+    return client
+
+
+def lazy(service_name: str, **config) -> "LazyClient":
+    """
+    最初に使われたときにクライアントを作成するプロキシを作成する
+
+    ハンドラーのモジュールで boto3.client(...) の代わりに使い、読み込み時にはクライアントを作成しない。
+
+    Args:
+        service_name: サービス名（"dynamodb"など）
+        config: 共通の設定から上書きするbotocoreのConfigの項目
+    """
+    return LazyClient(service_name, config)
+
+
+def clear():
+    """
+    作成済みのクライアントを破棄する（テストで使う）
+    """
+    with _lock:
+        _clients.clear()
+
+
+class LazyClient:
+    """
+    属性にアクセスしたときに共有のクライアントに委譲するプロキシ
+    """
+
+    __slots__ = ("service_name", "config")
+
+    def __init__(self, service_name: str, config: dict):
+        self.service_name = service_name
+        self.config = config
+
+    def __getattr__(self, name):
+        return getattr(get_client(self.service_name, **self.config), name)
+
+    def __repr__(self):
+        return f"LazyClient({self.service_name!r})"
@@ -0,0 +1,197 @@
+import os
+import time
+import hashlib
+import functools
+import threading
+import boto3
+import metrics
+
+# テナントを集計するバケット数（ディメンションの種類を抑えるためテナントIDをハッシュで振り分ける）
+TENANT_BUCKETS = int(os.environ.get("METRICS_TENANT_BUCKETS", "16"))
+
+# メトリクス名に使うサービス名
+SERVICE_NAMES = {
+    "dynamodb": "DynamoDB",
+    "s3": "S3",
+    "sqs": "SQS",
+    "cognito-identity-provider": "Cognito",
+}
+
+# 集計するディメンションの組み合わせ
+DIMENSION_SETS = [["Route"], ["Route", "ColdStart"], ["TenantBucket"]]
+
+# 呼び出し中に集計したAWS API呼び出し
+# (サービス, 操作) -> {"calls": 回数, "latency_ms": 合計時間, "retries": 再試行回数, "errors": エラー回数}
+_operations = {}
+_lock = threading.Lock()
+
+# コンテナの最初の呼び出しかどうか
+_cold_start = True
+
+# 計測中の呼び出しのルート（Noneの場合はイベントから求める）
+_route = None
+
+# 計測中のハンドラーの深さ（ルーターから個別のハンドラーを呼ぶ場合に二重に出力しない）
+_depth = 0
+
+
+def install(session=None):
+    """
+    boto3のセッションにAWS API呼び出しを計測するフックを登録する
+
+    クライアントは作成時にセッションのフックを引き継ぐため、クライアントを作成する前に呼び出す。
+    このモジュールの読み込み時に既定のセッションへ登録する。
+
+    Args:
+        session: boto3のセッション（省略時は既定のセッション）
+    """
+    if session is None:
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        session = boto3.DEFAULT_SESSION
+    # before-callはスタブなど応答を返すフックで打ち切られることがあるため、その前のイベントで開始時刻を記録する
+    session.events.register("before-parameter-build", _before_call, unique_id="aws_metrics.before_call")
+    session.events.register("after-call", _after_call, unique_id="aws_metrics.after_call")
+    session.events.register("after-call-error", _after_call_error, unique_id="aws_metrics.after_call_error")
+
+
+def instrument(lambda_handler):
+    """
+    Lambdaハンドラーの呼び出しごとにAWS API呼び出しの回数・時間・再試行をEMFで出力するデコレーター
+
+    ディメンションはルート（API Gatewayの場合は"GET /v1/tenant"の形式）、テナントのバケット、コールドスタートかどうか。
+    """
+
+    @functools.wraps(lambda_handler)
+    def wrapper(event, context):
+        global _cold_start, _route, _depth
+        if _depth:
+            return lambda_handler(event, context)
+
+        with _lock:
+            _operations.clear()
+        _route = None
+        _depth += 1
+        cold_start, _cold_start = _cold_start, False
+        started_at = time.perf_counter()
+        try:
+            return lambda_handler(event, context)
+        finally:
+            _depth -= 1
+            flush(event, context, cold_start, (time.perf_counter() - started_at) * 1000)
+
+    return wrapper
+
+
+def set_route(route: str):
+    """
+    イベントから求められない場合（/{proxy+}で受けた場合など）に計測中の呼び出しのルートを設定する
+    """
+    global _route
+    _route = route
+
+
+def flush(event: dict, context, cold_start: bool, duration_ms: float):
+    """
+    集計したAWS API呼び出しを1件のEMFとして出力する
+    """
+    tenant_id = get_tenant_id(event)
+    invocation_metrics = metrics.Metrics(
+        {
+            "Route": _route or get_route(event),
+            "TenantBucket": get_tenant_bucket(tenant_id),
+            "ColdStart": "true" if cold_start else "false"
+        },
+        dimension_sets=DIMENSION_SETS
+    )
+    invocation_metrics.put("Duration", round(duration_ms, 3), "Milliseconds")
+
+    with _lock:
+        operations = dict(_operations)
+        _operations.clear()
+
+    for name in ("AwsCalls", "AwsRetries", "AwsErrors"):
+        invocation_metrics.put(name, 0)
+    invocation_metrics.put("AwsLatency", 0, "Milliseconds")
+    for (service, _), totals in operations.items():
+        service_name = SERVICE_NAMES.get(service, service.title().replace("-", ""))
+        for prefix in ("Aws", service_name):
+            invocation_metrics.put(f"{prefix}Calls", totals["calls"])
+            invocation_metrics.put(f"{prefix}Latency", round(totals["latency_ms"], 3), "Milliseconds")
+            invocation_metrics.put(f"{prefix}Retries", totals["retries"])
+        invocation_metrics.put("AwsErrors", totals["errors"])
+
+    invocation_metrics.set_property("aws_operations", {
+        f"{service}.{operation}": {**totals, "latency_ms": round(totals["latency_ms"], 3)}
+        for (service, operation), totals in operations.items()
+    })
+    if tenant_id:
+        invocation_metrics.set_property("tenant_id", tenant_id)
+    if context is not None:
+        invocation_metrics.set_property("request_id", getattr(context, "aws_request_id", None))
+    invocation_metrics.flush()
+
+
+def get_route(event: dict) -> str:
+    """
+    イベントから計測に使うルートを求める
+
+    Returns:
+        str: API Gatewayの場合は"GET /v1/tenant"の形式、それ以外はイベントソース
+    """
+    if not isinstance(event, dict):
+        return "unknown"
+    if "httpMethod" in event:
+        return f"{event['httpMethod'].upper()} {event.get('resource')}"
+    records = event.get("Records")
+    if records:
+        return records[0].get("eventSource") or records[0].get("EventSource") or "records"
+    if "triggerSource" in event:
+        return event["triggerSource"]
+    return "direct"
+
+
+def get_tenant_id(event: dict):
+    if not isinstance(event, dict):
+        return None
+    return (event.get("requestContext") or {}).get("authorizer", {}).get("claims", {}).get("custom:tenant_id")
+
+
+def get_tenant_bucket(tenant_id: str) -> str:
+    """
+    テナントIDをバケットに振り分ける（テナントが特定できない場合は"none"）
+    """
+    if not tenant_id:
+        return "none"
+    bucket = int.from_bytes(hashlib.sha256(tenant_id.encode()).digest()[:4], "big") % TENANT_BUCKETS
+    return f"{bucket:02d}"
+
+
+def _before_call(context, **kwargs):
+    context["aws_metrics_started_at"] = time.perf_counter()
+
+
+def _after_call(event_name, context, parsed, **kwargs):
+    metadata = parsed.get("ResponseMetadata", {}) if isinstance(parsed, dict) else {}
+    _record(event_name, context, metadata.get("RetryAttempts", 0), isinstance(parsed, dict) and "Error" in parsed)
+
+
+def _after_call_error(event_name, context, **kwargs):
+    _record(event_name, context, 0, True)
+
+
+def _record(event_name, context, retries, error):
+    started_at = context.get("aws_metrics_started_at")
+    if started_at is None:
+        return
+    _, service, operation = event_name.split(".", 2)
+    latency_ms = (time.perf_counter() - started_at) * 1000
+    with _lock:
+        totals = _operations.setdefault((service, operation), {"calls": 0, "latency_ms": 0.0, "retries": 0, "errors": 0})
+        totals["calls"] += 1
+        totals["latency_ms"] += latency_ms
+        totals["retries"] += retries
+        totals["errors"] += 1 if error else 0
+
+
+install()
@@ -0,0 +1,132 @@
+import time
+import random
+import logging
+from botocore.exceptions import ClientError
+
+# TransactWriteItemsで1回に書き込める最大件数
+TRANSACT_WRITE_CHUNK_SIZE = 100
+
+# send_message_batchで1回に送信できる最大件数
+SEND_MESSAGE_BATCH_SIZE = 10
+
+# 待機して再試行するDynamoDBのエラーコード
+RETRYABLE_ERROR_CODES = {
+    "InternalServerError",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "ThrottlingException",
+    "TransactionInProgressException",
+}
+
+# トランザクションの取り消し理由のうち、待機して再試行するもの
+RETRYABLE_CANCELLATION_CODES = {
+    "ProvisionedThroughputExceeded",
+    "ThrottlingError",
+    "TransactionConflict",
+}
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _backoff(attempt: int):
+    time.sleep(random.uniform(0, min(0.05 * (2 ** attempt), 2)))
+
+
+def transact_write_items(dynamodb, transact_items: list, max_attempts: int = 6) -> list:
+    """
+    TransactWriteItemsで書き込み、アイテムごとの結果を返す
+
+    条件を満たさないアイテムがあるとトランザクション全体が取り消されるため、
+    CancellationReasonsから失敗したアイテムを除いて残りを再度書き込む。
+    スロットリングと競合は待機して再試行する。
+
+    Args:
+        dynamodb: DynamoDBクライアント
+        transact_items: TransactItemsの要素（100件まで）
+        max_attempts: 最大試行回数
+
+    Returns:
+        list: アイテムごとの失敗理由（成功した場合はNone）
+    """
+    results = [None] * len(transact_items)
+    pending = list(range(len(transact_items)))
+    attempt = 0
+    while pending:
+        try:
+            dynamodb.transact_write_items(TransactItems=[transact_items[i] for i in pending])
+            return results
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "TransactionCanceledException":
+                reasons = e.response.get("CancellationReasons") or []
+                if len(reasons) != len(pending):
+                    # 理由とアイテムを対応付けられない場合は、何も書き込まれていないため全件を待機して再試行する
+                    logger.warning(f"TransactionCanceledException with {len(reasons)} reasons for {len(pending)} items")
+                    reasons = [{"Code": "TransactionConflict"}] * len(pending)
+                retry = []
+                throttled = False
+                for i, reason in zip(pending, reasons):
+                    reason_code = reason.get("Code", "None")
+                    if reason_code == "None":
+                        retry.append(i)
+                    elif reason_code in RETRYABLE_CANCELLATION_CODES:
+                        retry.append(i)
+                        throttled = True
+                    else:
+                        results[i] = reason_code
+                removed = len(pending) - len(retry)
+                pending = retry
+                # 条件を満たさないアイテムを除いただけの場合はすぐに再実行する
+                if removed and not throttled:
+                    continue
+            elif code not in RETRYABLE_ERROR_CODES:
+                raise
+
+        attempt += 1
+        if attempt >= max_attempts:
+            break
+        _backoff(attempt)
+
+    for i in pending:
+        results[i] = "Throttled"
+    return results
+
+
+def send_message_batch(sqs, queue_url: str, entries: list, max_attempts: int = 5) -> set:
+    """
+    send_message_batchで10件ずつ送信し、失敗したメッセージは待機して再試行する
+
+    Args:
+        sqs: SQSクライアント
+        queue_url: キューのURL
+        entries: send_message_batchのEntries（Idは一意にする）
+        max_attempts: 最大試行回数
+
+    Returns:
+        set: 送信できなかったメッセージのId
+    """
+    failed_ids = set()
+    for i in range(0, len(entries), SEND_MESSAGE_BATCH_SIZE):
+        pending = entries[i:i + SEND_MESSAGE_BATCH_SIZE]
+        for attempt in range(1, max_attempts + 1):
+            response = sqs.send_message_batch(QueueUrl=queue_url, Entries=pending)
+            failed = response.get("Failed", [])
+            if not failed:
+                break
+
+            # 送信側の誤りによる失敗は再試行しても成功しない
+            retry_ids = {entry["Id"] for entry in failed if not entry.get("SenderFault")}
+            failed_ids.update(entry["Id"] for entry in failed if entry.get("SenderFault"))
+            pending = [entry for entry in pending if entry["Id"] in retry_ids]
+            if not pending:
+                break
+            if attempt == max_attempts:
+                failed_ids.update(entry["Id"] for entry in pending)
+                break
+            _backoff(attempt)
+
+    if failed_ids:
+        logger.error(f"Failed to send {len(failed_ids)} messages to {queue_url}")
+    return failed_ids
@@ -0,0 +1,163 @@
+import os
+import gzip
+import base64
+import functools
+
+# brotliは関数のrequirements.txtに含めた場合のみ使う（ない場合はgzipのみ）
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 圧縮する本文の最小サイズ（バイト）（小さい本文は圧縮してもBase64で大きくなるため圧縮しない）
+MIN_SIZE = int(os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+
+# 圧縮レベル（Lambdaの実行時間とのバランスで既定より低くする）
+GZIP_LEVEL = int(os.environ.get("RESPONSE_COMPRESSION_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.environ.get("RESPONSE_COMPRESSION_BROTLI_QUALITY", "4"))
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtimeを固定して同じ本文から同じ結果を返す
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+# 対応するエンコーディング（q値が同じ場合は先のものを優先する）
+ENCODERS = {"br": _brotli, "gzip": _gzip} if brotli is not None else {"gzip": _gzip}
+
+# API GatewayがBase64の本文をデコードするAcceptのメディアタイプ（テンプレートのBinaryMediaTypesと合わせる）
+BINARY_MEDIA_TYPE = "application/json"
+
+# 圧縮するかどうかを決めるリクエストヘッダー
+VARY_HEADERS = ("Accept", "Accept-Encoding")
+
+
+def compressible(lambda_handler):
+    """
+    Accept-Encodingに応じてレスポンスの本文を圧縮するデコレーター
+
+    一覧など本文が大きくなるAPIのハンドラーに付ける。
+    """
+
+    @functools.wraps(lambda_handler)
+    def wrapper(event, context):
+        return compress_response(event, lambda_handler(event, context))
+
+    return wrapper
+
+
+def compress_response(event: dict, response: dict) -> dict:
+    """
+    レスポンスの本文をリクエストのAccept-Encodingで指定されたエンコーディングで圧縮する
+
+    本文がMIN_SIZE以上の場合のみ圧縮し、本文をBase64にしてisBase64Encodedを付ける。
+    API GatewayはAcceptの最初のメディアタイプがBinaryMediaTypes（application/json）に一致する場合のみ
+    デコードしてクライアントに返すため、それ以外（ブラウザのfetchの*/*など）は圧縮しない。
+    圧縮しない場合もキャッシュが表現を区別できるようVaryを付ける。
+
+    Args:
+        event: API Gatewayのイベント
+        response: ハンドラーのレスポンス
+
+    Returns:
+        dict: 圧縮したレスポンス（圧縮しない場合はVaryのみ付けたレスポンス）
+    """
+    if "headers" in response:
+        response = {**response, "headers": _add_vary(response["headers"])}
+
+    body = response.get("body")
+    if not isinstance(body, str) or response.get("isBase64Encoded") or len(body) < MIN_SIZE:
+        return response
+
+    if not is_binary_accepted(event):
+        return response
+
+    encoding = choose_encoding(get_accept_encoding(event))
+    if encoding is None:
+        return response
+
+    data = body.encode("utf-8")
+    compressed = ENCODERS[encoding](data)
+    if len(compressed) >= len(data):
+        return response
+
+    return {
+        **response,
+        "headers": {**response.get("headers", {}), "Content-Encoding": encoding},
+        "body": base64.b64encode(compressed).decode("ascii"),
+        "isBase64Encoded": True
+    }
+
+
+def get_accept_encoding(event: dict) -> str:
+    """
+    Accept-Encodingヘッダーの値を取得する（ない場合は空文字）
+    """
+    return _get_header(event, "accept-encoding")
+
+
+def is_binary_accepted(event: dict) -> bool:
+    """
+    Acceptの最初のメディアタイプがBINARY_MEDIA_TYPEか判定する
+
+    API GatewayはAcceptの最初のメディアタイプだけをBinaryMediaTypesと照合する。
+    """
+    media_type = _get_header(event, "accept").split(",")[0].split(";")[0].strip().lower()
+    return media_type == BINARY_MEDIA_TYPE
+
+
+def _get_header(event: dict, header: str) -> str:
+    for name, value in (event.get("headers") or {}).items():
+        if name.lower() == header and value:
+            return value
+    return ""
+
+
+def choose_encoding(accept_encoding: str):
+    """
+    Accept-Encodingから使うエンコーディングを選ぶ
+
+    q値が最も高い対応済みのエンコーディングを選び、q値が同じ場合はENCODERSの順で選ぶ。
+    "*"は明示されていないエンコーディングに適用する。
+
+    Args:
+        accept_encoding: Accept-Encodingヘッダーの値
+
+    Returns:
+        str: エンコーディング（圧縮しない場合はNone）
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in ENCODERS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def _add_vary(headers: dict) -> dict:
+    for name, value in headers.items():
+        if name.lower() == "vary":
+            present = {token.strip().lower() for token in value.split(",")}
+            missing = [header for header in VARY_HEADERS if header.lower() not in present]
+            return {**headers, name: ", ".join([value, *missing])} if missing else headers
+    return {**headers, "Vary": ", ".join(VARY_HEADERS)}
@@ -0,0 +1,316 @@
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii
+import base64
+import math
+
+
+def _number_to_python(value: str):
+    # 整数表記の場合はそのままintに変換し、それ以外は精度を落とさないようDecimalにする
+    if "." not in value and "e" not in value and "E" not in value:
+        return int(value)
+    return Decimal(value)
+
+
+def _number_to_dynamo(value) -> str:
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            raise TypeError(f"Infinity and NaN not supported: {value}")
+        return repr(value)
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise TypeError(f"Infinity and NaN not supported: {value}")
+        return str(value)
+    return str(value)
+
+
+def to_python(attribute_value: dict, use_decimal: bool = False):
+    """
+    DynamoDBの型付き値をPythonオブジェクトに変換する
+
+    再帰を使わずにスタックで1回だけ走査する。
+    整数表記の数値はDecimalを経由せずintで返し、小数や指数表記の数値はDecimalで返す。
+    json.dumpsする場合はdefaultにjson_defaultを渡す。
+
+    Args:
+        attribute_value: {"S": ...}, {"M": ...} などのDynamoDB JSON
+        use_decimal: 数値をDecimalで返す場合はTrue
+
+    Returns:
+        変換後のPythonオブジェクト
+    """
+    to_number = Decimal if use_decimal else _number_to_python
+    holder = [None]
+    stack = [(holder, 0, attribute_value)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        parent, key, node = pop()
+        (tag, value), = node.items()
+        if tag == "S":
+            parent[key] = value
+        elif tag == "N":
+            parent[key] = to_number(value)
+        elif tag == "M":
+            mapping = dict.fromkeys(value)
+            parent[key] = mapping
+            for k, v in value.items():
+                push((mapping, k, v))
+        elif tag == "L":
+            items = [None] * len(value)
+            parent[key] = items
+            for i, v in enumerate(value):
+                push((items, i, v))
+        elif tag == "BOOL":
+            parent[key] = value
+        elif tag == "NULL":
+            parent[key] = None
+        elif tag == "SS":
+            parent[key] = set(value)
+        elif tag == "NS":
+            parent[key] = {to_number(v) for v in value}
+        elif tag == "B":
+            parent[key] = value
+        elif tag == "BS":
+            parent[key] = set(value)
+        else:
+            raise TypeError(f"Dynamodb type {tag} is not supported")
+    return holder[0]
+
+
+def to_dynamo(value) -> dict:
+    """
+    PythonオブジェクトをDynamoDBの型付き値に変換する
+
+    int/floatはDecimalに変換せずそのままN型の文字列にする。
+
+    Args:
+        value: 変換するPythonオブジェクト
+
+    Returns:
+        {"S": ...}, {"M": ...} などのDynamoDB JSON
+    """
+    holder = [None]
+    stack = [(holder, 0, value)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        parent, key, node = pop()
+        node_type = type(node)
+        if node_type is str:
+            parent[key] = {"S": node}
+        elif node_type is bool:
+            parent[key] = {"BOOL": node}
+        elif node_type is int:
+            parent[key] = {"N": str(node)}
+        elif node is None:
+            parent[key] = {"NULL": True}
+        elif node_type is dict:
+            mapping = dict.fromkeys(node)
+            parent[key] = {"M": mapping}
+            for k, v in node.items():
+                push((mapping, k, v))
+        elif node_type is list or node_type is tuple:
+            items = [None] * len(node)
+            parent[key] = {"L": items}
+            for i, v in enumerate(node):
+                push((items, i, v))
+        elif isinstance(node, (float, Decimal)):
+            parent[key] = {"N": _number_to_dynamo(node)}
+        elif isinstance(node, (bytes, bytearray)):
+            parent[key] = {"B": bytes(node)}
+        elif isinstance(node, (set, frozenset)):
+            parent[key] = _set_to_dynamo(node)
+        elif isinstance(node, str):
+            parent[key] = {"S": str(node)}
+        elif isinstance(node, int):
+            parent[key] = {"N": str(int(node))}
+        elif isinstance(node, dict):
+            mapping = dict.fromkeys(node)
+            parent[key] = {"M": mapping}
+            for k, v in node.items():
+                push((mapping, k, v))
+        elif isinstance(node, (list, tuple)):
+            items = [None] * len(node)
+            parent[key] = {"L": items}
+            for i, v in enumerate(node):
+                push((items, i, v))
+        else:
+            raise TypeError(f"Unsupported type \"{node_type}\" for value \"{node}\"")
+    return holder[0]
+
+
+def _set_to_dynamo(values) -> dict:
+    if not values:
+        raise TypeError("Empty sets are not supported")
+    if all(isinstance(v, str) for v in values):
+        return {"SS": list(values)}
+    if all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in values):
+        return {"NS": [_number_to_dynamo(v) for v in values]}
+    if all(isinstance(v, (bytes, bytearray)) for v in values):
+        return {"BS": [bytes(v) for v in values]}
+    raise TypeError(f"Unsupported set type for value \"{values}\"")
+
+
+def item_to_python(item: dict, use_decimal: bool = False) -> dict:
+    """
+    DynamoDBのアイテムをPythonの辞書に変換する
+
+    Args:
+        item: get_item/queryが返すアイテム
+        use_decimal: 数値をDecimalで返す場合はTrue
+
+    Returns:
+        dict: 変換後の辞書
+    """
+    return to_python({"M": item}, use_decimal)
+
+
+def item_to_dynamo(item: dict) -> dict:
+    """
+    Pythonの辞書をDynamoDBのアイテムに変換する
+
+    Args:
+        item: 変換する辞書
+
+    Returns:
+        dict: put_itemに渡せるアイテム
+    """
+    return to_dynamo(item)["M"]
+
+
+def json_default(value):
+    """
+    to_pythonが返したDecimalをjson.dumpsで出力できる値に変換する
+
+    floatに変換するため、17桁を超える数値は丸められる。
+    桁を落とさずに返す場合はdumps/dumps_itemでDynamoDBの値から直接JSONにする。
+
+    Args:
+        value: json.dumpsが変換できなかった値
+
+    Returns:
+        float: 変換後の数値
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(attribute_value: dict) -> str:
+    """
+    DynamoDBの型付き値をPythonオブジェクトを経由せずにJSON文字列に変換する
+
+    N型の値は文字列のまま出力するため、DecimalやfloatへのJSON変換が発生しない。
+
+    Args:
+        attribute_value: {"S": ...}, {"M": ...} などのDynamoDB JSON
+
+    Returns:
+        str: JSON文字列
+    """
+    buffer = []
+    _write(attribute_value, buffer)
+    return "".join(buffer)
+
+
+def dumps_item(item: dict, exclude=()) -> str:
+    """
+    DynamoDBのアイテムをJSONオブジェクトの文字列に変換する
+
+    Args:
+        item: get_item/queryが返すアイテム
+        exclude: レスポンスに含めない属性名
+
+    Returns:
+        str: JSON文字列
+    """
+    buffer = []
+    _write_item(item, exclude, buffer)
+    return "".join(buffer)
+
+
+def dumps_items(items: list, exclude=()) -> str:
+    """
+    DynamoDBのアイテムの一覧をJSON配列の文字列に変換する
+
+    Args:
+        items: queryが返すアイテムの一覧
+        exclude: レスポンスに含めない属性名
+
+    Returns:
+        str: JSON文字列
+    """
+    buffer = ["["]
+    for i, item in enumerate(items):
+        if i:
+            buffer.append(",")
+        _write_item(item, exclude, buffer)
+    buffer.append("]")
+    return "".join(buffer)
+
+
+def _write_item(item: dict, exclude, buffer: list):
+    if exclude:
+        item = {k: v for k, v in item.items() if k not in exclude}
+    _write({"M": item}, buffer)
+
+
+def _write(attribute_value: dict, buffer: list):
+    # 再帰を使わず、入れ子のM/Lごとにイテレータを積んで先頭から順に書き出す
+    append = buffer.append
+    encode = encode_basestring_ascii
+    frames = [[iter((attribute_value,)), False, "", False]]
+    while frames:
+        frame = frames[-1]
+        in_map = frame[1]
+        descended = False
+        for entry in frame[0]:
+            if frame[3]:
+                append(",")
+            else:
+                frame[3] = True
+            if in_map:
+                key, node = entry
+                append(encode(key) + ":")
+            else:
+                node = entry
+            (tag, value), = node.items()
+            if tag == "S":
+                append(encode(value))
+            elif tag == "N":
+                append(value)
+            elif tag == "M":
+                if value:
+                    append("{")
+                    frames.append([iter(value.items()), True, "}", False])
+                    descended = True
+                    break
+                append("{}")
+            elif tag == "L":
+                if value:
+                    append("[")
+                    frames.append([iter(value), False, "]", False])
+                    descended = True
+                    break
+                append("[]")
+            elif tag == "BOOL":
+                append("true" if value else "false")
+            elif tag == "NULL":
+                append("null")
+            elif tag == "SS":
+                append("[" + ",".join(map(encode, value)) + "]")
+            elif tag == "NS":
+                append("[" + ",".join(value) + "]")
+            elif tag == "B":
+                append(_binary_to_json(value))
+            elif tag == "BS":
+                append("[" + ",".join(map(_binary_to_json, value)) + "]")
+            else:
+                raise TypeError(f"Dynamodb type {tag} is not supported")
+        if not descended:
+            frames.pop()
+            append(frame[2])
+
+
+def _binary_to_json(value) -> str:
+    return '"' + base64.b64encode(bytes(value)).decode("ascii") + '"'
@@ -0,0 +1,74 @@
+import hashlib
+import utils
+
+
+def make_etag(*parts) -> str:
+    """
+    値からETagを作成する
+
+    レスポンスの表現（fieldsの指定など）によって本文が変わるため弱いETagにする。
+
+    Args:
+        parts: ETagを決める値（updated_atと版数、取得する属性など）
+
+    Returns:
+        str: W/"..." 形式のETag
+    """
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def body_etag(body: str) -> str:
+    """
+    レスポンスの本文からETagを作成する（更新日時を持たない一覧などに使う）
+    """
+    return make_etag(body)
+
+
+def get_if_none_match(event: dict) -> list:
+    """
+    If-None-Matchヘッダーの値を取得する
+
+    Returns:
+        list: ETagのリスト（ヘッダーがない場合は空）
+    """
+    for name, value in (event.get("headers") or {}).items():
+        if name.lower() == "if-none-match" and value:
+            return [tag.strip() for tag in value.split(",") if tag.strip()]
+    return []
+
+
+def is_not_modified(event: dict, etag: str) -> bool:
+    """
+    If-None-MatchのETagが一致するか判定する（弱い比較）
+    """
+    tags = get_if_none_match(event)
+    if "*" in tags:
+        return True
+    return _opaque(etag) in (_opaque(tag) for tag in tags)
+
+
+def get_response_headers(etag: str) -> dict:
+    """
+    ETagを含むレスポンスヘッダーを作成する
+    """
+    return {
+        **utils.get_response_headers(),
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Access-Control-Expose-Headers": "ETag"
+    }
+
+
+def get_response_not_modified(etag: str) -> dict:
+    """
+    304 Not Modifiedのレスポンスを作成する（本文は返さない）
+    """
+    return {
+        "statusCode": 304,
+        "headers": get_response_headers(etag)
+    }
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
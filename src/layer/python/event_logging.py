@@ -0,0 +1,173 @@
+import os
+import json
+import random
+import logging
+
+# イベント全体を記録する割合（0〜1、既定では要約のみ記録する）
+LOG_FULL_EVENT_SAMPLE_RATE = float(os.environ.get("LOG_FULL_EVENT_SAMPLE_RATE", "0"))
+
+# 要約で文字列を切り詰める長さ
+MAX_STRING_LENGTH = int(os.environ.get("LOG_MAX_STRING_LENGTH", "256"))
+
+# 要約で残すリストの件数とマップのキー数
+MAX_ITEMS = 5
+MAX_KEYS = 30
+
+# 要約で中身を展開する深さ（それより深いマップやリストは件数のみ記録する）
+MAX_DEPTH = 2
+
+# 値をそのまま記録するクレーム（IDのみ、メールアドレスなどの個人情報は伏せる）
+LOGGED_CLAIMS = {"sub", "custom:tenant_id"}
+
+# クレームやユーザー属性を含むキー
+CLAIM_KEYS = {"claims", "userAttributes"}
+
+# 値を伏せるヘッダー（小文字）
+SENSITIVE_HEADERS = {"authorization", "cookie", "set-cookie", "x-amz-security-token", "x-api-key"}
+
+# 要約に残すヘッダー（小文字）
+LOGGED_HEADERS = {"accept", "accept-encoding", "content-encoding", "content-length", "content-type", "if-none-match", "user-agent"}
+
+REDACTED = "[REDACTED]"
+
+
+class _Lazy:
+    """
+    ログが出力される場合だけJSONに変換する
+    """
+
+    def __init__(self, function, value):
+        self.function = function
+        self.value = value
+
+    def __str__(self):
+        return json.dumps(self.function(self.value), ensure_ascii=False, default=str)
+
+
+def log_event(logger: logging.Logger, event: dict):
+    """
+    受け取ったイベントを記録する
+
+    本文は先頭のみ、深い階層のマップやリストは件数のみ記録し、クレームや認証ヘッダーは伏せる。
+    LOG_FULL_EVENT_SAMPLE_RATEの割合で伏せ字以外を省略しないイベント全体を記録する。
+    ログレベルで出力されない場合は変換しない。
+
+    Args:
+        logger: 出力先のロガー
+        event: Lambdaのイベント
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    if LOG_FULL_EVENT_SAMPLE_RATE and random.random() < LOG_FULL_EVENT_SAMPLE_RATE:
+        logger.info("Received event (full): %s", _Lazy(redact, event))
+    else:
+        logger.info("Received event: %s", _Lazy(summarize_event, event))
+
+
+def summarize_event(event: dict) -> dict:
+    """
+    イベントの要約を作成する
+
+    Returns:
+        dict: API Gatewayの場合はルート・パラメータ・本文の要約、SQSやDynamoDB Streamsの場合はレコードの要約
+    """
+    if not isinstance(event, dict):
+        return summarize_value(event)
+
+    if "httpMethod" in event:
+        request_context = event.get("requestContext") or {}
+        return {
+            "httpMethod": event.get("httpMethod"),
+            "resource": event.get("resource"),
+            "path": event.get("path"),
+            "pathParameters": event.get("pathParameters"),
+            "queryStringParameters": summarize_value(event.get("queryStringParameters")),
+            "headers": {
+                name: value for name, value in (event.get("headers") or {}).items()
+                if name.lower() in LOGGED_HEADERS
+            },
+            "requestId": request_context.get("requestId"),
+            "claims": redact_claims(request_context.get("authorizer", {}).get("claims") or {}),
+            "body": summarize_body(event.get("body"), event.get("isBase64Encoded", False))
+        }
+
+    if isinstance(event.get("Records"), list):
+        records = event["Records"]
+        return {
+            "records": len(records),
+            "eventSource": records[0].get("eventSource") if records else None,
+            "sample": [summarize_record(record) for record in records[:MAX_ITEMS]]
+        }
+
+    return summarize_value(redact(event))
+
+
+def summarize_record(record: dict) -> dict:
+    if "dynamodb" in record:
+        return {"eventName": record.get("eventName"), "keys": record["dynamodb"].get("Keys")}
+    if "messageId" in record:
+        return {"messageId": record["messageId"], "body": summarize_body(record.get("body"))}
+    return summarize_value(redact(record), depth=1)
+
+
+def summarize_body(body, is_base64_encoded: bool = False):
+    """
+    リクエストやメッセージの本文を要約する（解析はせず、サイズと先頭のみ記録する）
+    """
+    if body is None:
+        return None
+    if is_base64_encoded:
+        return {"size": len(body), "base64": True}
+    return {"size": len(body), "preview": truncate(body)}
+
+
+def summarize_value(value, depth: int = 0):
+    """
+    値を要約する（長い文字列は切り詰め、深い階層のマップやリストは件数に置き換える）
+    """
+    if isinstance(value, dict):
+        if depth >= MAX_DEPTH:
+            return f"{{{len(value)} keys}}"
+        summary = {key: summarize_value(item, depth + 1) for key, item in list(value.items())[:MAX_KEYS]}
+        if len(value) > MAX_KEYS:
+            summary["..."] = f"{len(value) - MAX_KEYS} more keys"
+        return summary
+    if isinstance(value, list):
+        if depth >= MAX_DEPTH:
+            return f"[{len(value)} items]"
+        summary = [summarize_value(item, depth + 1) for item in value[:MAX_ITEMS]]
+        if len(value) > MAX_ITEMS:
+            summary.append(f"... {len(value) - MAX_ITEMS} more items")
+        return summary
+    if isinstance(value, str):
+        return truncate(value)
+    return value
+
+
+def truncate(value: str) -> str:
+    if len(value) <= MAX_STRING_LENGTH:
+        return value
+    return f"{value[:MAX_STRING_LENGTH]}...(+{len(value) - MAX_STRING_LENGTH} chars)"
+
+
+def redact(value):
+    """
+    クレーム・ユーザー属性・認証ヘッダーを伏せた値を作成する（それ以外は省略しない）
+    """
+    if isinstance(value, dict):
+        redacted = {}
+        for key, item in value.items():
+            if key in CLAIM_KEYS and isinstance(item, dict):
+                redacted[key] = redact_claims(item)
+            elif isinstance(key, str) and key.lower() in SENSITIVE_HEADERS:
+                redacted[key] = REDACTED
+            else:
+                redacted[key] = redact(item)
+        return redacted
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def redact_claims(claims: dict) -> dict:
+    return {name: value if name in LOGGED_CLAIMS else REDACTED for name, value in claims.items()}
@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+import time
+
+# CloudWatchメトリクスの名前空間
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "FloorStudios/Core")
+
+
+class Metrics:
+    """
+    CloudWatch Embedded Metric Format（EMF）でメトリクスを出力する
+
+    put()で値をためてflush()で1行のJSONとして標準出力に書き出す。
+    dimension_setsを指定した場合はディメンションの組み合わせごとに集計する。
+    """
+
+    def __init__(self, dimensions: dict = None, namespace: str = METRICS_NAMESPACE, dimension_sets: list = None):
+        self.namespace = namespace
+        self.dimensions = dict(dimensions or {})
+        self.dimension_sets = dimension_sets or [list(self.dimensions)]
+        self.properties = {}
+        self._values = {}
+        self._units = {}
+
+    def put(self, name: str, value, unit: str = "Count"):
+        self._values[name] = self._values.get(name, 0) + value
+        self._units[name] = unit
+
+    def set_property(self, name: str, value):
+        self.properties[name] = value
+
+    def flush(self):
+        if not self._values:
+            return
+        document = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": self.dimension_sets,
+                    "Metrics": [{"Name": name, "Unit": self._units[name]} for name in self._values]
+                }]
+            }
+        }
+        document.update(self.properties)
+        document.update(self.dimensions)
+        document.update(self._values)
+        sys.stdout.write(json.dumps(document, default=str) + "\n")
+        sys.stdout.flush()
+        self._values = {}
+        self._units = {}
+
+
+def put_metrics(values: dict, dimensions: dict = None, unit: str = "Count", **properties):
+    """
+    メトリクスをまとめて1件のEMFとして出力する
+
+    Args:
+        values: メトリクス名と値
+        dimensions: ディメンション
+        unit: 単位
+        properties: メトリクスと一緒に記録する属性
+    """
+    metrics = Metrics(dimensions)
+    for name, value in values.items():
+        metrics.put(name, value, unit)
+    for name, value in properties.items():
+        metrics.set_property(name, value)
+    metrics.flush()
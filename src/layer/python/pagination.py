@@ -0,0 +1,89 @@
+import os
+import json
+import hmac
+import base64
+import hashlib
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str, scope: str) -> str:
+    key = os.environ["CURSOR_SIGNING_KEY"].encode("utf-8")
+    message = f"{scope}\n{payload}".encode("utf-8")
+    return _b64encode(hmac.new(key, message, hashlib.sha256).digest())
+
+
+def encode_cursor(last_evaluated_key: dict, scope: str) -> str:
+    """
+    LastEvaluatedKeyを署名付きの不透明なカーソルに変換する
+
+    Args:
+        last_evaluated_key: queryが返すLastEvaluatedKey
+        scope: カーソルを使えるクエリの範囲（テナントID、インデックス、キー条件）
+
+    Returns:
+        str: カーソル文字列
+    """
+    payload = _b64encode(json.dumps(last_evaluated_key, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload, scope)}"
+
+
+def decode_cursor(cursor: str, scope: str) -> dict:
+    """
+    カーソルを検証してExclusiveStartKeyに戻す
+
+    Args:
+        cursor: encode_cursorで生成したカーソル文字列
+        scope: カーソルを使えるクエリの範囲
+
+    Returns:
+        dict: queryに渡すExclusiveStartKey
+
+    Raises:
+        InvalidCursorError: 改ざんされている、または別のクエリのカーソルの場合
+    """
+    payload, _, signature = cursor.partition(".")
+    if not payload or not signature:
+        raise InvalidCursorError("Malformed cursor")
+    if not hmac.compare_digest(signature, _sign(payload, scope)):
+        raise InvalidCursorError("Invalid cursor signature")
+    try:
+        last_evaluated_key = json.loads(_b64decode(payload))
+    except ValueError as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if not isinstance(last_evaluated_key, dict):
+        raise InvalidCursorError("Malformed cursor")
+    return last_evaluated_key
+
+
+def parse_limit(value, default: int, maximum: int) -> int:
+    """
+    クエリパラメータのlimitを検証して数値に変換する
+
+    Args:
+        value: クエリパラメータの値（未指定の場合はNone）
+        default: 未指定の場合の件数
+        maximum: 指定できる最大件数
+
+    Returns:
+        int: 取得件数
+
+    Raises:
+        ValueError: 1以上maximum以下の整数でない場合
+    """
+    if value is None or value == "":
+        return default
+    limit = int(value)
+    if limit < 1 or limit > maximum:
+        raise ValueError(f"limit must be between 1 and {maximum}")
+    return limit
@@ -0,0 +1,260 @@
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from botocore.exceptions import ClientError, ConnectionError, ReadTimeoutError
+
+# copy_objectでコピーできる最大サイズ（5GB）
+MAX_SINGLE_COPY_SIZE = 5 * 1024 ** 3
+
+# マルチパートコピーのパートサイズ
+MULTIPART_PART_SIZE = 512 * 1024 ** 2
+
+# 再試行するS3のエラーコード
+TRANSIENT_ERROR_CODES = {
+    "InternalError",
+    "RequestTimeout",
+    "ServiceUnavailable",
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+}
+
+# ログの設定
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class CopyError(Exception):
+    pass
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, (ConnectionError, ReadTimeoutError)):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in TRANSIENT_ERROR_CODES or status >= 500
+    return False
+
+
+def _call_with_retry(operation, max_attempts: int, **kwargs) -> dict:
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return operation(**kwargs)
+        except Exception as e:
+            if attempt == max_attempts or not _is_transient(e):
+                raise
+            # 他のスレッドと同時に再試行しないよう揺らぎを入れて待機する
+            time.sleep(random.uniform(0, min(0.1 * (2 ** attempt), 2)))
+
+
+def copy_object(s3, bucket: str, source_key: str, destination_key: str, size: int, max_attempts: int = 3):
+    """
+    同じバケット内でオブジェクトを1件コピーする
+
+    5GBを超えるオブジェクトはマルチパートコピーを使う。
+
+    Args:
+        s3: S3クライアント
+        bucket: バケット名
+        source_key: コピー元のキー
+        destination_key: コピー先のキー
+        size: オブジェクトのサイズ（バイト）
+        max_attempts: 一時的なエラーの最大試行回数
+    """
+    started_at = time.perf_counter()
+    copy_source = {"Bucket": bucket, "Key": source_key}
+
+    if size <= MAX_SINGLE_COPY_SIZE:
+        _call_with_retry(
+            s3.copy_object,
+            max_attempts,
+            Bucket=bucket,
+            CopySource=copy_source,
+            Key=destination_key
+        )
+    else:
+        _multipart_copy(s3, bucket, copy_source, destination_key, size, max_attempts)
+
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    logger.info(f"Copied s3 object: {source_key} -> {destination_key} ({size} bytes, {elapsed_ms:.0f} ms)")
+
+
+def _multipart_copy(s3, bucket: str, copy_source: dict, destination_key: str, size: int, max_attempts: int):
+    upload_id = _call_with_retry(
+        s3.create_multipart_upload,
+        max_attempts,
+        Bucket=bucket,
+        Key=destination_key
+    )["UploadId"]
+
+    try:
+        parts = []
+        for part_number, start in enumerate(range(0, size, MULTIPART_PART_SIZE), start=1):
+            end = min(start + MULTIPART_PART_SIZE, size) - 1
+            response = _call_with_retry(
+                s3.upload_part_copy,
+                max_attempts,
+                Bucket=bucket,
+                Key=destination_key,
+                CopySource=copy_source,
+                CopySourceRange=f"bytes={start}-{end}",
+                PartNumber=part_number,
+                UploadId=upload_id
+            )
+            parts.append({"ETag": response["CopyPartResult"]["ETag"], "PartNumber": part_number})
+
+        _call_with_retry(
+            s3.complete_multipart_upload,
+            max_attempts,
+            Bucket=bucket,
+            Key=destination_key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+    except Exception:
+        # 中止に失敗しても、そのエラーで元のエラーが隠れないよう元のエラーを送出する
+        try:
+            s3.abort_multipart_upload(Bucket=bucket, Key=destination_key, UploadId=upload_id)
+        except Exception as e:
+            logger.warning(f"Failed to abort multipart upload {upload_id} of {destination_key}: {e}")
+        raise
+
+
+def copy_objects(s3, bucket: str, copies: list, max_workers: int = 8, max_attempts: int = 3):
+    """
+    複数のオブジェクトを並列でコピーする
+
+    最初に恒久的なエラーが発生した時点で未開始のコピーを取り消し、CopyErrorを送出する。
+
+    Args:
+        s3: S3クライアント
+        bucket: バケット名
+        copies: (コピー元のキー, コピー先のキー, サイズ) の一覧
+        max_workers: 同時にコピーする最大数
+        max_attempts: 一時的なエラーの最大試行回数
+
+    Raises:
+        CopyError: コピーに失敗したオブジェクトがある場合
+    """
+    if not copies:
+        return
+
+    failed = threading.Event()
+
+    def copy(source_key, destination_key, size):
+        # 他のコピーが失敗している場合は開始しない
+        if failed.is_set():
+            return
+        try:
+            copy_object(s3, bucket, source_key, destination_key, size, max_attempts)
+        except Exception as e:
+            failed.set()
+            raise CopyError(f"Failed to copy s3 object: {source_key}") from e
+
+    started_at = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(copies)))
+    try:
+        futures = [executor.submit(copy, *entry) for entry in copies]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            if future.exception() is not None:
+                raise future.exception()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    logger.info(f"Copied {len(copies)} s3 objects in {elapsed_ms:.0f} ms")
+
+
+class DeleteError(Exception):
+    pass
+
+
+def delete_keys(s3, bucket: str, keys: list, max_attempts: int = 5) -> dict:
+    """
+    最大1000件のオブジェクトをdelete_objectsで削除する
+
+    一部のキーだけ失敗した場合は、失敗したキーだけを待機して再試行する。
+
+    Args:
+        s3: S3クライアント
+        bucket: バケット名
+        keys: 削除するキー（1000件まで）
+        max_attempts: 最大試行回数
+
+    Returns:
+        dict: {"deleted": 削除した件数, "retried": 再試行したキーの件数}
+
+    Raises:
+        DeleteError: 最大試行回数まで再試行しても削除できないキーがある場合
+    """
+    remaining = list(keys)
+    retried = 0
+    for attempt in range(1, max_attempts + 1):
+        response = _call_with_retry(
+            s3.delete_objects,
+            max_attempts,
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": key} for key in remaining], "Quiet": True}
+        )
+        errors = response.get("Errors", [])
+        if not errors:
+            return {"deleted": len(keys), "retried": retried}
+
+        remaining = [error["Key"] for error in errors]
+        if attempt == max_attempts:
+            break
+        retried += len(remaining)
+        logger.warning(f"Retrying {len(remaining)} s3 objects: {errors[0].get('Code')} {errors[0].get('Message')}")
+        time.sleep(random.uniform(0, min(0.1 * (2 ** attempt), 2)))
+
+    raise DeleteError(f"Failed to delete {len(remaining)} s3 objects: {remaining[:10]}")
+
+
+def delete_prefix(s3, bucket: str, prefix: str, max_workers: int = 8) -> dict:
+    """
+    プレフィックス配下のすべてのオブジェクトを並列で削除する
+
+    一覧の1ページ（1000件）ごとにdelete_objectsを並列で実行する。
+    既に削除済みのキーは一覧に出てこないため、何度実行しても同じ結果になる。
+
+    Args:
+        s3: S3クライアント
+        bucket: バケット名
+        prefix: 削除するプレフィックス
+        max_workers: 同時に実行するdelete_objectsの最大数
+
+    Returns:
+        dict: {"deleted": 削除した件数, "batches": delete_objectsの回数, "retried": 再試行したキーの件数}
+
+    Raises:
+        DeleteError: 削除できないオブジェクトがある場合
+    """
+    paginator = s3.get_paginator("list_objects_v2")
+    result = {"deleted": 0, "batches": 0, "retried": 0}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix, PaginationConfig={"PageSize": 1000}):
+            keys = [obj["Key"] for obj in page.get("Contents", [])]
+            if keys:
+                futures.append(executor.submit(delete_keys, s3, bucket, keys))
+
+        errors = []
+        for future in futures:
+            try:
+                batch_result = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            result["batches"] += 1
+            result["deleted"] += batch_result["deleted"]
+            result["retried"] += batch_result["retried"]
+
+    if errors:
+        raise DeleteError(f"Failed to delete s3 objects in {prefix}: {errors[0]}") from errors[0]
+    return result
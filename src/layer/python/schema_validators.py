@@ -0,0 +1,261 @@
+import os
+import json
+import threading
+from collections import namedtuple
+
+# ビルド済みのスキーマのファイル名（scripts/build_schemas.pyで作成する）
+COMPILED_SCHEMAS_FILE = "schemas.json"
+
+# OpenAPIのスキーマファイル名
+OPENAPI_SCHEMA_FILE = "schema.yaml"
+
+# 検証しないキーワード（jsonschemaも既定ではformatを検証しない）
+ANNOTATION_KEYWORDS = {"description", "title", "default", "example", "format"}
+
+# JSONの型とPythonの型の対応（boolはintのサブクラスのため別に判定する）
+JSON_TYPES = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None
+}
+
+# 操作ごとのリクエストとレスポンスの検証関数（スキーマがない場合はNone）
+OperationValidators = namedtuple("OperationValidators", ["request", "response"])
+
+# 読み込み済みの検証関数
+_validators = {}
+_lock = threading.Lock()
+
+
+class SchemaValidationError(ValueError):
+    """
+    スキーマに一致しない場合のエラー
+    """
+
+    def __init__(self, message: str, path: tuple = ()):
+        super().__init__(f"{'/'.join(str(p) for p in path) or '<root>'}: {message}")
+        self.path = path
+
+
+def load(function_dir: str, operation: str) -> OperationValidators:
+    """
+    関数ディレクトリのスキーマから操作の検証関数を取得する
+
+    ビルド済みのschemas.jsonを使い、ない場合（ローカル実行など）はschema.yamlから作成する。
+    検証関数はコンテナ内でキャッシュする。
+
+    Args:
+        function_dir: 関数ディレクトリのパス
+        operation: "PUT /v1/users/{user_id}" 形式の操作名
+
+    Returns:
+        OperationValidators: リクエストとレスポンスの検証関数
+    """
+    key = (function_dir, operation)
+    with _lock:
+        if key not in _validators:
+            schemas = load_operation_schemas(function_dir).get(operation, {})
+            _validators[key] = OperationValidators(
+                request=compile_schema(schemas["request"]) if "request" in schemas else None,
+                response=compile_schema(schemas["response"]) if "response" in schemas else None
+            )
+        return _validators[key]
+
+
+def load_operation_schemas(function_dir: str) -> dict:
+    """
+    関数ディレクトリの操作ごとのスキーマを読み込む
+
+    Returns:
+        dict: 操作名 -> {"request": スキーマ, "response": スキーマ}
+    """
+    compiled_path = os.path.join(function_dir, COMPILED_SCHEMAS_FILE)
+    if os.path.exists(compiled_path):
+        with open(compiled_path, "r") as f:
+            return json.load(f)
+
+    import yaml
+    with open(os.path.join(function_dir, OPENAPI_SCHEMA_FILE), "r") as f:
+        return extract_operation_schemas(yaml.safe_load(f))
+
+
+def extract_operation_schemas(openapi: dict) -> dict:
+    """
+    OpenAPIの定義から操作ごとのリクエストと200番台のレスポンスのJSONスキーマを取り出す
+
+    Args:
+        openapi: OpenAPIの定義
+
+    Returns:
+        dict: 操作名 -> {"request": スキーマ, "response": スキーマ}
+    """
+    operations = {}
+    for path, path_item in openapi.get("paths", {}).items():
+        for method, operation in path_item.items():
+            if method == "parameters":
+                continue
+            schemas = {}
+            request_schema = operation.get("requestBody", {}).get("content", {}).get("application/json", {}).get("schema")
+            if request_schema is not None:
+                schemas["request"] = to_json_schema(request_schema)
+            for status in ("200", "201"):
+                response_schema = operation.get("responses", {}).get(status, {}).get("content", {}).get("application/json", {}).get("schema")
+                if response_schema is not None:
+                    schemas["response"] = to_json_schema(response_schema)
+                    break
+            operations[f"{method.upper()} {path}"] = schemas
+    return operations
+
+
+def to_json_schema(schema):
+    """
+    OpenAPI 3.0のスキーマをJSONスキーマに変換する（nullableを型の配列にする）
+    """
+    if isinstance(schema, list):
+        return [to_json_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    converted = {key: to_json_schema(value) for key, value in schema.items() if key != "nullable"}
+    if schema.get("nullable") and "type" in schema:
+        converted["type"] = [schema["type"], "null"]
+    if "properties" in schema:
+        converted["properties"] = {name: to_json_schema(value) for name, value in schema["properties"].items()}
+    return converted
+
+
+def compile_schema(schema: dict):
+    """
+    JSONスキーマを検証関数に変換する
+
+    よく使うキーワードだけで書かれたスキーマはPythonの関数に変換し、
+    それ以外のキーワードを含む場合はjsonschemaのバリデーターを一度だけ作成して使う。
+
+    Args:
+        schema: JSONスキーマ
+
+    Returns:
+        function: 値を受け取り、一致しない場合はSchemaValidationErrorを送出する関数
+    """
+    try:
+        check = _compile(schema, ())
+    except NotImplementedError:
+        check = _compile_with_jsonschema(schema)
+
+    def validate(instance):
+        check(instance)
+        return instance
+
+    return validate
+
+
+def _compile(schema: dict, path: tuple):
+    checks = []
+    for keyword in schema:
+        if keyword not in ANNOTATION_KEYWORDS and keyword not in (
+            "type", "enum", "required", "properties", "additionalProperties", "items",
+            "minLength", "maxLength", "minimum", "maximum", "minItems", "maxItems"
+        ):
+            raise NotImplementedError(keyword)
+
+    if "type" in schema:
+        types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        type_checks = [JSON_TYPES[t] for t in types]
+
+        def check_type(value, path):
+            if not any(type_check(value) for type_check in type_checks):
+                raise SchemaValidationError(f"{value!r} is not of type {', '.join(types)}", path)
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(value, path):
+            if value not in allowed:
+                raise SchemaValidationError(f"{value!r} is not one of {allowed!r}", path)
+        checks.append(check_enum)
+
+    if "required" in schema:
+        required = schema["required"]
+
+        def check_required(value, path):
+            if isinstance(value, dict):
+                for name in required:
+                    if name not in value:
+                        raise SchemaValidationError(f"{name!r} is a required property", path)
+        checks.append(check_required)
+
+    if "properties" in schema:
+        properties = {name: _compile(sub_schema, ()) for name, sub_schema in schema["properties"].items()}
+
+        def check_properties(value, path):
+            if isinstance(value, dict):
+                for name, check in properties.items():
+                    if name in value:
+                        check(value[name], path + (name,))
+        checks.append(check_properties)
+
+    if schema.get("additionalProperties") is False:
+        known = set(schema.get("properties", {}))
+
+        def check_additional(value, path):
+            if isinstance(value, dict):
+                extra = sorted(set(value) - known)
+                if extra:
+                    raise SchemaValidationError(f"Additional properties are not allowed ({', '.join(extra)})", path)
+        checks.append(check_additional)
+    elif isinstance(schema.get("additionalProperties"), dict):
+        raise NotImplementedError("additionalProperties")
+
+    if "items" in schema:
+        if not isinstance(schema["items"], dict):
+            raise NotImplementedError("items")
+        item_check = _compile(schema["items"], ())
+
+        def check_items(value, path):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    item_check(item, path + (i,))
+        checks.append(check_items)
+
+    for keyword, applies, measure, compare, message in (
+        ("minLength", JSON_TYPES["string"], len, lambda a, b: a >= b, "is too short"),
+        ("maxLength", JSON_TYPES["string"], len, lambda a, b: a <= b, "is too long"),
+        ("minItems", JSON_TYPES["array"], len, lambda a, b: a >= b, "is too short"),
+        ("maxItems", JSON_TYPES["array"], len, lambda a, b: a <= b, "is too long"),
+        ("minimum", JSON_TYPES["number"], lambda v: v, lambda a, b: a >= b, "is less than the minimum"),
+        ("maximum", JSON_TYPES["number"], lambda v: v, lambda a, b: a <= b, "is greater than the maximum"),
+    ):
+        if keyword in schema:
+            checks.append(_bound_check(schema[keyword], applies, measure, compare, message))
+
+    def check(value, path=path):
+        for single_check in checks:
+            single_check(value, path)
+
+    return check
+
+
+def _bound_check(limit, applies, measure, compare, message):
+    def check_bound(value, path):
+        if applies(value) and not compare(measure(value), limit):
+            raise SchemaValidationError(f"{value!r} {message} ({limit})", path)
+    return check_bound
+
+
+def _compile_with_jsonschema(schema: dict):
+    import jsonschema
+
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator = validator_class(schema)
+
+    def check(value, path=()):
+        error = jsonschema.exceptions.best_match(validator.iter_errors(value))
+        if error is not None:
+            raise SchemaValidationError(error.message, tuple(error.absolute_path))
+
+    return check
@@ -0,0 +1,105 @@
+import json
+import hashlib
+
+# レスポンスとして返せる仕様書の属性
+SPECIFICATION_FIELDS = (
+    "specification_id",
+    "specification_group_id",
+    "brand_name",
+    "product_name",
+    "product_code",
+    "status",
+    "progress",
+    "type",
+    "fit",
+    "custom_fit",
+    "fabric",
+    "tag",
+    "care_label",
+    "patch",
+    "oem_points",
+    "sample",
+    "main_production",
+    "information",
+    "specification_file",
+    "updated_by",
+    "updated_at",
+    "version"
+)
+
+# PDFの作成に使う属性（CreateSpecificationが参照する属性）
+SPECIFICATION_RENDER_FIELDS = (
+    "type",
+    "product_name",
+    "product_code",
+    "fit",
+    "custom_fit",
+    "fabric",
+    "tag",
+    "care_label",
+    "patch",
+    "oem_points",
+    "sample",
+    "main_production",
+    "information"
+)
+
+# 一覧画面で使う属性（一覧取得のデフォルトの射影）
+SPECIFICATION_LIST_FIELDS = (
+    "specification_id",
+    "specification_group_id",
+    "brand_name",
+    "product_name",
+    "product_code",
+    "status",
+    "progress",
+    "type",
+    "updated_at"
+)
+
+# 一覧用サマリーに保持する属性（検索キーを含む）
+SPECIFICATION_SUMMARY_ATTRIBUTES = (
+    *SPECIFICATION_LIST_FIELDS,
+    "tenant_id",
+    "tenant_id#status"
+)
+
+
+def to_summary(item: dict) -> dict:
+    """
+    DynamoDB形式の仕様書アイテムから一覧用サマリーを作成する
+
+    Args:
+        item: DynamoDB形式の仕様書アイテム
+
+    Returns:
+        dict: DynamoDB形式のサマリーアイテム
+    """
+    return {k: item[k] for k in SPECIFICATION_SUMMARY_ATTRIBUTES if k in item}
+
+
+def render_hash(value) -> str:
+    """
+    PDFの作成に使う属性の値から、キーの順序や空白に依存しないハッシュを作成する
+
+    Args:
+        value: リクエストボディの値
+
+    Returns:
+        str: ハッシュ値
+    """
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def render_hashes(values: dict) -> dict:
+    """
+    PDFの作成に使う属性ごとのハッシュを作成する
+
+    Args:
+        values: 仕様書の属性（PDFの作成に使わない属性は無視する）
+
+    Returns:
+        dict: 属性名とハッシュ値
+    """
+    return {field: render_hash(values[field]) for field in SPECIFICATION_RENDER_FIELDS if field in values}
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+from botocore.exceptions import ClientError
+import dynamo_codec
+import specification_updates
+
+# 最後の自動保存からこの秒数だけ編集がなければ仕様書に反映する
+AUTOSAVE_IDLE_SECONDS = int(os.environ.get("AUTOSAVE_IDLE_SECONDS", "30"))
+
+# 反映の予約が残っていても、前回の自動保存からAUTOSAVE_IDLE_SECONDSにこの秒数を加えても
+# 反映されていない場合は予約のメッセージが失われた（デッドレターキューに移った）とみなして予約し直す
+# （反映に失敗したメッセージはキューの可視性タイムアウトの後に再試行されるため、それより長くする）
+COMMIT_RESCHEDULE_MARGIN_SECONDS = int(os.environ.get("COMMIT_RESCHEDULE_MARGIN_SECONDS", "300"))
+
+# 下書きの保持期間（秒）
+DRAFT_TTL_SECONDS = 24 * 60 * 60
+
+# batch_write_itemで1回に削除できる最大件数
+BATCH_WRITE_SIZE = 25
+
+# 下書きのうち仕様書に反映しない管理用の属性
+DRAFT_META_ATTRIBUTES = ("specification_id", "tenant_id", "revision", "saved_at", "expires_at", "commit_scheduled")
+
+
+def save_draft(dynamodb, table_name: str, tenant_id: str, specification_id: str, values: dict) -> bool:
+    """
+    自動保存の内容を下書きにマージする
+
+    Args:
+        dynamodb: DynamoDBクライアント
+        table_name: 下書きテーブル名
+        tenant_id: テナントID
+        specification_id: 仕様書ID
+        values: 保存する属性（更新できない属性は無視する）
+
+    Returns:
+        bool: 反映の予約がまだない場合、または予約が失われた場合はTrue（呼び出し側で予約する）
+    """
+    fields = [field for field in (*specification_updates.SPECIFICATION_UPDATE_FIELDS, "status") if field in values]
+    now = time.time()
+
+    expression_attribute_names = {f"#f{i}": field for i, field in enumerate(fields)}
+    expression_attribute_values = {f":f{i}": dynamo_codec.to_dynamo(values[field]) for i, field in enumerate(fields)}
+    expression_attribute_names.update({
+        "#saved_at": "saved_at",
+        "#expires_at": "expires_at",
+        "#commit_scheduled": "commit_scheduled",
+        "#revision": "revision"
+    })
+    expression_attribute_values.update({
+        ":saved_at": dynamo_codec.to_dynamo(now),
+        ":expires_at": {"N": str(int(now) + DRAFT_TTL_SECONDS)},
+        ":commit_scheduled": {"BOOL": True},
+        ":one": {"N": "1"}
+    })
+    set_clauses = [f"#f{i} = :f{i}" for i in range(len(fields))]
+    set_clauses += ["#saved_at = :saved_at", "#expires_at = :expires_at", "#commit_scheduled = :commit_scheduled"]
+
+    response = dynamodb.update_item(
+        TableName=table_name,
+        Key={
+            "specification_id": {"S": specification_id},
+            "tenant_id": {"S": tenant_id}
+        },
+        UpdateExpression="SET " + ", ".join(set_clauses) + " ADD #revision :one",
+        ExpressionAttributeNames=expression_attribute_names,
+        ExpressionAttributeValues=expression_attribute_values,
+        ReturnValues="UPDATED_OLD"
+    )
+    old = response.get("Attributes", {})
+    if "commit_scheduled" not in old:
+        return True
+
+    # 予約済みでも前回の保存から反映されるはずの時間を過ぎていれば予約し直す
+    # （予約が重複しても反映時に編集中か確認するため、反映は1回になる）
+    last_saved_at = float(dynamo_codec.to_python(old["saved_at"])) if "saved_at" in old else 0.0
+    return now - last_saved_at > AUTOSAVE_IDLE_SECONDS + COMMIT_RESCHEDULE_MARGIN_SECONDS
+
+
+def get_draft(dynamodb, table_name: str, tenant_id: str, specification_id: str):
+    """
+    下書きを取得する
+
+    Returns:
+        dict: 下書き（存在しない場合はNone）
+    """
+    response = dynamodb.get_item(
+        TableName=table_name,
+        Key={
+            "specification_id": {"S": specification_id},
+            "tenant_id": {"S": tenant_id}
+        },
+        ConsistentRead=True
+    )
+    if "Item" not in response:
+        return None
+    return dynamo_codec.item_to_python(response["Item"])
+
+
+def draft_values(draft: dict) -> dict:
+    """
+    下書きから仕様書に反映する属性だけを取り出す
+    """
+    return {k: v for k, v in draft.items() if k not in DRAFT_META_ATTRIBUTES}
+
+
+def delete_draft(dynamodb, table_name: str, tenant_id: str, specification_id: str, revision: int) -> bool:
+    """
+    反映済みの下書きを削除する
+
+    反映中に新しい自動保存があった場合は削除しない。
+
+    Args:
+        revision: 反映した下書きのrevision
+
+    Returns:
+        bool: 削除した場合はTrue
+    """
+    try:
+        dynamodb.delete_item(
+            TableName=table_name,
+            Key={
+                "specification_id": {"S": specification_id},
+                "tenant_id": {"S": tenant_id}
+            },
+            ConditionExpression="#revision = :revision",
+            ExpressionAttributeNames={"#revision": "revision"},
+            ExpressionAttributeValues={":revision": {"N": str(revision)}}
+        )
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return False
+        raise
+
+
+def discard_drafts(dynamodb, table_name: str, tenant_id: str, specification_ids: list, max_attempts: int = 5):
+    """
+    削除した仕様書の下書きを破棄する
+
+    下書きがない仕様書も指定できる。反映の予約が残っていても、反映時に下書きがないため何もしない。
+
+    Args:
+        dynamodb: DynamoDBクライアント
+        table_name: 下書きテーブル名
+        tenant_id: テナントID
+        specification_ids: 仕様書IDの一覧
+        max_attempts: 未処理のアイテムの最大試行回数
+    """
+    for i in range(0, len(specification_ids), BATCH_WRITE_SIZE):
+        request_items = {table_name: [
+            {"DeleteRequest": {"Key": {"specification_id": {"S": specification_id}, "tenant_id": {"S": tenant_id}}}}
+            for specification_id in specification_ids[i:i + BATCH_WRITE_SIZE]
+        ]}
+        for attempt in range(max_attempts):
+            response = dynamodb.batch_write_item(RequestItems=request_items)
+            request_items = response.get("UnprocessedItems") or {}
+            if not request_items:
+                break
+            time.sleep(min(0.05 * (2 ** attempt), 1))
+        else:
+            raise RuntimeError("Failed to discard specification drafts")
+
+
+def schedule_commit(sqs, queue_url: str, tenant_id: str, specification_id: str, delay_seconds: int = AUTOSAVE_IDLE_SECONDS):
+    """
+    下書きの反映を遅延メッセージで予約する
+
+    Args:
+        delay_seconds: 反映を確認するまでの秒数（SQSの上限の900秒まで）
+    """
+    sqs.send_message(
+        QueueUrl=queue_url,
+        MessageBody=json.dumps({
+            "tenant_id": tenant_id,
+            "specification_id": specification_id
+        }),
+        DelaySeconds=max(0, min(int(delay_seconds), 900))
+    )
@@ -0,0 +1,116 @@
+# 仕様書グループに保持する仕様書数の属性名
+COUNT_ATTRIBUTE = "specification_count"
+
+# ステータスごとの仕様書数のマップの属性名（{ステータス: 仕様書数}）
+# 属性名を固定して一覧の取得で射影できるようにする。ADDは入れ子の属性に使えないため、SETの加算で増減する
+STATUS_COUNTS_ATTRIBUTE = "specification_status_counts"
+
+# 作成した仕様書グループの仕様書数の初期値
+INITIAL_COUNTS = {COUNT_ATTRIBUTE: {"N": "0"}, STATUS_COUNTS_ATTRIBUTE: {"M": {}}}
+
+
+def get_group_status(image: dict):
+    """
+    DynamoDB形式の仕様書アイテムから集計先の仕様書グループとステータスを取得する
+
+    Returns:
+        tuple: (tenant_id, specification_group_id, status)（グループに属さない場合はNone）
+    """
+    if not image or not image.get("specification_group_id", {}).get("S"):
+        return None
+    return image["tenant_id"]["S"], image["specification_group_id"]["S"], image.get("status", {}).get("S", "")
+
+
+def get_deltas(old_image: dict, new_image: dict) -> dict:
+    """
+    仕様書の変更前後のアイテムから仕様書グループごとの仕様書数の増減を求める
+
+    作成・複製は変更後のグループに+1、削除は変更前のグループに-1、
+    グループの移動とステータスの変更は変更前に-1、変更後に+1する。
+
+    Args:
+        old_image: DynamoDB形式の変更前のアイテム（作成の場合はNone）
+        new_image: DynamoDB形式の変更後のアイテム（削除の場合はNone）
+
+    Returns:
+        dict: (tenant_id, specification_group_id) -> {ステータス: 増減}
+    """
+    old, new = get_group_status(old_image), get_group_status(new_image)
+    if old == new:
+        return {}
+
+    deltas = {}
+    for group_status, delta in ((old, -1), (new, 1)):
+        if group_status is None:
+            continue
+        tenant_id, specification_group_id, status = group_status
+        counts = deltas.setdefault((tenant_id, specification_group_id), {})
+        counts[status] = counts.get(status, 0) + delta
+    return deltas
+
+
+def get_add_expression(counts: dict) -> dict:
+    """
+    ステータスごとの増減から仕様書グループを更新する式を作成する
+
+    ステータスごとの仕様書数のマップがない（数え直す前の）仕様書グループは更新しない。
+
+    Args:
+        counts: {ステータス: 増減}
+
+    Returns:
+        dict: update_itemに渡すUpdateExpression、ConditionExpression、ExpressionAttributeNames、ExpressionAttributeValues
+    """
+    names = {"#count": COUNT_ATTRIBUTE, "#status_counts": STATUS_COUNTS_ATTRIBUTE}
+    values = {":count": {"N": str(sum(counts.values()))}, ":zero": {"N": "0"}}
+    clauses = []
+    for i, (status, delta) in enumerate(sorted(counts.items())):
+        names[f"#status{i}"] = status
+        values[f":status{i}"] = {"N": str(delta)}
+        clauses.append(f"#status_counts.#status{i} = if_not_exists(#status_counts.#status{i}, :zero) + :status{i}")
+    return {
+        "UpdateExpression": "SET " + ", ".join(clauses) + " ADD #count :count",
+        "ConditionExpression": "attribute_exists(#status_counts)",
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values
+    }
+
+
+def get_set_expression(counts: dict) -> dict:
+    """
+    数え直した仕様書数で仕様書グループの仕様書数を置き換える式を作成する
+
+    Args:
+        counts: {ステータス: 仕様書数}
+
+    Returns:
+        dict: update_itemに渡すUpdateExpression、ExpressionAttributeNames、ExpressionAttributeValues
+    """
+    return {
+        "UpdateExpression": "SET #count = :count, #status_counts = :status_counts",
+        "ExpressionAttributeNames": {"#count": COUNT_ATTRIBUTE, "#status_counts": STATUS_COUNTS_ATTRIBUTE},
+        "ExpressionAttributeValues": {
+            ":count": {"N": str(sum(counts.values()))},
+            ":status_counts": {"M": {status: {"N": str(count)} for status, count in sorted(counts.items())}}
+        }
+    }
+
+
+def to_counts_attribute(item: dict) -> dict:
+    """
+    DynamoDB形式の仕様書グループのアイテムから、レスポンスに含める仕様書数をDynamoDB形式で取り出す
+
+    数値は変換せずにそのまま使い、dynamo_codec.dumps_itemsでそのままJSONにできる形にする。
+
+    Returns:
+        dict: {"M": {"total": 仕様書数, "by_status": {"M": {ステータス: 仕様書数}}}}（0件のステータスは含めない）
+    """
+    by_status = {
+        status: count
+        for status, count in item.get(STATUS_COUNTS_ATTRIBUTE, {}).get("M", {}).items()
+        if int(count["N"])
+    }
+    return {"M": {
+        "total": item.get(COUNT_ATTRIBUTE, {"N": "0"}),
+        "by_status": {"M": by_status}
+    }}
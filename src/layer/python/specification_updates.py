@@ -0,0 +1,166 @@
+import json
+from datetime import datetime
+from botocore.exceptions import ClientError
+import dynamo_codec
+import specification_attributes
+
+# 仕様書の更新で変更できる属性（statusは別に扱う）
+SPECIFICATION_UPDATE_FIELDS = (
+    "brand_name",
+    "product_name",
+    "product_code",
+    "specification_group_id",
+    "type",
+    "progress",
+    "fit",
+    "custom_fit",
+    "fabric",
+    "tag",
+    "care_label",
+    "patch",
+    "oem_points",
+    "sample",
+    "main_production",
+    "information"
+)
+
+
+class SpecificationNotFoundError(Exception):
+    pass
+
+
+def update_specification(dynamodb, table_name: str, tenant_id: str, specification_id: str, values: dict) -> bool:
+    """
+    仕様書を更新し、PDFの作成に使う属性が変わったかどうかを返す
+
+    PDFの作成に使う属性は値のハッシュを同じupdate_itemで保存し、変更前のハッシュと比較する。
+
+    Args:
+        dynamodb: DynamoDBクライアント
+        table_name: 仕様書テーブル名
+        tenant_id: テナントID
+        specification_id: 仕様書ID
+        values: 更新する属性（SPECIFICATION_UPDATE_FIELDSとstatus以外は無視する）
+
+    Returns:
+        bool: PDFの再作成が必要な場合はTrue
+
+    Raises:
+        SpecificationNotFoundError: 仕様書が存在しない（削除された）場合
+    """
+    # 更新式と属性の準備
+    update_expression = "SET "
+    expression_attribute_names = {}
+    expression_attribute_values = {}
+
+    # 通常の更新項目を追加
+    update_items = [item for item in SPECIFICATION_UPDATE_FIELDS if item in values]
+    for item in update_items:
+        update_expression += f"#{item} = :{item}, "
+        expression_attribute_names[f"#{item}"] = item
+        expression_attribute_values[f":{item}"] = dynamo_codec.to_dynamo(values[item])
+
+    if values.get("status") is not None:
+        update_expression += "#status = :status, "
+        expression_attribute_names["#status"] = "status"
+        expression_attribute_values[":status"] = dynamo_codec.to_dynamo(values["status"])
+        update_expression += "#tenant_id_status = :tenant_id_status, "
+        expression_attribute_names["#tenant_id_status"] = "tenant_id#status"
+        expression_attribute_values[":tenant_id_status"] = dynamo_codec.to_dynamo(f"{tenant_id}#{values['status']}")
+
+    # updated_atを追加
+    update_expression += "#updated_at = :updated_at"
+    expression_attribute_names["#updated_at"] = "updated_at"
+    expression_attribute_values[":updated_at"] = dynamo_codec.to_dynamo(datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00"))
+
+    # ETagに使う版数を上げる
+    expression_attribute_names["#version"] = "version"
+    expression_attribute_values[":one"] = {"N": "1"}
+
+    # PDFの作成に使う属性は値のハッシュを同じ更新で保存する
+    new_render_hashes = specification_attributes.render_hashes({item: values[item] for item in update_items})
+    for item, value in new_render_hashes.items():
+        expression_attribute_values[f":render_hash_{item}"] = {"S": value}
+    if new_render_hashes:
+        expression_attribute_names["#render_hashes"] = "render_hashes"
+
+    key = {
+        "specification_id": {"S": specification_id},
+        "tenant_id": {"S": tenant_id}
+    }
+    try:
+        response = _update_item(dynamodb, table_name, key, update_expression, expression_attribute_names,
+                                expression_attribute_values, new_render_hashes)
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            raise SpecificationNotFoundError(specification_id) from e
+        raise
+
+    old_render_hashes = response.get("Attributes", {}).get("render_hashes", {}).get("M", {})
+    return any(old_render_hashes.get(item, {}).get("S") != value for item, value in new_render_hashes.items())
+
+
+def _update_item(dynamodb, table_name: str, key: dict, update_expression: str, expression_attribute_names: dict,
+                 expression_attribute_values: dict, new_render_hashes: dict) -> dict:
+    # 存在しない仕様書をupdate_itemで作成しないよう、存在する場合だけ更新する
+    condition_expression = "attribute_exists(specification_id)"
+    try:
+        return dynamodb.update_item(
+            TableName=table_name,
+            Key=key,
+            UpdateExpression=update_expression + "".join(
+                f", #render_hashes.#{item} = :render_hash_{item}" for item in new_render_hashes
+            ) + " ADD #version :one",
+            ConditionExpression=condition_expression,
+            ExpressionAttributeNames=expression_attribute_names,
+            ExpressionAttributeValues=expression_attribute_values,
+            ReturnValues="UPDATED_OLD"
+        )
+    except ClientError as e:
+        if not new_render_hashes or "document path" not in e.response["Error"].get("Message", ""):
+            raise
+        # render_hashesを持たない既存の仕様書は、マップごと作成する
+        return dynamodb.update_item(
+            TableName=table_name,
+            Key=key,
+            UpdateExpression=update_expression + ", #render_hashes = :render_hashes ADD #version :one",
+            ConditionExpression=condition_expression,
+            ExpressionAttributeNames=expression_attribute_names,
+            ExpressionAttributeValues={
+                **{k: v for k, v in expression_attribute_values.items() if not k.startswith(":render_hash_")},
+                ":render_hashes": dynamo_codec.to_dynamo(new_render_hashes)
+            },
+            ReturnValues="UPDATED_OLD"
+        )
+
+
+def send_render_message(sqs, queue_url: str, tenant_id: str, specification_id: str) -> dict:
+    """
+    仕様書のPDFの作成をキューに依頼する
+
+    Args:
+        sqs: SQSクライアント
+        queue_url: CreateSpecificationキューのURL
+        tenant_id: テナントID
+        specification_id: 仕様書ID
+
+    Returns:
+        dict: send_messageのレスポンス
+    """
+    return sqs.send_message(
+        QueueUrl=queue_url,
+        MessageBody=json.dumps({
+            "specification_id": specification_id,
+            "tenant_id": tenant_id
+        }),
+        MessageAttributes={
+            "specification_id": {
+                "DataType": "String",
+                "StringValue": specification_id
+            },
+            "tenant_id": {
+                "DataType": "String",
+                "StringValue": tenant_id
+            }
+        }
+    )
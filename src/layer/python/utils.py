@@ -1,26 +1,36 @@
-from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+import os
 import json
+import base64
 from decimal import Decimal
 import uuid
 import re
-import boto3
+import aws_clients
+import dynamo_codec
+from cache import TTLCache
+
+# AWSクライアント（テナントとユーザーの取得で共有し、初回の取得時に作成する）
+dynamodb = aws_clients.lazy("dynamodb")
+
+# テナント情報のキャッシュ（キーは(tenant_id, kind)、値はDynamoDB形式のアイテム）
+tenant_cache = TTLCache(
+    maxsize=int(os.environ.get("TENANT_CACHE_MAX_SIZE", "256")),
+    ttl=float(os.environ.get("TENANT_CACHE_TTL_SECONDS", "60"))
+)
+
+# ユーザー情報のキャッシュ（キーは(tenant_id, user_id)、値はDynamoDB形式のアイテム）
+user_cache = TTLCache(
+    maxsize=int(os.environ.get("USER_CACHE_MAX_SIZE", "1024")),
+    ttl=float(os.environ.get("USER_CACHE_TTL_SECONDS", "30"))
+)
 
 def dynamo_to_python(dynamo_object: dict) -> dict:
-    deserializer = TypeDeserializer()
-    return {k: deserializer.deserialize(v) for k, v in dynamo_object.items()}
+    return dynamo_codec.item_to_python(dynamo_object, use_decimal=True)
 
 def python_to_dynamo(python_object):
-    serializer = TypeSerializer()
-    return {k: serializer.serialize(v) for k, v in python_object.items()}
+    return dynamo_codec.item_to_dynamo(python_object)
 
 def value_to_dynamo(value) -> dict:
-    serializer = TypeSerializer()
-    if isinstance(value, dict):
-        return {"M": {k: value_to_dynamo(v) for k, v in value.items()}}
-    elif isinstance(value, list):
-        return {"L": [value_to_dynamo(v) for v in value]}
-    else:
-        return serializer.serialize(value)
+    return dynamo_codec.to_dynamo(value)
     
 def decimal_to_num(obj):
     if isinstance(obj, Decimal):
@@ -47,6 +57,13 @@ def get_response_not_allowed_method() -> dict:
         "body": json.dumps({"message": "Method not allowed"})
     }
 
+def get_response_not_found() -> dict:
+    return {
+        "statusCode": 404,
+        "headers": get_response_headers(),
+        "body": json.dumps({"message": "Not found"})
+    }
+
 def get_response_internal_server_error() -> dict:
     return {
         "statusCode": 500,
@@ -60,6 +77,25 @@ def get_response_headers() -> dict:
         "Access-Control-Allow-Origin": "*"
     }
 
+def get_request_body(event: dict, default=None):
+    """
+    リクエストボディを文字列で取得する
+
+    APIはレスポンスを圧縮して返すためJSONをバイナリメディアタイプとして扱い、
+    リクエストボディもBase64で渡される。その場合はデコードして返す。
+
+    Args:
+        event: API Gatewayのイベント
+        default: 本文がない場合の値
+
+    Returns:
+        str: リクエストボディ（ない場合はdefault）
+    """
+    body = event.get("body", default)
+    if body and event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+    return body
+
 def is_valid_uuid(val):
     try:
         uuid.UUID(str(val))
@@ -70,16 +106,65 @@ def is_valid_uuid(val):
 def is_valid_image_key(key):
     return re.match(r"^[a-zA-Z0-9_-]+\.[a-zA-Z0-9]+$", key) is not None
 
-def get_tenant_info(tenant_id, table_name):
-    dynamodb = boto3.client("dynamodb")
+def get_tenant_item(tenant_id, table_name, kind="TENANT"):
+    item = tenant_cache.get((tenant_id, kind))
+    if item is not None:
+        return item
     response = dynamodb.get_item(
         TableName=table_name,
         Key={
             "tenant_id": {"S": tenant_id},
-            "kind": {"S": "TENANT"}
+            "kind": {"S": kind}
+        }
+    )
+    if "Item" not in response:
+        return None
+    tenant_cache.set((tenant_id, kind), response["Item"])
+    return response["Item"]
+
+def get_tenant_info(tenant_id, table_name, kind="TENANT"):
+    item = get_tenant_item(tenant_id, table_name, kind)
+    if item is None:
+        return None
+    return dynamo_codec.item_to_python(item)
+
+def get_user_item(user_id, tenant_id, table_name):
+    item = user_cache.get((tenant_id, user_id))
+    if item is not None:
+        return item
+    response = dynamodb.get_item(
+        TableName=table_name,
+        Key={
+            "user_id": {"S": user_id},
+            "tenant_id": {"S": tenant_id}
         }
     )
+    # 存在しないユーザーは登録直後に作成される可能性があるためキャッシュしない
     if "Item" not in response:
         return None
-    item = dynamo_to_python(response["Item"])
-    return item
+    user_cache.set((tenant_id, user_id), response["Item"])
+    return response["Item"]
+
+def get_projection(fields, allowed_fields, required_fields=()):
+    """
+    カンマ区切りの属性名からProjectionExpressionを生成する
+
+    Args:
+        fields: クエリパラメータのfields（例: "brand_name,product_name"）、またはlist
+        allowed_fields: 取得を許可する属性名
+        required_fields: 常に取得する属性名
+
+    Returns:
+        tuple: (ProjectionExpression, ExpressionAttributeNames)
+
+    Raises:
+        ValueError: 許可されていない属性名が含まれる場合
+    """
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = list(dict.fromkeys([*required_fields, *(f.strip() for f in fields if f.strip())]))
+    invalid = [name for name in names if name not in allowed_fields and name not in required_fields]
+    if invalid:
+        raise ValueError(f"Invalid fields: {', '.join(invalid)}")
+    expression_attribute_names = {f"#p{i}": name for i, name in enumerate(names)}
+    return ", ".join(expression_attribute_names), expression_attribute_names
@@ -0,0 +1,987 @@
+"""
+In-process stand-ins for the DynamoDB, S3 and SQS client calls made by the handlers.
+
+The fakes speak the low-level client wire format (typed attribute values, ResponseMetadata,
+ClientError codes) so handlers run unmodified against them. Every operation can be slowed
+down with an injected latency to approximate network round trips:
+
+    dynamodb = FakeDynamoDB.from_template(TEMPLATE_PATH, latency={"query": 0.008})
+    s3 = FakeS3(latency=0.004)
+"""
+import re
+import json
+import pickle
+import time
+import uuid
+import hashlib
+from decimal import Decimal
+from collections import Counter
+from datetime import datetime, timezone
+
+import yaml
+from botocore.exceptions import ClientError
+
+# DynamoDBのアイテムの最大サイズとQuery/Scanの1ページの最大サイズ
+MAX_ITEM_SIZE = 400 * 1024
+MAX_PAGE_SIZE = 1024 * 1024
+
+
+def client_error(code, message="", operation="", status=400, **extra):
+    return ClientError(
+        {"Error": {"Code": code, "Message": message}, "ResponseMetadata": {"HTTPStatusCode": status}, **extra},
+        operation
+    )
+
+
+def ok(**response):
+    return {**response, "ResponseMetadata": {"HTTPStatusCode": 200}}
+
+
+class FakeClient:
+    """ Records calls and sleeps for the configured latency before each operation """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+
+    def _call(self, operation):
+        self.calls[operation] += 1
+        delay = self.latency.get(operation, self.latency.get("default", 0.0)) if isinstance(self.latency, dict) else self.latency
+        if delay:
+            time.sleep(delay)
+
+
+def clone(value):
+    """ Copies wire-format values so callers never share state with the store (much cheaper than deepcopy) """
+    return pickle.loads(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+# ---------------------------------------------------------------------------
+# DynamoDB expressions
+# ---------------------------------------------------------------------------
+
+TOKEN_PATTERN = re.compile(r"\s*(<>|<=|>=|[=<>(),.\[\]+-]|#\w+|:\w+|\d+|\w+)")
+COMPARATORS = {"=", "<>", "<", "<=", ">", ">="}
+
+
+def tokenize(expression):
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if not match:
+            raise client_error("ValidationException", f"Invalid expression: {expression!r}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class ExpressionParser:
+    """ Recursive-descent parser for condition, key condition, filter, projection and update expressions """
+
+    def __init__(self, expression, names=None):
+        self.tokens = tokenize(expression)
+        self.position = 0
+        self.names = names or {}
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, token):
+        if (self.peek() or "").upper() != token:
+            raise client_error("ValidationException", f"Expected {token!r} but got {self.peek()!r}")
+        return self.next()
+
+    def at_keyword(self, *keywords):
+        return (self.peek() or "").upper() in keywords
+
+    def done(self):
+        return self.position >= len(self.tokens)
+
+    # パス
+    def name(self):
+        token = self.next()
+        if token is None:
+            raise client_error("ValidationException", "Unexpected end of expression")
+        if token.startswith("#"):
+            if token not in self.names:
+                raise client_error("ValidationException", f"An expression attribute name used in the document path is not defined; attribute name: {token}")
+            return self.names[token]
+        return token
+
+    def path(self):
+        elements = [self.name()]
+        while self.peek() in (".", "["):
+            if self.next() == ".":
+                elements.append(self.name())
+            else:
+                elements.append(int(self.next()))
+                self.expect("]")
+        return tuple(elements)
+
+    # 条件式
+    def condition(self):
+        node = self.conjunction()
+        while self.at_keyword("OR"):
+            self.next()
+            node = ("or", node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.at_keyword("AND"):
+            self.next()
+            node = ("and", node, self.negation())
+        return node
+
+    def negation(self):
+        if self.at_keyword("NOT"):
+            self.next()
+            return ("not", self.negation())
+        return self.predicate()
+
+    def predicate(self):
+        if self.peek() == "(":
+            self.next()
+            node = self.condition()
+            self.expect(")")
+            return node
+        function = (self.peek() or "").lower()
+        if self.peek(1) == "(" and function in ("attribute_exists", "attribute_not_exists", "attribute_type", "begins_with", "contains"):
+            self.next()
+            self.next()
+            arguments = [self.operand()]
+            while self.peek() == ",":
+                self.next()
+                arguments.append(self.operand())
+            self.expect(")")
+            return (function, *arguments)
+
+        left = self.operand()
+        if self.at_keyword("BETWEEN"):
+            self.next()
+            low = self.operand()
+            self.expect("AND")
+            return ("between", left, low, self.operand())
+        if self.at_keyword("IN"):
+            self.next()
+            self.expect("(")
+            options = [self.operand()]
+            while self.peek() == ",":
+                self.next()
+                options.append(self.operand())
+            self.expect(")")
+            return ("in", left, options)
+        comparator = self.next()
+        if comparator not in COMPARATORS:
+            raise client_error("ValidationException", f"Invalid comparator {comparator!r}")
+        return ("compare", comparator, left, self.operand())
+
+    def operand(self):
+        token = self.peek()
+        if token is not None and token.startswith(":"):
+            self.next()
+            return ("value", token)
+        if (token or "").lower() == "size" and self.peek(1) == "(":
+            self.next()
+            self.next()
+            path = self.path()
+            self.expect(")")
+            return ("size", path)
+        return ("path", self.path())
+
+    # 更新式
+    def update(self):
+        actions = []
+        while not self.done():
+            section = self.next().upper()
+            if section not in ("SET", "REMOVE", "ADD", "DELETE"):
+                raise client_error("ValidationException", f"Invalid UpdateExpression: unexpected {section!r}")
+            while True:
+                path = self.path()
+                if section == "SET":
+                    self.expect("=")
+                    actions.append(("set", path, self.set_value()))
+                elif section == "REMOVE":
+                    actions.append(("remove", path))
+                else:
+                    actions.append((section.lower(), path, self.operand()))
+                if self.peek() != ",":
+                    break
+                self.next()
+        return actions
+
+    def set_value(self):
+        left = self.set_operand()
+        if self.peek() in ("+", "-"):
+            return ("arithmetic", self.next(), left, self.set_operand())
+        return left
+
+    def set_operand(self):
+        function = (self.peek() or "").lower()
+        if self.peek(1) == "(" and function in ("if_not_exists", "list_append"):
+            self.next()
+            self.next()
+            first = ("path", self.path()) if function == "if_not_exists" else self.set_operand()
+            self.expect(",")
+            second = self.set_operand()
+            self.expect(")")
+            return (function, first, second)
+        return self.operand()
+
+    def projection(self):
+        paths = [self.path()]
+        while self.peek() == ",":
+            self.next()
+            paths.append(self.path())
+        return paths
+
+
+def get_path(item, path):
+    value = item.get(path[0])
+    for element in path[1:]:
+        if value is None:
+            return None
+        if isinstance(element, int):
+            values = value.get("L")
+            value = values[element] if values is not None and element < len(values) else None
+        else:
+            value = (value.get("M") or {}).get(element) if "M" in value else None
+    return value
+
+
+def set_path(item, path, value):
+    # 親のマップやリストが存在しない場合はDynamoDBと同じエラーにする
+    parent = item
+    for element in path[:-1]:
+        if isinstance(element, int):
+            target = parent[element] if isinstance(parent, list) and element < len(parent) else None
+        else:
+            target = parent.get(element) if isinstance(parent, dict) else None
+        if target is None or not ("M" in target or "L" in target):
+            raise client_error("ValidationException", "The document path provided in the update expression is invalid for update")
+        parent = target["M"] if "M" in target else target["L"]
+    last = path[-1]
+    if isinstance(last, int):
+        if last < len(parent):
+            parent[last] = value
+        else:
+            parent.append(value)
+    else:
+        parent[last] = value
+
+
+def remove_path(item, path):
+    parent = item
+    for element in path[:-1]:
+        target = parent[element] if isinstance(element, int) and element < len(parent) else (parent.get(element) if isinstance(parent, dict) else None)
+        if target is None:
+            return
+        parent = target.get("M", target.get("L"))
+    if isinstance(path[-1], int):
+        if path[-1] < len(parent):
+            del parent[path[-1]]
+    else:
+        parent.pop(path[-1], None)
+
+
+def project(item, paths):
+    """ Builds a document holding only the given paths of item """
+    projected = {}
+    for path in paths:
+        value = get_path(item, path)
+        if value is None:
+            continue
+        if len(path) == 1:
+            projected[path[0]] = clone(value)
+            continue
+        # ネストしたパスはマップの構造を保って取り出す
+        target = projected.setdefault(path[0], {"M": {}} if not isinstance(path[1], int) else {"L": []})
+        for element in path[1:-1]:
+            key = "M" if "M" in target else "L"
+            if key == "M":
+                target = target["M"].setdefault(element, {"M": {}})
+            else:
+                target["L"].append({"M": {}})
+                target = target["L"][-1]
+        if "M" in target:
+            target["M"][path[-1]] = clone(value)
+        else:
+            target["L"].append(clone(value))
+    return projected
+
+
+def comparable(value):
+    if value is None:
+        return None
+    if "N" in value:
+        return ("N", Decimal(value["N"]))
+    if "S" in value:
+        return ("S", value["S"])
+    if "B" in value:
+        return ("B", value["B"])
+    if "SS" in value or "NS" in value:
+        key = "SS" if "SS" in value else "NS"
+        return (key, frozenset(value[key]))
+    return ("JSON", json.dumps(value, sort_keys=True))
+
+
+class Evaluator:
+    def __init__(self, values):
+        self.values = values or {}
+
+    def operand(self, node, item):
+        kind = node[0]
+        if kind == "value":
+            if node[1] not in self.values:
+                raise client_error("ValidationException", f"An expression attribute value used in expression is not defined; attribute value: {node[1]}")
+            return self.values[node[1]]
+        if kind == "path":
+            return get_path(item, node[1])
+        if kind == "size":
+            value = get_path(item, node[1])
+            if value is None:
+                return None
+            (type_name, content), = value.items()
+            return {"N": str(len(content.encode() if type_name == "S" else content))}
+        raise client_error("ValidationException", f"Unsupported operand {kind}")
+
+    def condition(self, node, item):
+        kind = node[0]
+        if kind == "or":
+            return self.condition(node[1], item) or self.condition(node[2], item)
+        if kind == "and":
+            return self.condition(node[1], item) and self.condition(node[2], item)
+        if kind == "not":
+            return not self.condition(node[1], item)
+        if kind == "attribute_exists":
+            return self.operand(node[1], item) is not None
+        if kind == "attribute_not_exists":
+            return self.operand(node[1], item) is None
+        if kind == "attribute_type":
+            value = self.operand(node[1], item)
+            return value is not None and next(iter(value)) == self.operand(node[2], item)["S"]
+        if kind == "begins_with":
+            value, prefix = self.operand(node[1], item), self.operand(node[2], item)
+            return value is not None and "S" in value and value["S"].startswith(prefix["S"])
+        if kind == "contains":
+            value, operand = self.operand(node[1], item), self.operand(node[2], item)
+            if value is None:
+                return False
+            if "S" in value:
+                return operand.get("S", "") in value["S"]
+            if "L" in value:
+                return operand in value["L"]
+            for set_type in ("SS", "NS"):
+                if set_type in value:
+                    return next(iter(operand.values())) in value[set_type]
+            return False
+        if kind == "between":
+            value = comparable(self.operand(node[1], item))
+            low, high = comparable(self.operand(node[2], item)), comparable(self.operand(node[3], item))
+            return value is not None and value[0] == low[0] and low[1] <= value[1] <= high[1]
+        if kind == "in":
+            value = comparable(self.operand(node[1], item))
+            return value is not None and value in [comparable(self.operand(option, item)) for option in node[2]]
+        if kind == "compare":
+            _, comparator, left, right = node
+            left, right = comparable(self.operand(left, item)), comparable(self.operand(right, item))
+            if comparator == "=":
+                return left is not None and left == right
+            if comparator == "<>":
+                return left != right
+            if left is None or right is None or left[0] != right[0]:
+                return False
+            return {"<": left[1] < right[1], "<=": left[1] <= right[1], ">": left[1] > right[1], ">=": left[1] >= right[1]}[comparator]
+        raise client_error("ValidationException", f"Unsupported condition {kind}")
+
+    def set_value(self, node, item):
+        kind = node[0]
+        if kind == "if_not_exists":
+            existing = self.operand(node[1], item)
+            return existing if existing is not None else self.set_value(node[2], item)
+        if kind == "list_append":
+            first, second = self.set_value(node[1], item), self.set_value(node[2], item)
+            return {"L": [*first["L"], *second["L"]]}
+        if kind == "arithmetic":
+            left, right = self.set_value(node[2], item), self.set_value(node[3], item)
+            if left is None or right is None or "N" not in left or "N" not in right:
+                raise client_error("ValidationException", "An operand in the update expression has an incorrect data type")
+            result = Decimal(left["N"]) + Decimal(right["N"]) if node[1] == "+" else Decimal(left["N"]) - Decimal(right["N"])
+            return {"N": str(result)}
+        return clone(self.operand(node, item))
+
+
+def item_size(item):
+    return len(json.dumps(item, separators=(",", ":")))
+
+
+def load_template(path):
+    """ Loads a SAM template, ignoring CloudFormation intrinsic function tags """
+
+    class TemplateLoader(yaml.SafeLoader):
+        pass
+
+    def ignore_tag(loader, suffix, node):
+        if isinstance(node, yaml.ScalarNode):
+            return loader.construct_scalar(node)
+        if isinstance(node, yaml.SequenceNode):
+            return loader.construct_sequence(node)
+        return loader.construct_mapping(node)
+
+    TemplateLoader.add_multi_constructor("!", ignore_tag)
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=TemplateLoader)
+
+
+# ---------------------------------------------------------------------------
+# DynamoDB
+# ---------------------------------------------------------------------------
+
+class FakeTable:
+    def __init__(self, name, hash_key, range_key=None, indexes=None):
+        self.name = name
+        self.key = (hash_key, range_key) if range_key else (hash_key,)
+        self.indexes = {index_name: tuple(k for k in keys if k) for index_name, keys in (indexes or {}).items()}
+        self.items = {}
+
+    def item_key(self, item):
+        try:
+            return tuple(comparable(item[name]) for name in self.key)
+        except KeyError:
+            raise client_error("ValidationException", "The provided key element does not match the schema")
+
+    def key_of(self, item, index_name=None):
+        names = list(self.key)
+        if index_name:
+            names += [name for name in self.indexes[index_name] if name not in names]
+        return {name: clone(item[name]) for name in names}
+
+
+class FakeDynamoDB(FakeClient):
+    """ In-memory DynamoDB supporting the item, query, batch and transaction calls used by the handlers """
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.tables = {}
+        self.streams = {}
+
+    @classmethod
+    def from_template(cls, template_path, table_names=None, latency=0.0):
+        """
+        Creates a fake with every AWS::DynamoDB::Table in the template.
+
+        table_names maps logical IDs to the TableName the handlers will use
+        (the logical ID itself is used otherwise).
+        """
+        fake = cls(latency=latency)
+        resources = load_template(template_path)["Resources"]
+        for logical_id, resource in resources.items():
+            if resource.get("Type") != "AWS::DynamoDB::Table":
+                continue
+            properties = resource["Properties"]
+            keys = {entry["KeyType"]: entry["AttributeName"] for entry in properties["KeySchema"]}
+            indexes = {
+                index["IndexName"]: (
+                    next(e["AttributeName"] for e in index["KeySchema"] if e["KeyType"] == "HASH"),
+                    next((e["AttributeName"] for e in index["KeySchema"] if e["KeyType"] == "RANGE"), None)
+                )
+                for index in properties.get("GlobalSecondaryIndexes", [])
+            }
+            name = (table_names or {}).get(logical_id, logical_id)
+            fake.create_table(name, keys["HASH"], keys.get("RANGE"), indexes)
+        return fake
+
+    def create_table(self, name, hash_key, range_key=None, indexes=None):
+        self.tables[name] = FakeTable(name, hash_key, range_key, indexes)
+        return self.tables[name]
+
+    def enable_stream(self, table_name):
+        """ Records NEW_AND_OLD_IMAGES stream records for every write to the table """
+        self.streams.setdefault(table_name, [])
+
+    def drain_stream(self, table_name):
+        """ Removes the recorded stream records and returns them as a DynamoDB Streams Lambda event """
+        records, self.streams[table_name] = self.streams[table_name], []
+        return {"Records": records}
+
+    def _record(self, table, old, new):
+        if table.name not in self.streams or (old is None and new is None):
+            return
+        change = {"Keys": table.key_of(new or old), "SequenceNumber": str(sum(len(r) for r in self.streams.values()) + 1)}
+        if old is not None:
+            change["OldImage"] = clone(old)
+        if new is not None:
+            change["NewImage"] = clone(new)
+        event_name = "REMOVE" if new is None else ("INSERT" if old is None else "MODIFY")
+        self.streams[table.name].append({"eventName": event_name, "dynamodb": change})
+
+    def table(self, name):
+        if name not in self.tables:
+            raise client_error("ResourceNotFoundException", f"Requested resource not found: Table: {name} not found")
+        return self.tables[name]
+
+    def seed(self, table_name, items):
+        """ Puts items given in wire format without going through put_item """
+        table = self.table(table_name)
+        for item in items:
+            table.items[table.item_key(item)] = clone(item)
+
+    def _check(self, table, key_item, condition, names, values, operation):
+        if not condition:
+            return
+        existing = table.items.get(table.item_key(key_item), {})
+        node = ExpressionParser(condition, names).condition()
+        if not Evaluator(values).condition(node, existing):
+            raise client_error("ConditionalCheckFailedException", "The conditional request failed", operation)
+
+    def _return_values(self, mode, old, new, updated_paths=()):
+        if mode in (None, "NONE"):
+            return {}
+        if mode == "ALL_OLD":
+            return {"Attributes": clone(old)} if old else {}
+        if mode == "ALL_NEW":
+            return {"Attributes": clone(new)}
+        source = old if mode == "UPDATED_OLD" else new
+        attributes = project(source or {}, updated_paths)
+        return {"Attributes": attributes} if attributes else {}
+
+    # アイテム単位の操作
+    def get_item(self, TableName, Key, ConsistentRead=False, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        self._call("get_item")
+        return self._get_item(TableName, Key, ProjectionExpression, ExpressionAttributeNames)
+
+    def _get_item(self, TableName, Key, ProjectionExpression=None, ExpressionAttributeNames=None):
+        table = self.table(TableName)
+        item = table.items.get(table.item_key(Key))
+        if item is None:
+            return ok()
+        if ProjectionExpression:
+            return ok(Item=project(item, ExpressionParser(ProjectionExpression, ExpressionAttributeNames).projection()))
+        return ok(Item=clone(item))
+
+    def put_item(self, TableName, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, ReturnValues=None, **kwargs):
+        self._call("put_item")
+        return self._put_item(TableName, Item, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues, ReturnValues)
+
+    def _put_item(self, TableName, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                  ExpressionAttributeValues=None, ReturnValues=None):
+        table = self.table(TableName)
+        if item_size(Item) > MAX_ITEM_SIZE:
+            raise client_error("ValidationException", "Item size has exceeded the maximum allowed size", "PutItem")
+        self._check(table, Item, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues, "PutItem")
+        key = table.item_key(Item)
+        old = table.items.get(key)
+        table.items[key] = clone(Item)
+        self._record(table, old, Item)
+        return ok(**self._return_values(ReturnValues, old, Item))
+
+    def update_item(self, TableName, Key, UpdateExpression, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ConditionExpression=None, ReturnValues=None, **kwargs):
+        self._call("update_item")
+        return self._update_item(TableName, Key, UpdateExpression, ExpressionAttributeNames,
+                                 ExpressionAttributeValues, ConditionExpression, ReturnValues)
+
+    def _update_item(self, TableName, Key, UpdateExpression, ExpressionAttributeNames=None,
+                     ExpressionAttributeValues=None, ConditionExpression=None, ReturnValues=None):
+        table = self.table(TableName)
+        self._check(table, Key, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues, "UpdateItem")
+        key = table.item_key(Key)
+        old = table.items.get(key)
+        new = clone(old) if old else clone(Key)
+
+        evaluator = Evaluator(ExpressionAttributeValues)
+        actions = ExpressionParser(UpdateExpression, ExpressionAttributeNames).update()
+        # 右辺は全て更新前のアイテムで評価する
+        results = [evaluator.set_value(action[2], old or {}) if action[0] == "set" else None for action in actions]
+        for action, result in zip(actions, results):
+            kind, path = action[0], action[1]
+            if path[0] in table.key:
+                raise client_error("ValidationException", "Cannot update attribute in the key", "UpdateItem")
+            if kind == "set":
+                set_path(new, path, result)
+            elif kind == "remove":
+                remove_path(new, path)
+            elif kind == "add":
+                value, current = evaluator.operand(action[2], {}), get_path(new, path)
+                if "N" in value:
+                    set_path(new, path, {"N": str(Decimal(current["N"] if current else "0") + Decimal(value["N"]))})
+                else:
+                    set_type = next(iter(value))
+                    set_path(new, path, {set_type: sorted(set((current or {}).get(set_type, [])) | set(value[set_type]))})
+            elif kind == "delete":
+                value, current = evaluator.operand(action[2], {}), get_path(new, path)
+                if current:
+                    set_type = next(iter(value))
+                    remaining = sorted(set(current.get(set_type, [])) - set(value[set_type]))
+                    if remaining:
+                        set_path(new, path, {set_type: remaining})
+                    else:
+                        remove_path(new, path)
+
+        if item_size(new) > MAX_ITEM_SIZE:
+            raise client_error("ValidationException", "Item size to update has exceeded the maximum allowed size", "UpdateItem")
+        table.items[key] = new
+        self._record(table, old, new)
+        return ok(**self._return_values(ReturnValues, old, new, [action[1] for action in actions]))
+
+    def delete_item(self, TableName, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues=None, **kwargs):
+        self._call("delete_item")
+        return self._delete_item(TableName, Key, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues, ReturnValues)
+
+    def _delete_item(self, TableName, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                     ExpressionAttributeValues=None, ReturnValues=None):
+        table = self.table(TableName)
+        self._check(table, Key, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues, "DeleteItem")
+        old = table.items.pop(table.item_key(Key), None)
+        self._record(table, old, None)
+        return ok(**self._return_values(ReturnValues, old, None))
+
+    # 複数アイテムの操作
+    def query(self, TableName, KeyConditionExpression, IndexName=None, **kwargs):
+        self._call("query")
+        return self._read(TableName, IndexName, KeyConditionExpression, **kwargs)
+
+    def scan(self, TableName, IndexName=None, **kwargs):
+        self._call("scan")
+        return self._read(TableName, IndexName, None, **kwargs)
+
+    def _read(self, table_name, index_name, key_condition, ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+              FilterExpression=None, ProjectionExpression=None, Limit=None, ExclusiveStartKey=None,
+              ScanIndexForward=True, Select=None, **kwargs):
+        table = self.table(table_name)
+        if index_name is not None and index_name not in table.indexes:
+            raise client_error("ValidationException", f"The table does not have the specified index: {index_name}")
+        key_names = table.indexes[index_name] if index_name else table.key
+        evaluator = Evaluator(ExpressionAttributeValues)
+
+        candidates = [item for item in table.items.values() if all(name in item for name in key_names)]
+        if key_condition:
+            node = ExpressionParser(key_condition, ExpressionAttributeNames).condition()
+            candidates = [item for item in candidates if evaluator.condition(node, item)]
+        # インデックスのソートキー、テーブルのキーの順に並べる
+        candidates.sort(key=lambda item: (
+            tuple(comparable(item[name]) for name in key_names[1:]),
+            table.item_key(item)
+        ), reverse=not ScanIndexForward)
+
+        if ExclusiveStartKey:
+            start = tuple(comparable(ExclusiveStartKey.get(name)) for name in (*table.key, *key_names))
+            positions = [
+                i for i, item in enumerate(candidates)
+                if tuple(comparable(item.get(name)) for name in (*table.key, *key_names)) == start
+            ]
+            candidates = candidates[positions[0] + 1:] if positions else []
+
+        filter_node = ExpressionParser(FilterExpression, ExpressionAttributeNames).condition() if FilterExpression else None
+        projection = ExpressionParser(ProjectionExpression, ExpressionAttributeNames).projection() if ProjectionExpression else None
+
+        evaluated, page_size, items = [], 0, []
+        for item in candidates:
+            if Limit is not None and len(evaluated) >= Limit:
+                break
+            if page_size >= MAX_PAGE_SIZE:
+                break
+            evaluated.append(item)
+            page_size += item_size(item)
+            if filter_node is None or evaluator.condition(filter_node, item):
+                items.append(project(item, projection) if projection else clone(item))
+
+        response = {"Count": len(items), "ScannedCount": len(evaluated)}
+        if Select != "COUNT":
+            response["Items"] = items
+        if evaluated and len(evaluated) < len(candidates):
+            response["LastEvaluatedKey"] = table.key_of(evaluated[-1], index_name)
+        return ok(**response)
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self._call("batch_get_item")
+        responses = {}
+        for table_name, request in RequestItems.items():
+            if len(request["Keys"]) > 100:
+                raise client_error("ValidationException", "Too many items requested for the BatchGetItem call")
+            responses[table_name] = []
+            for key in request["Keys"]:
+                item = self._get_item(
+                    table_name, key,
+                    ProjectionExpression=request.get("ProjectionExpression"),
+                    ExpressionAttributeNames=request.get("ExpressionAttributeNames")
+                ).get("Item")
+                if item is not None:
+                    responses[table_name].append(item)
+        return ok(Responses=responses, UnprocessedKeys={})
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self._call("batch_write_item")
+        for table_name, requests in RequestItems.items():
+            if len(requests) > 25:
+                raise client_error("ValidationException", "Too many items requested for the BatchWriteItem call")
+            table = self.table(table_name)
+            for request in requests:
+                if "PutRequest" in request:
+                    item = request["PutRequest"]["Item"]
+                    old = table.items.get(table.item_key(item))
+                    table.items[table.item_key(item)] = clone(item)
+                    self._record(table, old, item)
+                else:
+                    old = table.items.pop(table.item_key(request["DeleteRequest"]["Key"]), None)
+                    self._record(table, old, None)
+        return ok(UnprocessedItems={})
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        self._call("transact_write_items")
+        if len(TransactItems) > 100:
+            raise client_error("ValidationException", "Member must have length less than or equal to 100")
+
+        # 全ての条件を先に確認し、1件でも失敗した場合は何も書き込まない
+        reasons, failed = [], False
+        for transact_item in TransactItems:
+            (kind, request), = transact_item.items()
+            table = self.table(request["TableName"])
+            key_item = request.get("Key") or request.get("Item")
+            try:
+                self._check(table, key_item, request.get("ConditionExpression"),
+                            request.get("ExpressionAttributeNames"), request.get("ExpressionAttributeValues"), "TransactWriteItems")
+                reasons.append({"Code": "None"})
+            except ClientError:
+                reasons.append({"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"})
+                failed = True
+        if failed:
+            raise client_error(
+                "TransactionCanceledException",
+                "Transaction cancelled, please refer cancellation reasons for specific reasons",
+                "TransactWriteItems",
+                CancellationReasons=reasons
+            )
+
+        for transact_item in TransactItems:
+            (kind, request), = transact_item.items()
+            request = {k: v for k, v in request.items() if k not in ("ConditionExpression", "ReturnValuesOnConditionCheckFailure")}
+            if kind == "Put":
+                self._put_item(**request)
+            elif kind == "Update":
+                self._update_item(**request)
+            elif kind == "Delete":
+                self._delete_item(**request)
+        return ok()
+
+
+# ---------------------------------------------------------------------------
+# S3
+# ---------------------------------------------------------------------------
+
+class FakeBody:
+    def __init__(self, data):
+        self._data = data
+
+    def read(self, amount=None):
+        data, self._data = (self._data, b"") if amount is None else (self._data[:amount], self._data[amount:])
+        return data
+
+    def close(self):
+        pass
+
+
+class FakePaginator:
+    def __init__(self, operation):
+        self.operation = operation
+
+    def paginate(self, PaginationConfig=None, **kwargs):
+        page_size = (PaginationConfig or {}).get("PageSize")
+        if page_size:
+            kwargs["MaxKeys"] = page_size
+        while True:
+            page = self.operation(**kwargs)
+            yield page
+            if not page.get("IsTruncated"):
+                return
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+
+class FakeS3(FakeClient):
+    """ In-memory S3 supporting object, listing, copy, delete, multipart copy and presign calls """
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.buckets = {}
+        self.uploads = {}
+
+    def bucket(self, name):
+        return self.buckets.setdefault(name, {})
+
+    def _object(self, Bucket, Key, operation):
+        obj = self.bucket(Bucket).get(Key)
+        if obj is None:
+            if operation == "HeadObject":
+                raise client_error("404", "Not Found", operation, status=404)
+            raise client_error("NoSuchKey", "The specified key does not exist.", operation, status=404)
+        return obj
+
+    def _store(self, Bucket, Key, body, content_type="binary/octet-stream", metadata=None):
+        if isinstance(body, str):
+            body = body.encode()
+        self.bucket(Bucket)[Key] = {
+            "Body": body,
+            "ContentType": content_type,
+            "Metadata": dict(metadata or {}),
+            "ETag": '"%s"' % hashlib.md5(body).hexdigest(),
+            "LastModified": datetime.now(timezone.utc)
+        }
+        return self.bucket(Bucket)[Key]
+
+    def put_object(self, Bucket, Key, Body=b"", ContentType="binary/octet-stream", Metadata=None, **kwargs):
+        self._call("put_object")
+        obj = self._store(Bucket, Key, Body.read() if hasattr(Body, "read") else Body, ContentType, Metadata)
+        return ok(ETag=obj["ETag"])
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self._call("get_object")
+        obj = self._object(Bucket, Key, "GetObject")
+        return ok(Body=FakeBody(obj["Body"]), ContentLength=len(obj["Body"]), ContentType=obj["ContentType"],
+                  ETag=obj["ETag"], LastModified=obj["LastModified"], Metadata=dict(obj["Metadata"]))
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._call("head_object")
+        obj = self._object(Bucket, Key, "HeadObject")
+        return ok(ContentLength=len(obj["Body"]), ContentType=obj["ContentType"], ETag=obj["ETag"],
+                  LastModified=obj["LastModified"], Metadata=dict(obj["Metadata"]))
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self._call("delete_object")
+        self.bucket(Bucket).pop(Key, None)
+        return ok()
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        self._call("delete_objects")
+        if len(Delete["Objects"]) > 1000:
+            raise client_error("MalformedXML", "The XML you provided was not well-formed", "DeleteObjects")
+        for entry in Delete["Objects"]:
+            self.bucket(Bucket).pop(entry["Key"], None)
+        if Delete.get("Quiet"):
+            return ok()
+        return ok(Deleted=[{"Key": entry["Key"]} for entry in Delete["Objects"]])
+
+    def copy_object(self, Bucket, Key, CopySource, **kwargs):
+        self._call("copy_object")
+        if isinstance(CopySource, str):
+            source_bucket, _, source_key = CopySource.lstrip("/").partition("/")
+        else:
+            source_bucket, source_key = CopySource["Bucket"], CopySource["Key"]
+        source = self._object(source_bucket, source_key, "CopyObject")
+        obj = self._store(Bucket, Key, source["Body"], source["ContentType"], source["Metadata"])
+        return ok(CopyObjectResult={"ETag": obj["ETag"], "LastModified": obj["LastModified"]})
+
+    def list_objects_v2(self, Bucket, Prefix="", StartAfter=None, ContinuationToken=None, MaxKeys=1000, **kwargs):
+        self._call("list_objects_v2")
+        keys = sorted(key for key in self.bucket(Bucket) if key.startswith(Prefix))
+        after = ContinuationToken or StartAfter
+        if after:
+            keys = [key for key in keys if key > after]
+        page = keys[:MaxKeys]
+        response = {"KeyCount": len(page), "IsTruncated": len(keys) > len(page), "Prefix": Prefix}
+        if page:
+            response["Contents"] = [
+                {"Key": key, "Size": len(self.bucket(Bucket)[key]["Body"]), "ETag": self.bucket(Bucket)[key]["ETag"],
+                 "LastModified": self.bucket(Bucket)[key]["LastModified"]}
+                for key in page
+            ]
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return ok(**response)
+
+    def get_paginator(self, operation_name):
+        if operation_name != "list_objects_v2":
+            raise NotImplementedError(operation_name)
+        return FakePaginator(self.list_objects_v2)
+
+    def generate_presigned_url(self, ClientMethod, Params=None, ExpiresIn=3600, HttpMethod=None):
+        # 署名はローカルで計算されるため呼び出し回数だけ記録し、遅延は入れない
+        self.calls["generate_presigned_url"] += 1
+        params = Params or {}
+        return f"https://{params.get('Bucket')}.s3.amazonaws.com/{params.get('Key')}?X-Amz-Expires={ExpiresIn}&X-Amz-Signature=fake"
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self._call("create_multipart_upload")
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {"Bucket": Bucket, "Key": Key, "Parts": {}}
+        return ok(Bucket=Bucket, Key=Key, UploadId=upload_id)
+
+    def upload_part_copy(self, Bucket, Key, UploadId, PartNumber, CopySource, CopySourceRange=None, **kwargs):
+        self._call("upload_part_copy")
+        source = self._object(CopySource["Bucket"], CopySource["Key"], "UploadPartCopy")["Body"]
+        if CopySourceRange:
+            start, end = (int(n) for n in CopySourceRange.removeprefix("bytes=").split("-"))
+            source = source[start:end + 1]
+        etag = '"%s"' % hashlib.md5(source).hexdigest()
+        self.uploads[UploadId]["Parts"][PartNumber] = (etag, source)
+        return ok(CopyPartResult={"ETag": etag})
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self._call("complete_multipart_upload")
+        upload = self.uploads.pop(UploadId)
+        body = b"".join(upload["Parts"][part["PartNumber"]][1] for part in MultipartUpload["Parts"])
+        obj = self._store(Bucket, Key, body)
+        return ok(Bucket=Bucket, Key=Key, ETag=obj["ETag"])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self._call("abort_multipart_upload")
+        self.uploads.pop(UploadId, None)
+        return ok()
+
+
+# ---------------------------------------------------------------------------
+# SQS
+# ---------------------------------------------------------------------------
+
+class FakeSQS(FakeClient):
+    """ In-memory SQS that keeps sent messages per queue URL """
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.queues = {}
+
+    def send_message(self, QueueUrl, MessageBody, DelaySeconds=0, MessageAttributes=None, **kwargs):
+        self._call("send_message")
+        return ok(**self._enqueue(QueueUrl, MessageBody, DelaySeconds, MessageAttributes))
+
+    def send_message_batch(self, QueueUrl, Entries, **kwargs):
+        self._call("send_message_batch")
+        if len(Entries) > 10:
+            raise client_error("AWS.SimpleQueueService.TooManyEntriesInBatchRequest", "Too many entries", "SendMessageBatch")
+        successful = []
+        for entry in Entries:
+            message = self._enqueue(QueueUrl, entry["MessageBody"], entry.get("DelaySeconds", 0), entry.get("MessageAttributes"))
+            successful.append({"Id": entry["Id"], **message})
+        return ok(Successful=successful, Failed=[])
+
+    def _enqueue(self, queue_url, body, delay_seconds, attributes):
+        message = {
+            "MessageId": str(uuid.uuid4()),
+            "MD5OfMessageBody": hashlib.md5(body.encode()).hexdigest(),
+            "Body": body,
+            "DelaySeconds": delay_seconds,
+            "MessageAttributes": attributes or {}
+        }
+        self.queues.setdefault(queue_url, []).append(message)
+        return {"MessageId": message["MessageId"], "MD5OfMessageBody": message["MD5OfMessageBody"]}
+
+    def messages(self, queue_url):
+        """ Returns the decoded bodies sent to a queue """
+        return [json.loads(message["Body"]) for message in self.queues.get(queue_url, [])]
+
+    def drain(self, queue_url):
+        """ Removes the queued messages and returns them as an SQS Lambda event """
+        messages = self.queues.pop(queue_url, [])
+        return {"Records": [
+            {"messageId": message["MessageId"], "body": message["Body"], "messageAttributes": message["MessageAttributes"],
+             "attributes": {"ApproximateReceiveCount": "1"}}
+            for message in messages
+        ]}
@@ -0,0 +1,91 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+import pytest
+
+# Results of every benchmark in the session, reported at the end of the run
+RESULTS = []
+
+
+@pytest.fixture()
+def aws_latency(request):
+    return request.config.getoption("--bench-latency-ms") / 1000
+
+
+@pytest.fixture()
+def bench(request, aws):
+    """
+    Time a handler invocation over repeated rounds
+
+    bench(invoke, setup=None) calls setup() before every round without timing it, so handlers
+    that consume their input (deletes, status changes) start each round from the same state.
+    Returns the value of the last invocation so the test can check the response.
+    """
+    rounds = request.config.getoption("--bench-rounds")
+    warmup = request.config.getoption("--bench-warmup")
+
+    def run(invoke, setup=None):
+        for _ in range(warmup):
+            if setup:
+                setup()
+            invoke()
+
+        calls_before = sum(sum(client.calls.values()) for client in (aws.dynamodb, aws.s3, aws.sqs))
+        timings = []
+        for _ in range(rounds):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            result = invoke()
+            timings.append(time.perf_counter() - start)
+        calls = sum(sum(client.calls.values()) for client in (aws.dynamodb, aws.s3, aws.sqs)) - calls_before
+
+        # Allocations are traced on a separate call so tracing does not skew the timings
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            invoke()
+            retained, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        quantiles = statistics.quantiles(timings, n=100, method="inclusive") if len(timings) > 1 else timings * 99
+        RESULTS.append({
+            "name": request.node.name,
+            "rounds": rounds,
+            "p50_ms": statistics.median(timings) * 1000,
+            "p99_ms": quantiles[98] * 1000,
+            "mean_ms": statistics.fmean(timings) * 1000,
+            "aws_calls": calls / rounds,
+            "peak_kib": peak / 1024,
+            "retained_kib": retained / 1024
+        })
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not RESULTS:
+        return
+    terminalreporter.section("handler benchmarks")
+    latency = config.getoption("--bench-latency-ms")
+    terminalreporter.write_line(f"injected latency per AWS call: {latency:g} ms")
+    terminalreporter.write_line(
+        f"{'name':<48} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'aws calls':>10} {'peak KiB':>10} {'kept KiB':>10}"
+    )
+    for result in sorted(RESULTS, key=lambda r: r["name"]):
+        terminalreporter.write_line(
+            f"{result['name']:<48} {result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['mean_ms']:>9.3f} "
+            f"{result['aws_calls']:>10.1f} {result['peak_kib']:>10.1f} {result['retained_kib']:>10.1f}"
+        )
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("--bench-json")
+    if path and RESULTS:
+        with open(path, "w") as f:
+            json.dump({"latency_ms": session.config.getoption("--bench-latency-ms"), "results": RESULTS}, f, indent=2)
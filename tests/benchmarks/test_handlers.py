@@ -0,0 +1,199 @@
+"""
+Latency and allocation benchmarks of the API handlers against the in-memory AWS fakes.
+
+Every benchmark drives lambda_handler with an API Gateway event for a tenant holding
+SPECIFICATION_COUNT fully populated specifications. Run with, for example:
+
+    python -m pytest tests/benchmarks -q --bench-rounds 200 --bench-latency-ms 5
+"""
+import base64
+import gzip
+import json
+
+import pytest
+
+import dynamo_codec
+import specification_attributes
+from tests.events import TENANT_ID, api_event, large_specification, seed_account, specification_update_body
+
+SPECIFICATION_COUNT = 200
+SPECIFICATION = "/v1/specifications/{specification_id}"
+
+
+@pytest.fixture()
+def specifications(aws):
+    """ Seeds the tenant with large specifications, their summaries, groups and stored files """
+    seed_account(aws)
+    items = [
+        dynamo_codec.item_to_dynamo(large_specification(f"spec-{i:04d}", specification_group_id=f"group-{i % 10}"))
+        for i in range(SPECIFICATION_COUNT)
+    ]
+    aws.dynamodb.seed("specifications", items)
+    aws.dynamodb.seed("specification-summaries", [specification_attributes.to_summary(item) for item in items])
+    aws.dynamodb.seed("specification-groups", [
+        dynamo_codec.item_to_dynamo({"specification_group_id": f"group-{i}", "tenant_id": TENANT_ID, "specification_group_name": f"SS{i}"})
+        for i in range(10)
+    ])
+    for name in ("specification.pdf", "fit.png", "fabric.png", "sample-front.png", "sample-back.png"):
+        aws.s3.put_object(Bucket="specifications-bucket", Key=f"{TENANT_ID}/spec-0000/{name}", Body=b"x" * 1024)
+    return [dynamo_codec.item_to_python(item) for item in items]
+
+
+def ok(response, status=200):
+    assert response["statusCode"] == status, response.get("body")
+    return response
+
+
+def test_get_specification(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationsSpecificationId", "get")
+    event = api_event("GET", SPECIFICATION, {"specification_id": "spec-0000"})
+
+    ok(bench(lambda: handler.lambda_handler(event, None)))
+
+
+def test_get_specification_fields(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationsSpecificationId", "get")
+    event = api_event("GET", SPECIFICATION, {"specification_id": "spec-0000"}, query={"fields": "product_name,status,updated_at"})
+
+    ok(bench(lambda: handler.lambda_handler(event, None)))
+
+
+def test_get_specification_not_modified(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationsSpecificationId", "get")
+    event = api_event("GET", SPECIFICATION, {"specification_id": "spec-0000"})
+    event["headers"]["If-None-Match"] = handler.lambda_handler(event, None)["headers"]["ETag"]
+
+    ok(bench(lambda: handler.lambda_handler(event, None)), 304)
+
+
+def test_create_specification(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecifications", "post")
+    body = {"specification_group_id": "group-1", "brand_name": "FLOOR", "product_name": "Tee",
+            "product_code": "FS-001", "progress": 0, "type": "TOPS"}
+    event = api_event("POST", "/v1/specifications", body=body)
+
+    ok(bench(lambda: handler.lambda_handler(event, None)), 201)
+
+
+def test_put_specification_unchanged(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationsSpecificationId", "put")
+    event = api_event("PUT", SPECIFICATION, {"specification_id": "spec-0000"}, specification_update_body(specifications[0]))
+
+    ok(bench(lambda: handler.lambda_handler(event, None)))
+
+
+def test_put_specification_changed(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationsSpecificationId", "put")
+    events = [
+        api_event("PUT", SPECIFICATION, {"specification_id": "spec-0000"},
+                  specification_update_body(specifications[0], product_name=f"Tee {i % 2}"))
+        for i in range(2)
+    ]
+    turn = iter(range(10 ** 9))
+
+    ok(bench(lambda: handler.lambda_handler(events[next(turn) % 2], None)))
+
+
+def test_list_specifications(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecifications", "get")
+    event = api_event("GET", "/v1/specifications", query={"limit": "100"})
+
+    response = ok(bench(lambda: handler.lambda_handler(event, None)))
+    assert len(json.loads(response["body"])["specifications"]) == 100
+
+
+def test_list_specifications_gzip(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecifications", "get")
+    event = api_event("GET", "/v1/specifications", query={"limit": "100"})
+    event["headers"]["Accept-Encoding"] = "gzip"
+
+    response = ok(bench(lambda: handler.lambda_handler(event, None)))
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(base64.b64decode(response["body"])))["specifications"]) == 100
+
+
+def test_list_specifications_by_group(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecifications", "get")
+    event = api_event("GET", "/v1/specifications", query={"specification_group_id": "group-1", "status": "DRAFT"})
+
+    response = ok(bench(lambda: handler.lambda_handler(event, None)))
+    assert len(json.loads(response["body"])["specifications"]) == SPECIFICATION_COUNT // 10
+
+
+def test_batch_get_specifications(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationsSpecificationId", "batch_get")
+    ids = [specification["specification_id"] for specification in specifications[:handler.MAX_BATCH_GET_IDS]]
+    event = api_event("POST", "/v1/specifications:batchGet", body={"specification_ids": ids})
+
+    response = ok(bench(lambda: handler.lambda_handler(event, None)))
+    assert len(json.loads(response["body"])["specifications"]) == handler.MAX_BATCH_GET_IDS
+
+
+def test_batch_update_status(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationsSpecificationId", "batch_update_status")
+    ids = [specification["specification_id"] for specification in specifications[:100]]
+    event = api_event("POST", "/v1/specifications:batchUpdateStatus", body={"specification_ids": ids, "status": "APPROVED"})
+
+    ok(bench(lambda: handler.lambda_handler(event, None)))
+
+
+def test_batch_delete(aws, bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationsSpecificationId", "batch_delete")
+    items = [dynamo_codec.item_to_dynamo(specification) for specification in specifications[:100]]
+    event = api_event("POST", "/v1/specifications:batchDelete",
+                      body={"specification_ids": [specification["specification_id"] for specification in specifications[:100]]})
+
+    ok(bench(lambda: handler.lambda_handler(event, None), setup=lambda: aws.dynamodb.seed("specifications", items)))
+
+
+def test_duplicate_specification(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationsSpecificationIdDuplicate", "post")
+    event = api_event("POST", "/v1/specifications/{specification_id}/duplicate", {"specification_id": "spec-0000"})
+
+    ok(bench(lambda: handler.lambda_handler(event, None)), 201)
+
+
+@pytest.mark.parametrize("function_dir, resource", [
+    ("api/ApiSpecificationsSpecificationIdDownload", "/v1/specifications/{specification_id}/download"),
+    ("api/ApiSpecificationsSpecificationIdPreview", "/v1/specifications/{specification_id}/preview"),
+], ids=["download", "preview"])
+def test_presign_specification_file(bench, load_handler, specifications, function_dir, resource):
+    handler = load_handler(function_dir, "get")
+    event = api_event("GET", resource, {"specification_id": "spec-0000"})
+
+    ok(bench(lambda: handler.lambda_handler(event, None)))
+
+
+def test_get_tenant(bench, load_handler, specifications):
+    handler = load_handler("api/ApiTenant", "get")
+    event = api_event("GET", "/v1/tenant")
+
+    ok(bench(lambda: handler.lambda_handler(event, None)))
+
+
+def test_list_specification_groups(bench, load_handler, specifications):
+    handler = load_handler("api/ApiSpecificationGroups", "get")
+    event = api_event("GET", "/v1/specificationgroups")
+
+    ok(bench(lambda: handler.lambda_handler(event, None)))
+
+
+def test_summary_stream_batch(aws, bench, load_handler, specifications):
+    handler = load_handler("common/SpecificationSummary")
+    aws.dynamodb.enable_stream("specifications")
+    for specification in specifications[:100]:
+        changed = dynamo_codec.item_to_dynamo({**specification, "product_name": "Renamed"})
+        aws.dynamodb.put_item(TableName="specifications", Item=changed)
+    event = aws.dynamodb.drain_stream("specifications")
+
+    assert bench(lambda: handler.lambda_handler(event, None)) == {"batchItemFailures": []}
+
+
+def test_presign_images_batch(bench, load_handler, specifications):
+    handler = load_handler("api/ApiImage", "post")
+    specification_id = "9b2f6a52-3c1d-4a53-9d55-0d6f1f3f1e10"
+    items = [{"key": f"oem-{i}.png", "method": "get"} for i in range(40)]
+    event = api_event("POST", "/v1/image", body={"type": "specification", "specification_id": specification_id, "items": items})
+
+    response = ok(bench(lambda: handler.lambda_handler(event, None)))
+    assert len(json.loads(response["body"])["items"]) == 40
@@ -0,0 +1,133 @@
+import os
+import sys
+import importlib.util
+
+import boto3
+import pytest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LAYER_DIR = os.path.join(ROOT_DIR, "src", "layer", "python")
+TEMPLATE_PATH = os.path.join(ROOT_DIR, "template.yaml")
+
+if LAYER_DIR not in sys.path:
+    sys.path.insert(0, LAYER_DIR)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-1")
+
+from tests.aws_fakes import FakeDynamoDB, FakeS3, FakeSQS  # noqa: E402
+
+# Environment shared by every handler when running against the fakes
+ENVIRONMENT = {
+    "TENANTS_TABLE_NAME": "tenants",
+    "TENANT_TABLE_NAME": "tenants",
+    "USERS_TABLE_NAME": "users",
+    "SPECIFICATIONS_TABLE_NAME": "specifications",
+    "SPECIFICATION_SUMMARIES_TABLE_NAME": "specification-summaries",
+    "SPECIFICATION_GROUPS_TABLE_NAME": "specification-groups",
+    "SPECIFICATION_DRAFTS_TABLE_NAME": "specification-drafts",
+    "DUPLICATE_JOBS_TABLE_NAME": "duplicate-jobs",
+    "S3_BUCKET_SPECIFICATIONS": "specifications-bucket",
+    "S3_BUCKET_STATIC_ASSETS": "static-assets-bucket",
+    "CREATE_SPECIFICATION_SQS_QUEUE_URL": "https://sqs.local/create-specification",
+    "DUPLICATE_SPECIFICATION_SQS_QUEUE_URL": "https://sqs.local/duplicate-specification",
+    "PURGE_SPECIFICATION_SQS_QUEUE_URL": "https://sqs.local/purge-specification",
+    "COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL": "https://sqs.local/commit-specification-draft",
+    "CURSOR_SIGNING_KEY": "test-cursor-signing-key",
+}
+
+# Template logical IDs of the tables, mapped to the names in ENVIRONMENT
+TABLE_NAMES = {
+    "TenantsTable": ENVIRONMENT["TENANTS_TABLE_NAME"],
+    "UsersTable": ENVIRONMENT["USERS_TABLE_NAME"],
+    "SpecificationsTable": ENVIRONMENT["SPECIFICATIONS_TABLE_NAME"],
+    "SpecificationSummariesTable": ENVIRONMENT["SPECIFICATION_SUMMARIES_TABLE_NAME"],
+    "SpecificationGroupsTable": ENVIRONMENT["SPECIFICATION_GROUPS_TABLE_NAME"],
+    "SpecificationDraftsTable": ENVIRONMENT["SPECIFICATION_DRAFTS_TABLE_NAME"],
+    "DuplicateJobsTable": ENVIRONMENT["DUPLICATE_JOBS_TABLE_NAME"],
+}
+
+
+class FakeAWS:
+    """ One set of fakes shared by every client a handler creates """
+
+    def __init__(self, latency=0.0):
+        self.dynamodb = FakeDynamoDB.from_template(TEMPLATE_PATH, TABLE_NAMES, latency=latency)
+        self.s3 = FakeS3(latency=latency)
+        self.sqs = FakeSQS(latency=latency)
+
+    def client(self, service_name, *args, **kwargs):
+        return getattr(self, service_name)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "handler benchmarks (tests/benchmarks)")
+    group.addoption("--benchmarks", action="store_true", default=False, help="run the benchmarks (skipped otherwise)")
+    group.addoption("--bench-rounds", type=int, default=20, help="timed invocations per benchmark")
+    group.addoption("--bench-warmup", type=int, default=3, help="untimed invocations before measuring")
+    group.addoption("--bench-latency-ms", type=float, default=0.0, help="latency injected into every fake AWS call")
+    group.addoption("--bench-json", default=None, help="write the benchmark results to this file")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: handler benchmark, run only with --benchmarks")
+
+
+def pytest_collection_modifyitems(config, items):
+    # ベンチマークは時間がかかるため、指定した場合だけ実行する
+    benchmark_dir = os.path.join(ROOT_DIR, "tests", "benchmarks")
+    skip = pytest.mark.skip(reason="benchmarks run only with --benchmarks")
+    for item in items:
+        if str(item.path).startswith(benchmark_dir + os.sep):
+            item.add_marker(pytest.mark.benchmark)
+            if not config.getoption("--benchmarks"):
+                item.add_marker(skip)
+
+
+@pytest.fixture()
+def load_function_module(monkeypatch):
+    """ Import a module of a Lambda function directory under a unique name """
+
+    def load(function_dir, module_name="app", **environment):
+        for key, value in environment.items():
+            monkeypatch.setenv(key, value)
+        path = os.path.join(ROOT_DIR, "src", function_dir, f"{module_name}.py")
+        spec = importlib.util.spec_from_file_location(f"{function_dir.replace('/', '_')}_{module_name}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    return load
+
+
+@pytest.fixture()
+def aws_latency():
+    """ Seconds each fake AWS call sleeps (a float, or a dict of operation -> seconds with a "default") """
+    return 0.0
+
+
+@pytest.fixture()
+def aws(monkeypatch, aws_latency):
+    """ Route every boto3 client to in-memory fakes and set the handler environment """
+    fakes = FakeAWS(latency=aws_latency)
+    monkeypatch.setattr(boto3, "client", fakes.client)
+    for key, value in ENVIRONMENT.items():
+        monkeypatch.setenv(key, value)
+
+    import aws_clients
+    import utils
+    aws_clients.clear()
+    utils.tenant_cache.clear()
+    utils.user_cache.clear()
+    yield fakes
+    # 共有のクライアントに偽物を残さない
+    aws_clients.clear()
+
+
+@pytest.fixture()
+def load_handler(aws, load_function_module):
+    """ Import a handler module whose module-level clients are bound to the fakes """
+
+    def load(function_dir, module_name="app"):
+        return load_function_module(function_dir, module_name)
+
+    return load
@@ -0,0 +1,137 @@
+"""
+Builders for API Gateway events and synthetic records used by the handler tests and benchmarks.
+"""
+import json
+import uuid
+
+TENANT_ID = "tenant-1"
+USER_ID = "user-1"
+
+SIZES = ("xxs", "xs", "s", "m", "l", "xl", "xxl")
+
+
+def api_event(method, resource, path_parameters=None, body=None, query=None, tenant_id=TENANT_ID, user_id=USER_ID):
+    """ REST API (v1) proxy event as delivered by API Gateway with the Cognito authorizer """
+    path = resource
+    for name, value in (path_parameters or {}).items():
+        path = path.replace("{" + name + "}", value)
+    return {
+        "resource": resource,
+        "path": path,
+        "httpMethod": method,
+        "headers": {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Host": "main.api.floor-studios.com",
+            "User-Agent": "Mozilla/5.0",
+            "X-Forwarded-For": "203.0.113.10"
+        },
+        "queryStringParameters": query,
+        "pathParameters": path_parameters,
+        "requestContext": {
+            "resourcePath": resource,
+            "httpMethod": method,
+            "path": f"/main{path}",
+            "stage": "main",
+            "requestId": str(uuid.uuid4()),
+            "authorizer": {
+                "claims": {
+                    "sub": user_id,
+                    "email": "user@example.com",
+                    "custom:tenant_id": tenant_id
+                }
+            }
+        },
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False
+    }
+
+
+def measurements(base):
+    return {size: str(base + i * 2) for i, size in enumerate(SIZES)}
+
+
+def file_reference(name):
+    return {"key": f"{name}.png", "name": f"{name}.png", "content_type": "image/png"}
+
+
+def large_specification(specification_id=None, tenant_id=TENANT_ID, specification_group_id="group-1",
+                        oem_points=40, materials=20, status="DRAFT"):
+    """ A fully populated specification in the shape the editor saves (tens of KB as a DynamoDB item) """
+    specification_id = specification_id or str(uuid.uuid4())
+    return {
+        "specification_id": specification_id,
+        "tenant_id": tenant_id,
+        "tenant_id#status": f"{tenant_id}#{status}",
+        "specification_group_id": specification_group_id,
+        "brand_name": "FLOOR",
+        "product_name": "Heavyweight tee",
+        "product_code": "FS-24-001",
+        "status": status,
+        "progress": 80,
+        "type": "TOPS",
+        "fit": {
+            "fit_type": "REGULAR",
+            "total_length": measurements(66),
+            "shoulder_to_shoulder": measurements(46),
+            "chest_width": measurements(52),
+            "sleeve_length": measurements(20),
+            "file": file_reference("fit")
+        },
+        "custom_fit": {"note": "Drop shoulder, boxy body. " * 10},
+        "fabric": {
+            "materials": [
+                {"name": f"Cotton {i}", "ratio": "100", "color": f"#{i:06x}", "supplier": "Mill Co.", "note": "Enzyme wash " * 5}
+                for i in range(materials)
+            ],
+            "sub_materials": [{"name": f"Rib {i}", "ratio": "95/5"} for i in range(materials // 2)],
+            "description": {"description": "Combed cotton jersey. " * 20, "file": file_reference("fabric")}
+        },
+        "tag": {"description": {"description": "Woven neck label. " * 10, "file": file_reference("tag")}},
+        "care_label": {"description": {"description": "Machine wash cold. " * 10, "file": file_reference("care")}},
+        "patch": {"description": {"description": "Silicone patch. " * 10, "file": file_reference("patch")}},
+        "oem_points": [
+            {
+                "title": f"Point {i}",
+                "description": "Double needle stitching at hem, 2.5cm width. " * 4,
+                "file": file_reference(f"oem-{i}")
+            }
+            for i in range(oem_points)
+        ],
+        "sample": {
+            "delivery_date": "2026-11-01",
+            "quantity": {size: "2" for size in SIZES},
+            "sample_front": file_reference("sample-front"),
+            "sample_back": file_reference("sample-back")
+        },
+        "main_production": {"delivery_date": "2027-01-15", "quantity": {size: str(100 + i * 10) for i, size in enumerate(SIZES)}},
+        "information": {"factory": "Factory A", "notes": "Ship by sea. " * 20},
+        "specification_file": {"object": "specification.pdf"},
+        "updated_by": {"user_id": USER_ID, "user_name": "Editor"},
+        "updated_at": "2026-10-01T09:00:00+00:00"
+    }
+
+
+def specification_update_body(specification, **changes):
+    """ PUT body the editor sends for a specification, with optional field changes """
+    fields = (
+        "brand_name", "product_name", "product_code", "specification_group_id", "type", "progress", "fit",
+        "custom_fit", "fabric", "tag", "care_label", "patch", "oem_points", "sample", "main_production", "information"
+    )
+    return {**{field: specification[field] for field in fields if field in specification}, **changes}
+
+
+def seed_account(aws, tenant_id=TENANT_ID, user_id=USER_ID):
+    """ Puts the tenant and the signed-in user that every authenticated request needs """
+    aws.dynamodb.seed("tenants", [{
+        "tenant_id": {"S": tenant_id},
+        "kind": {"S": "TENANT"},
+        "tenant_name": {"S": "Floor Studios"}
+    }])
+    aws.dynamodb.seed("users", [{
+        "user_id": {"S": user_id},
+        "tenant_id": {"S": tenant_id},
+        "user_name": {"S": "Editor"},
+        "email": {"S": "user@example.com"},
+        "role": {"S": "ADMIN"}
+    }])
@@ -0,0 +1,185 @@
+import json
+
+import pytest
+
+import specification_drafts
+from tests.conftest import ENVIRONMENT
+from tests.events import TENANT_ID, api_event, seed_account
+
+SPECIFICATION = "/v1/specifications/{specification_id}"
+COMMIT_QUEUE = ENVIRONMENT["COMMIT_SPECIFICATION_DRAFT_SQS_QUEUE_URL"]
+RENDER_QUEUE = ENVIRONMENT["CREATE_SPECIFICATION_SQS_QUEUE_URL"]
+
+
+class LocalScheduler:
+    """ Holds delayed commit messages and delivers them to the commit worker once they are due """
+
+    def __init__(self, sqs, clock):
+        self.clock = clock
+        self.delayed = []
+        self.send_message = sqs.send_message
+        sqs.send_message = self.schedule
+
+    def schedule(self, QueueUrl, MessageBody, DelaySeconds=0, **kwargs):
+        if QueueUrl != COMMIT_QUEUE:
+            return self.send_message(QueueUrl=QueueUrl, MessageBody=MessageBody, DelaySeconds=DelaySeconds, **kwargs)
+        self.delayed.append((self.clock[0] + DelaySeconds, MessageBody))
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    def run_until(self, worker, until):
+        while True:
+            due = sorted(message for message in self.delayed if message[0] <= until)
+            if not due:
+                break
+            self.delayed.remove(due[0])
+            self.clock[0] = max(self.clock[0], due[0][0])
+            result = worker.lambda_handler({"Records": [{"messageId": "m", "body": due[0][1]}]}, None)
+            assert result == {"batchItemFailures": []}
+        self.clock[0] = until
+
+
+@pytest.fixture()
+def autosave(aws, load_handler, monkeypatch):
+    """ Specification handlers and the commit worker on a fixed clock, with one specification created """
+    seed_account(aws)
+    handlers = {
+        "create": load_handler("api/ApiSpecifications", "post"),
+        "put": load_handler("api/ApiSpecificationsSpecificationId", "put"),
+        "delete": load_handler("api/ApiSpecificationsSpecificationId", "delete"),
+        "batch_delete": load_handler("api/ApiSpecificationsSpecificationId", "batch_delete"),
+        "worker": load_handler("common/CommitSpecificationDraft"),
+    }
+
+    clock = [1000.0]
+    monkeypatch.setattr("specification_drafts.time.time", lambda: clock[0])
+    monkeypatch.setattr(handlers["worker"].time, "time", lambda: clock[0])
+    scheduler = LocalScheduler(aws.sqs, clock)
+
+    body = {"specification_group_id": "group-1", "brand_name": "FLOOR", "product_name": "Tee",
+            "product_code": "FS-001", "progress": 0, "type": "TOPS"}
+    response = handlers["create"].lambda_handler(api_event("POST", "/v1/specifications", body=body), None)
+    handlers["specification_id"] = json.loads(response["body"])["specification_id"]
+    aws.sqs.drain(RENDER_QUEUE)
+    return handlers, scheduler, clock
+
+
+def request(specification_id, body, mode=None):
+    return api_event("PUT", SPECIFICATION, {"specification_id": specification_id}, body,
+                     query={"mode": mode} if mode else None)
+
+
+def specification(aws, specification_id):
+    key = {"specification_id": {"S": specification_id}, "tenant_id": {"S": TENANT_ID}}
+    return aws.dynamodb.get_item(TableName=ENVIRONMENT["SPECIFICATIONS_TABLE_NAME"], Key=key).get("Item")
+
+
+def drafts(aws):
+    return aws.dynamodb.table(ENVIRONMENT["SPECIFICATION_DRAFTS_TABLE_NAME"]).items
+
+
+def test_autosaves_are_coalesced_into_one_commit(aws, autosave):
+    handlers, scheduler, clock = autosave
+    specification_id = handlers["specification_id"]
+
+    for i in range(20):
+        response = handlers["put"].lambda_handler(request(specification_id, {"product_name": f"tee {i}"}, mode="autosave"), None)
+        assert response["statusCode"] == 202
+        clock[0] += 5
+
+    # 編集中は仕様書を更新せず、反映の予約も1件だけ
+    assert specification(aws, specification_id)["version"] == {"N": "1"}
+    assert len(scheduler.delayed) == 1
+    assert aws.sqs.messages(RENDER_QUEUE) == []
+
+    scheduler.run_until(handlers["worker"], clock[0] + specification_drafts.AUTOSAVE_IDLE_SECONDS)
+
+    item = specification(aws, specification_id)
+    assert item["version"] == {"N": "2"}
+    assert item["product_name"] == {"S": "tee 19"}
+    assert aws.sqs.messages(RENDER_QUEUE) == [{"specification_id": specification_id, "tenant_id": TENANT_ID}]
+    assert drafts(aws) == {}
+
+
+def test_explicit_save_flushes_pending_draft(aws, autosave):
+    handlers, scheduler, clock = autosave
+    specification_id = handlers["specification_id"]
+
+    body = {"product_name": "tee", "fabric": {"materials": ["cotton"]}}
+    handlers["put"].lambda_handler(request(specification_id, body, mode="autosave"), None)
+    response = handlers["put"].lambda_handler(request(specification_id, {"product_name": "tee 2"}), None)
+
+    assert response["statusCode"] == 200
+    item = specification(aws, specification_id)
+    assert item["product_name"] == {"S": "tee 2"}
+    assert item["fabric"] == {"M": {"materials": {"L": [{"S": "cotton"}]}}}
+    assert drafts(aws) == {}
+    assert len(aws.sqs.messages(RENDER_QUEUE)) == 1
+
+    # 予約済みの反映は下書きがないため何もしない
+    scheduler.run_until(handlers["worker"], clock[0] + specification_drafts.AUTOSAVE_IDLE_SECONDS)
+    assert specification(aws, specification_id)["version"] == {"N": "2"}
+    assert len(aws.sqs.messages(RENDER_QUEUE)) == 1
+
+
+def test_lost_commit_is_rescheduled_by_the_next_autosave(aws, autosave):
+    handlers, scheduler, clock = autosave
+    specification_id = handlers["specification_id"]
+
+    handlers["put"].lambda_handler(request(specification_id, {"product_name": "tee"}, mode="autosave"), None)
+    # 反映の予約のメッセージがデッドレターキューに移った
+    scheduler.delayed.clear()
+
+    # 反映されるはずの時間を過ぎるまでは予約し直さない
+    clock[0] += specification_drafts.AUTOSAVE_IDLE_SECONDS
+    handlers["put"].lambda_handler(request(specification_id, {"product_name": "tee 2"}, mode="autosave"), None)
+    assert scheduler.delayed == []
+
+    clock[0] += specification_drafts.AUTOSAVE_IDLE_SECONDS + specification_drafts.COMMIT_RESCHEDULE_MARGIN_SECONDS + 1
+    handlers["put"].lambda_handler(request(specification_id, {"product_name": "tee 3"}, mode="autosave"), None)
+    assert len(scheduler.delayed) == 1
+
+    scheduler.run_until(handlers["worker"], clock[0] + specification_drafts.AUTOSAVE_IDLE_SECONDS)
+    assert specification(aws, specification_id)["product_name"] == {"S": "tee 3"}
+    assert drafts(aws) == {}
+
+
+@pytest.mark.parametrize("autosave_after_delete", [False, True], ids=["before", "after"])
+def test_delete_while_draft_pending_does_not_recreate_the_specification(aws, autosave, autosave_after_delete):
+    handlers, scheduler, clock = autosave
+    specification_id = handlers["specification_id"]
+    delete = api_event("DELETE", SPECIFICATION, {"specification_id": specification_id})
+
+    if not autosave_after_delete:
+        handlers["put"].lambda_handler(request(specification_id, {"progress": 50}, mode="autosave"), None)
+        assert handlers["delete"].lambda_handler(delete, None)["statusCode"] == 200
+        assert drafts(aws) == {}
+    else:
+        # 削除の前に開いていた編集画面から自動保存が届く
+        assert handlers["delete"].lambda_handler(delete, None)["statusCode"] == 200
+        handlers["put"].lambda_handler(request(specification_id, {"progress": 50}, mode="autosave"), None)
+
+    scheduler.run_until(handlers["worker"], clock[0] + specification_drafts.AUTOSAVE_IDLE_SECONDS)
+
+    assert specification(aws, specification_id) is None
+    assert aws.sqs.messages(RENDER_QUEUE) == []
+    assert drafts(aws) == {}
+    assert scheduler.delayed == []
+
+    # 明示的な保存も削除済みの仕様書を作成しない
+    response = handlers["put"].lambda_handler(request(specification_id, {"progress": 60}), None)
+    assert response["statusCode"] == 404
+    assert specification(aws, specification_id) is None
+
+
+def test_batch_delete_discards_pending_drafts(aws, autosave):
+    handlers, scheduler, clock = autosave
+    specification_id = handlers["specification_id"]
+    handlers["put"].lambda_handler(request(specification_id, {"progress": 50}, mode="autosave"), None)
+
+    event = api_event("POST", "/v1/specifications:batchDelete", body={"specification_ids": [specification_id, "missing"]})
+    assert handlers["batch_delete"].lambda_handler(event, None)["statusCode"] == 200
+    assert drafts(aws) == {}
+
+    scheduler.run_until(handlers["worker"], clock[0] + specification_drafts.AUTOSAVE_IDLE_SECONDS)
+    assert specification(aws, specification_id) is None
+    assert aws.sqs.messages(RENDER_QUEUE) == []
@@ -0,0 +1,43 @@
+import boto3
+
+import aws_clients
+
+
+class FakeClient:
+    def get_item(self):
+        pass
+
+
+def test_clients_are_created_on_first_use_and_shared(monkeypatch):
+    created = []
+    monkeypatch.setattr(boto3, "client", lambda service_name, config=None: created.append((service_name, config)) or FakeClient())
+    aws_clients.clear()
+
+    dynamodb = aws_clients.lazy("dynamodb")
+    other = aws_clients.lazy("dynamodb")
+    s3 = aws_clients.lazy("s3", read_timeout=aws_clients.TRANSFER_READ_TIMEOUT)
+    assert created == []
+
+    assert dynamodb.get_item == other.get_item
+    assert [service_name for service_name, _ in created] == ["dynamodb"]
+    assert created[0][1] is aws_clients.CONFIG
+
+    aws_clients.get_client("s3", read_timeout=aws_clients.TRANSFER_READ_TIMEOUT)
+    config = created[1][1]
+    assert config.read_timeout == aws_clients.TRANSFER_READ_TIMEOUT
+    assert config.connect_timeout == aws_clients.CONNECT_TIMEOUT
+    assert config.retries == {"mode": "adaptive", "total_max_attempts": aws_clients.MAX_ATTEMPTS}
+    assert s3.service_name == "s3"
+    aws_clients.clear()
+
+
+def test_lazy_client_delegates_to_shared_client():
+    aws_clients.clear()
+    dynamodb = aws_clients.lazy("dynamodb", region_name="ap-northeast-1")
+
+    assert dynamodb.meta.service_model.service_name == "dynamodb"
+    assert dynamodb.meta.config.max_pool_connections == aws_clients.MAX_POOL_CONNECTIONS
+    assert dynamodb.meta.config.tcp_keepalive is True
+    assert dynamodb.exceptions.ConditionalCheckFailedException is aws_clients.get_client(
+        "dynamodb", region_name="ap-northeast-1").exceptions.ConditionalCheckFailedException
+    aws_clients.clear()
@@ -0,0 +1,74 @@
+import json
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+import aws_metrics
+
+
+@pytest.fixture()
+def dynamodb(monkeypatch):
+    monkeypatch.setattr(aws_metrics, "_cold_start", True)
+    client = boto3.client("dynamodb", region_name="ap-northeast-1", aws_access_key_id="test", aws_secret_access_key="test")
+    with Stubber(client) as stubber:
+        yield client, stubber
+
+
+def emitted(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+
+
+def event(method="GET", tenant_id="tenant-1"):
+    return {
+        "resource": "/v1/tenant",
+        "httpMethod": method,
+        "requestContext": {"authorizer": {"claims": {"custom:tenant_id": tenant_id}}}
+    }
+
+
+def test_emits_aws_calls_per_invocation(dynamodb, capsys):
+    client, stubber = dynamodb
+    stubber.add_response("get_item", {"Item": {"tenant_id": {"S": "tenant-1"}}})
+    stubber.add_response("get_item", {})
+    stubber.add_client_error("put_item", "ProvisionedThroughputExceededException")
+
+    @aws_metrics.instrument
+    def handler(event, context):
+        if event["httpMethod"] == "PUT":
+            client.get_item(TableName="tenants", Key={"tenant_id": {"S": "tenant-1"}})
+            client.get_item(TableName="tenants", Key={"tenant_id": {"S": "tenant-2"}})
+            with pytest.raises(client.exceptions.ProvisionedThroughputExceededException):
+                client.put_item(TableName="tenants", Item={"tenant_id": {"S": "tenant-1"}})
+        return {"statusCode": 200}
+
+    handler(event("PUT"), None)
+    handler(event("GET"), None)
+
+    first, second = emitted(capsys)
+    assert (first["Route"], second["Route"]) == ("PUT /v1/tenant", "GET /v1/tenant")
+    assert first["TenantBucket"] == aws_metrics.get_tenant_bucket("tenant-1")
+    assert (first["ColdStart"], second["ColdStart"]) == ("true", "false")
+    assert first["DynamoDBCalls"] == first["AwsCalls"] == 3
+    assert first["AwsErrors"] == 1
+    assert first["aws_operations"]["dynamodb.GetItem"]["calls"] == 2
+    assert first["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == aws_metrics.DIMENSION_SETS
+    # 2回目の呼び出しには1回目の集計を持ち越さない
+    assert second["AwsCalls"] == 0 and second["aws_operations"] == {}
+
+
+def test_nested_handlers_emit_once(capsys):
+    inner = aws_metrics.instrument(lambda event, context: {"statusCode": 200})
+    outer = aws_metrics.instrument(lambda event, context: inner(event, context))
+
+    outer(event(), None)
+
+    assert len(emitted(capsys)) == 1
+
+
+def test_tenant_bucket_is_stable_and_bounded():
+    buckets = {aws_metrics.get_tenant_bucket(f"tenant-{i}") for i in range(200)}
+
+    assert aws_metrics.get_tenant_bucket("tenant-1") == aws_metrics.get_tenant_bucket("tenant-1")
+    assert len(buckets) <= aws_metrics.TENANT_BUCKETS
+    assert aws_metrics.get_tenant_bucket(None) == "none"
@@ -0,0 +1,90 @@
+import pytest
+from botocore.exceptions import ClientError
+
+import bulk_writes
+from tests.aws_fakes import client_error, ok
+
+
+class ScriptedDynamoDB:
+    """ Returns the scripted outcomes of transact_write_items in order and records each request """
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    def transact_write_items(self, TransactItems):
+        self.requests.append([item["Put"]["Item"]["id"]["S"] for item in TransactItems])
+        outcome = self.outcomes.pop(0) if self.outcomes else ok()
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def items(*ids):
+    return [{"Put": {"TableName": "table", "Item": {"id": {"S": i}}}} for i in ids]
+
+
+def cancelled(*codes, reasons=True):
+    extra = {"CancellationReasons": [{"Code": code} for code in codes]} if reasons else {}
+    return client_error("TransactionCanceledException", "Transaction cancelled", "TransactWriteItems", **extra)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(bulk_writes, "_backoff", sleeps.append)
+    return sleeps
+
+
+def test_failed_conditions_are_removed_and_the_rest_rewritten_at_once(no_backoff):
+    dynamodb = ScriptedDynamoDB(cancelled("None", "ConditionalCheckFailed", "None"))
+
+    results = bulk_writes.transact_write_items(dynamodb, items("a", "b", "c"))
+
+    assert results == [None, "ConditionalCheckFailed", None]
+    assert dynamodb.requests == [["a", "b", "c"], ["a", "c"]]
+    assert no_backoff == []
+
+
+def test_conflicts_are_retried_after_backoff(no_backoff):
+    dynamodb = ScriptedDynamoDB(
+        cancelled("TransactionConflict", "ConditionalCheckFailed", "None"),
+        cancelled("None", "ThrottlingError"),
+    )
+
+    results = bulk_writes.transact_write_items(dynamodb, items("a", "b", "c"))
+
+    assert results == [None, "ConditionalCheckFailed", None]
+    assert dynamodb.requests == [["a", "b", "c"], ["a", "c"], ["a", "c"]]
+    assert no_backoff == [1, 2]
+
+
+def test_persistent_throttling_is_reported_per_item():
+    throttled = client_error("ThrottlingException", "Rate exceeded", "TransactWriteItems")
+    dynamodb = ScriptedDynamoDB(*[throttled] * 3)
+
+    results = bulk_writes.transact_write_items(dynamodb, items("a", "b"), max_attempts=3)
+
+    assert results == ["Throttled", "Throttled"]
+    assert len(dynamodb.requests) == 3
+
+
+@pytest.mark.parametrize("error", [
+    cancelled(reasons=False),
+    cancelled("None"),
+], ids=["missing", "short"])
+def test_unmatched_cancellation_reasons_are_not_reported_as_written(error):
+    dynamodb = ScriptedDynamoDB(error, error)
+
+    assert bulk_writes.transact_write_items(dynamodb, items("a", "b"), max_attempts=2) == ["Throttled", "Throttled"]
+
+    dynamodb = ScriptedDynamoDB(error)
+    assert bulk_writes.transact_write_items(dynamodb, items("a", "b")) == [None, None]
+    assert dynamodb.requests == [["a", "b"], ["a", "b"]]
+
+
+def test_other_errors_are_raised():
+    dynamodb = ScriptedDynamoDB(client_error("ValidationException", "bad request", "TransactWriteItems"))
+
+    with pytest.raises(ClientError):
+        bulk_writes.transact_write_items(dynamodb, items("a"))
@@ -0,0 +1,26 @@
+from cache import TTLCache
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set(("t1", "TENANT"), {"tenant_name": {"S": "A"}})
+    assert cache.get(("t1", "TENANT")) == {"tenant_name": {"S": "A"}}
+
+    now[0] += 61
+    assert cache.get(("t1", "TENANT")) is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 0}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
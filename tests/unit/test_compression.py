@@ -0,0 +1,97 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+import compression
+import utils
+from tests.events import api_event, large_specification, specification_update_body
+
+
+def response(body):
+    return {"statusCode": 200, "headers": utils.get_response_headers(), "body": body}
+
+
+def large_body():
+    return json.dumps({"specifications": [large_specification() for _ in range(5)]})
+
+
+def with_accept_encoding(event, value):
+    return {**event, "headers": {**event["headers"], "Accept-Encoding": value}}
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("gzip, deflate", "gzip"),
+    ("deflate", None),
+    ("gzip;q=0", None),
+    ("*", next(iter(compression.ENCODERS))),
+    ("*;q=0.5, gzip;q=0", "br" if "br" in compression.ENCODERS else None),
+    ("br;q=0.5, gzip", "gzip"),
+    ("GZIP;Q=0.8", "gzip"),
+])
+def test_choose_encoding(accept_encoding, expected):
+    assert compression.choose_encoding(accept_encoding) == expected
+
+
+def test_large_body_is_gzipped_and_base64_encoded():
+    body = large_body()
+    event = with_accept_encoding(api_event("GET", "/v1/specifications"), "gzip")
+
+    compressed = compression.compress_response(event, response(body))
+
+    assert compressed["isBase64Encoded"] is True
+    assert compressed["headers"]["Content-Encoding"] == "gzip"
+    assert compressed["headers"]["Vary"] == "Accept, Accept-Encoding"
+    assert gzip.decompress(base64.b64decode(compressed["body"])).decode() == body
+    assert len(compressed["body"]) < len(body) // 4
+
+
+def test_small_body_and_missing_accept_encoding_are_not_compressed():
+    event = api_event("GET", "/v1/specifications")
+    small = compression.compress_response(with_accept_encoding(event, "gzip"), response('{"specifications":[]}'))
+    plain = compression.compress_response(event, response(large_body()))
+
+    for result in (small, plain):
+        assert "isBase64Encoded" not in result
+        assert "Content-Encoding" not in result["headers"]
+        assert result["headers"]["Vary"] == "Accept, Accept-Encoding"
+
+
+@pytest.mark.parametrize("accept", ["*/*", "text/html, application/json", "", "application/json-seq"])
+def test_body_is_not_compressed_unless_api_gateway_decodes_it(accept):
+    # API GatewayはAcceptの最初のメディアタイプがBinaryMediaTypesに一致しないとBase64のまま返す
+    event = with_accept_encoding(api_event("GET", "/v1/specifications"), "gzip, deflate, br")
+    event["headers"]["Accept"] = accept
+    body = large_body()
+
+    result = compression.compress_response(event, response(body))
+
+    assert result["body"] == body
+    assert "isBase64Encoded" not in result
+    assert "Content-Encoding" not in result["headers"]
+
+
+def test_accept_with_parameters_is_compressed():
+    event = with_accept_encoding(api_event("GET", "/v1/specifications"), "gzip")
+    event["headers"]["accept"] = event["headers"].pop("Accept").upper() + ";q=0.9, */*"
+
+    assert compression.compress_response(event, response(large_body()))["headers"]["Content-Encoding"] == "gzip"
+
+
+def test_existing_vary_is_extended():
+    headers = {**utils.get_response_headers(), "Vary": "Origin"}
+    result = compression.compress_response(api_event("GET", "/v1/specifications"), {"statusCode": 304, "headers": headers})
+    assert result["headers"]["Vary"] == "Origin, Accept, Accept-Encoding"
+
+
+def test_base64_request_body_is_decoded():
+    specification = large_specification()
+    body = json.dumps(specification_update_body(specification))
+    event = {**api_event("PUT", "/v1/specifications/{specification_id}"),
+             "body": base64.b64encode(body.encode()).decode(), "isBase64Encoded": True}
+
+    assert utils.get_request_body(event) == body
+    assert utils.get_request_body({"body": body, "isBase64Encoded": False}) == body
+    assert utils.get_request_body({}, "{}") == "{}"
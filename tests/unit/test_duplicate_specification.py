@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from tests.aws_fakes import client_error
+from tests.conftest import ENVIRONMENT
+from tests.events import TENANT_ID, api_event, seed_account
+
+BUCKET = ENVIRONMENT["S3_BUCKET_SPECIFICATIONS"]
+JOBS_TABLE = ENVIRONMENT["DUPLICATE_JOBS_TABLE_NAME"]
+DUPLICATE_QUEUE = ENVIRONMENT["DUPLICATE_SPECIFICATION_SQS_QUEUE_URL"]
+CREATE_QUEUE = ENVIRONMENT["CREATE_SPECIFICATION_SQS_QUEUE_URL"]
+
+
+class FakeContext:
+    """ Lambda context whose remaining time is fixed """
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+@pytest.fixture()
+def worker(aws, load_handler, monkeypatch):
+    """ Duplicate job worker with a small batch size so a few objects span several checkpoints """
+    module = load_handler("common/DuplicateSpecification")
+    monkeypatch.setattr(module, "COPY_BATCH_SIZE", 2)
+    return module
+
+
+@pytest.fixture()
+def job(aws, load_handler):
+    """ Starts an async duplicate of a specification with five files and returns its ids """
+    seed_account(aws)
+    create = load_handler("api/ApiSpecifications", "post")
+    body = {"specification_group_id": "group-1", "brand_name": "FLOOR", "product_name": "Tee",
+            "product_code": "FS-001", "progress": 0, "type": "TOPS"}
+    specification_id = json.loads(create.lambda_handler(api_event("POST", "/v1/specifications", body=body), None)["body"])["specification_id"]
+    aws.sqs.drain(CREATE_QUEUE)
+    for i in range(5):
+        aws.s3.put_object(Bucket=BUCKET, Key=f"{TENANT_ID}/{specification_id}/images/{i}.png", Body=b"png%d" % i)
+    aws.s3.put_object(Bucket=BUCKET, Key=f"{TENANT_ID}/{specification_id}/{specification_id}.pdf", Body=b"pdf")
+
+    duplicate = load_handler("api/ApiSpecificationsSpecificationIdDuplicate", "post")
+    event = api_event("POST", "/v1/specifications/{specification_id}/duplicate", {"specification_id": specification_id},
+                      query={"async": "true"})
+    response = duplicate.lambda_handler(event, None)
+    assert response["statusCode"] == 202
+    return json.loads(response["body"])
+
+
+def get_job(aws, job_id):
+    item = next(item for item in aws.dynamodb.table(JOBS_TABLE).items.values() if item["job_id"]["S"] == job_id)
+    return {name: next(iter(value.values())) for name, value in item.items()}
+
+
+def copied_keys(aws, specification_id):
+    prefix = f"{TENANT_ID}/{specification_id}/"
+    return sorted(key[len(prefix):] for key in aws.s3.bucket(BUCKET) if key.startswith(prefix))
+
+
+def test_paused_job_resumes_from_the_checkpoint(aws, worker, job):
+    # 残り時間が少ない場合は1バッチごとに続きをキューに戻す
+    worker.lambda_handler(aws.sqs.drain(DUPLICATE_QUEUE), FakeContext(worker.TIME_MARGIN_MS - 1))
+
+    state = get_job(aws, job["job_id"])
+    assert (state["status"], state["total"], state["copied"]) == ("RUNNING", "5", "2")
+    assert state["start_after"].endswith("images/1.png")
+    assert copied_keys(aws, job["specification_id"]) == ["images/0.png", "images/1.png"]
+    assert aws.sqs.messages(CREATE_QUEUE) == []
+
+    copy_object = aws.s3.copy_object
+    sources = []
+    aws.s3.copy_object = lambda **kwargs: sources.append(kwargs["CopySource"]["Key"]) or copy_object(**kwargs)
+    worker.lambda_handler(aws.sqs.drain(DUPLICATE_QUEUE), FakeContext(worker.TIME_MARGIN_MS * 10))
+
+    # チェックポイントより後のオブジェクトだけをコピーする（PDFはコピーしない）
+    assert sorted(key.rsplit("/", 1)[-1] for key in sources) == ["2.png", "3.png", "4.png"]
+    assert copied_keys(aws, job["specification_id"]) == [f"images/{i}.png" for i in range(5)]
+    assert get_job(aws, job["job_id"])["status"] == "COMPLETED"
+    assert aws.sqs.messages(CREATE_QUEUE) == [{"specification_id": job["specification_id"], "tenant_id": TENANT_ID}]
+    assert aws.sqs.messages(DUPLICATE_QUEUE) == []
+
+
+def test_redelivered_message_stops_when_another_worker_advanced_the_job(aws, worker, job):
+    event = aws.sqs.drain(DUPLICATE_QUEUE)
+    key = {"job_id": {"S": job["job_id"]}, "tenant_id": {"S": TENANT_ID}}
+    stale = aws.dynamodb.get_item(TableName=JOBS_TABLE, Key=key)
+    worker.lambda_handler(event, FakeContext(worker.TIME_MARGIN_MS - 1))
+    aws.sqs.drain(DUPLICATE_QUEUE)
+
+    # 同じメッセージを受け取った別の実行は、先に進められる前のジョブを読んでいる
+    aws.dynamodb.get_item = lambda **kwargs: stale
+    worker.lambda_handler(event, None)
+
+    state = get_job(aws, job["job_id"])
+    assert (state["status"], state["copied"]) == ("RUNNING", "2")
+    assert aws.sqs.messages(CREATE_QUEUE) == []
+
+
+def test_copy_error_marks_the_job_failed(aws, worker, job):
+    aws.s3.copy_object = lambda **kwargs: (_ for _ in ()).throw(client_error("AccessDenied", "Access Denied", "CopyObject", status=403))
+
+    worker.lambda_handler(aws.sqs.drain(DUPLICATE_QUEUE), None)
+
+    state = get_job(aws, job["job_id"])
+    assert state["status"] == "FAILED"
+    assert "Failed to copy s3 object" in state["error"]
+    assert aws.sqs.messages(CREATE_QUEUE) == []
+
+
+@pytest.mark.parametrize("receive_count, status", [("1", "QUEUED"), ("4", "QUEUED"), ("5", "FAILED")])
+def test_unexpected_error_marks_the_job_failed_on_the_last_receive(aws, worker, job, receive_count, status):
+    aws.s3.list_objects_v2 = lambda **kwargs: (_ for _ in ()).throw(client_error("InternalError", "We encountered an internal error", "ListObjectsV2", status=500))
+    event = aws.sqs.drain(DUPLICATE_QUEUE)
+    event["Records"][0]["attributes"]["ApproximateReceiveCount"] = receive_count
+
+    # メッセージを再試行させる（最後はデッドレターキューに移す）ため例外は送出する
+    with pytest.raises(Exception):
+        worker.lambda_handler(event, None)
+
+    state = get_job(aws, job["job_id"])
+    assert state["status"] == status
+    assert ("error" in state) == (status == "FAILED")
@@ -0,0 +1,47 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+import dynamo_codec
+
+
+def test_integers_are_decoded_to_int():
+    assert dynamo_codec.to_python({"N": "42"}) == 42
+    assert type(dynamo_codec.to_python({"N": "-7"})) is int
+    assert dynamo_codec.to_python({"N": "123456789012345678901234567890"}) == 123456789012345678901234567890
+
+
+@pytest.mark.parametrize("value", ["1.0", "0.1", "1.50", "3.14159265358979323846", "12345678901234567.25"])
+def test_non_integers_are_decoded_without_losing_digits(value):
+    number = dynamo_codec.to_python({"N": value})
+
+    assert type(number) is Decimal
+    assert number == Decimal(value)
+    # 書き戻しても元の表記のまま保存される
+    assert dynamo_codec.to_dynamo(number) == {"N": value}
+
+
+def test_nested_numbers_keep_their_type():
+    item = {"progress": {"N": "50"}, "sizes": {"L": [{"N": "1.0"}, {"N": "2"}]}, "ratios": {"NS": ["0.5", "1"]}}
+
+    assert dynamo_codec.item_to_python(item) == {
+        "progress": 50,
+        "sizes": [Decimal("1.0"), 2],
+        "ratios": {Decimal("0.5"), 1},
+    }
+
+
+def test_json_default_converts_decimals_at_the_json_boundary():
+    item = dynamo_codec.item_to_python({"user_name": {"S": "Editor"}, "weight": {"N": "1.5"}, "count": {"N": "3"}})
+
+    assert json.dumps(item, default=dynamo_codec.json_default) == '{"user_name": "Editor", "weight": 1.5, "count": 3}'
+    with pytest.raises(TypeError):
+        json.dumps({"tags": {"a"}}, default=dynamo_codec.json_default)
+
+
+def test_dumps_keeps_every_digit_of_long_numbers():
+    value = "12345678901234567.25"
+
+    assert dynamo_codec.dumps_item({"price": {"N": value}}) == '{"price":' + value + "}"
+    assert json.loads(dynamo_codec.dumps_item({"price": {"N": value}}), parse_float=Decimal) == {"price": Decimal(value)}
@@ -0,0 +1,82 @@
+import json
+import logging
+
+import pytest
+
+import event_logging
+from tests.events import api_event, large_specification, specification_update_body
+
+
+@pytest.fixture()
+def logger(caplog):
+    caplog.set_level(logging.INFO, logger="test_event_logging")
+    return logging.getLogger("test_event_logging")
+
+
+def logged(caplog):
+    (record,) = caplog.records
+    return record.getMessage()
+
+
+def put_event():
+    specification = large_specification()
+    return api_event("PUT", "/v1/specifications/{specification_id}", {"specification_id": specification["specification_id"]},
+                     specification_update_body(specification))
+
+
+def test_summary_is_bounded_and_redacts_claims(logger, caplog):
+    event = put_event()
+
+    event_logging.log_event(logger, event)
+
+    message = logged(caplog)
+    summary = json.loads(message.removeprefix("Received event: "))
+    assert len(message) < len(event["body"]) // 5
+    assert summary["resource"] == "/v1/specifications/{specification_id}"
+    assert summary["claims"] == {"sub": "user-1", "email": "[REDACTED]", "custom:tenant_id": "tenant-1"}
+    assert summary["body"]["size"] == len(event["body"])
+    assert summary["body"]["preview"].startswith('{"brand_name": "FLOOR"')
+    assert summary["body"]["preview"].endswith(f"(+{len(event['body']) - event_logging.MAX_STRING_LENGTH} chars)")
+
+
+def test_not_formatted_when_level_disabled(logger, caplog, monkeypatch):
+    caplog.set_level(logging.WARNING, logger="test_event_logging")
+    monkeypatch.setattr(event_logging, "summarize_event", pytest.fail)
+
+    event_logging.log_event(logger, put_event())
+
+    assert caplog.records == []
+
+
+def test_sampled_full_event_keeps_body_but_redacts(logger, caplog, monkeypatch):
+    monkeypatch.setattr(event_logging, "LOG_FULL_EVENT_SAMPLE_RATE", 1.0)
+    event = put_event()
+    event["headers"]["Authorization"] = "Bearer token"
+
+    event_logging.log_event(logger, event)
+
+    full = json.loads(logged(caplog).removeprefix("Received event (full): "))
+    assert full["body"] == event["body"]
+    assert full["headers"]["Authorization"] == "[REDACTED]"
+    assert full["requestContext"]["authorizer"]["claims"]["email"] == "[REDACTED]"
+    # 元のイベントは変更しない
+    assert event["requestContext"]["authorizer"]["claims"]["email"] == "user@example.com"
+
+
+def test_nested_values_are_summarized():
+    event = {"detail": {"sections": {"fit": {"total_length": {"m": "70"}}}, "points": list(range(10))}}
+
+    summary = event_logging.summarize_event(event)
+
+    assert summary == {"detail": {"sections": "{1 keys}", "points": "[10 items]"}}
+
+
+def test_sqs_event_is_summarized_per_record(logger, caplog):
+    records = [{"messageId": str(i), "body": json.dumps({"specification_id": str(i)}), "eventSource": "aws:sqs"} for i in range(8)]
+
+    event_logging.log_event(logger, {"Records": records})
+
+    summary = json.loads(logged(caplog).removeprefix("Received event: "))
+    assert summary["records"] == 8
+    assert summary["eventSource"] == "aws:sqs"
+    assert len(summary["sample"]) == event_logging.MAX_ITEMS
@@ -1,72 +1,299 @@
+import base64
+import gzip
 import json
 
 import pytest
 
-from hello_world import app
+import dynamo_codec
+from tests.conftest import ENVIRONMENT
+from tests.events import TENANT_ID, api_event, large_specification, seed_account, specification_update_body
 
+SPECIFICATION = "/v1/specifications/{specification_id}"
 
-@pytest.fixture()
-def apigw_event():
-    """ Generates API GW Event"""
 
+@pytest.fixture()
+def api(aws, load_handler):
+    """ Handlers of the specification endpoints, bound to the in-memory fakes """
+    seed_account(aws)
+    aws.dynamodb.enable_stream("specifications")
     return {
-        "body": '{ "test": "body"}',
-        "resource": "/{proxy+}",
-        "requestContext": {
-            "resourceId": "123456",
-            "apiId": "1234567890",
-            "resourcePath": "/{proxy+}",
-            "httpMethod": "POST",
-            "requestId": "c6af9ac6-7b61-11e6-9a41-93e8deadbeef",
-            "accountId": "123456789012",
-            "identity": {
-                "apiKey": "",
-                "userArn": "",
-                "cognitoAuthenticationType": "",
-                "caller": "",
-                "userAgent": "Custom User Agent String",
-                "user": "",
-                "cognitoIdentityPoolId": "",
-                "cognitoIdentityId": "",
-                "cognitoAuthenticationProvider": "",
-                "sourceIp": "127.0.0.1",
-                "accountId": "",
-            },
-            "stage": "prod",
-        },
-        "queryStringParameters": {"foo": "bar"},
-        "headers": {
-            "Via": "1.1 08f323deadbeefa7af34d5feb414ce27.cloudfront.net (CloudFront)",
-            "Accept-Language": "en-US,en;q=0.8",
-            "CloudFront-Is-Desktop-Viewer": "true",
-            "CloudFront-Is-SmartTV-Viewer": "false",
-            "CloudFront-Is-Mobile-Viewer": "false",
-            "X-Forwarded-For": "127.0.0.1, 127.0.0.2",
-            "CloudFront-Viewer-Country": "US",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Upgrade-Insecure-Requests": "1",
-            "X-Forwarded-Port": "443",
-            "Host": "1234567890.execute-api.us-east-1.amazonaws.com",
-            "X-Forwarded-Proto": "https",
-            "X-Amz-Cf-Id": "aaaaaaaaaae3VYQb9jd-nvCd-de396Uhbp027Y2JvkCPNLmGJHqlaA==",
-            "CloudFront-Is-Tablet-Viewer": "false",
-            "Cache-Control": "max-age=0",
-            "User-Agent": "Custom User Agent String",
-            "CloudFront-Forwarded-Proto": "https",
-            "Accept-Encoding": "gzip, deflate, sdch",
-        },
-        "pathParameters": {"proxy": "/examplepath"},
-        "httpMethod": "POST",
-        "stageVariables": {"baz": "qux"},
-        "path": "/examplepath",
+        "list": load_handler("api/ApiSpecifications", "get"),
+        "create": load_handler("api/ApiSpecifications", "post"),
+        "get": load_handler("api/ApiSpecificationsSpecificationId", "get"),
+        "put": load_handler("api/ApiSpecificationsSpecificationId", "put"),
+        "delete": load_handler("api/ApiSpecificationsSpecificationId", "delete"),
+        "batch_get": load_handler("api/ApiSpecificationsSpecificationId", "batch_get"),
+        "duplicate": load_handler("api/ApiSpecificationsSpecificationIdDuplicate", "post"),
+        "summary": load_handler("common/SpecificationSummary"),
     }
 
 
-def test_lambda_handler(apigw_event):
+def sync_summaries(aws, api):
+    """ Delivers the specifications table stream to the summary processor, as Lambda would """
+    result = api["summary"].lambda_handler(aws.dynamodb.drain_stream("specifications"), None)
+    assert result == {"batchItemFailures": []}
+
+
+def create(api, **body):
+    body = {"specification_group_id": "group-1", "brand_name": "FLOOR", "product_name": "Tee",
+            "product_code": "FS-001", "progress": 0, "type": "TOPS", **body}
+    response = api["create"].lambda_handler(api_event("POST", "/v1/specifications", body=body), None)
+    assert response["statusCode"] == 201
+    return json.loads(response["body"])["specification_id"]
+
+
+def test_create_then_get(aws, api):
+    specification_id = create(api, product_name="Heavyweight tee")
+
+    response = api["get"].lambda_handler(api_event("GET", SPECIFICATION, {"specification_id": specification_id}), None)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["product_name"] == "Heavyweight tee"
+    assert body["updated_by"] == {"user_id": "user-1", "user_name": "Editor"}
+    assert "tenant_id" not in body and "render_hashes" not in body
+    assert aws.sqs.messages(ENVIRONMENT["CREATE_SPECIFICATION_SQS_QUEUE_URL"]) == [
+        {"specification_id": specification_id, "tenant_id": TENANT_ID}
+    ]
+
+
+def test_put_renders_only_when_render_inputs_change(aws, api):
+    specification = large_specification()
+    aws.dynamodb.seed("specifications", [dynamo_codec.item_to_dynamo(specification)])
+    path = {"specification_id": specification["specification_id"]}
+    queue = ENVIRONMENT["CREATE_SPECIFICATION_SQS_QUEUE_URL"]
+
+    response = api["put"].lambda_handler(api_event("PUT", SPECIFICATION, path, specification_update_body(specification)), None)
+    assert response["statusCode"] == 200
+    assert len(aws.sqs.messages(queue)) == 1
+
+    # 同じ内容の保存ではPDFを作り直さない
+    response = api["put"].lambda_handler(api_event("PUT", SPECIFICATION, path, specification_update_body(specification)), None)
+    assert response["statusCode"] == 200
+    assert len(aws.sqs.messages(queue)) == 1
+
+    fabric = {**specification["fabric"], "materials": specification["fabric"]["materials"][:1]}
+    body = specification_update_body(specification, fabric=fabric)
+    response = api["put"].lambda_handler(api_event("PUT", SPECIFICATION, path, body), None)
+    assert response["statusCode"] == 200
+    assert len(aws.sqs.messages(queue)) == 2
+
+    stored = aws.dynamodb.get_item(TableName="specifications", Key=dynamo_codec.item_to_dynamo(
+        {"specification_id": specification["specification_id"], "tenant_id": TENANT_ID}))["Item"]
+    assert len(stored["fabric"]["M"]["materials"]["L"]) == 1
+
+
+def test_put_rejects_invalid_body(aws, api):
+    specification = large_specification()
+    aws.dynamodb.seed("specifications", [dynamo_codec.item_to_dynamo(specification)])
+    path = {"specification_id": specification["specification_id"]}
+
+    response = api["put"].lambda_handler(api_event("PUT", SPECIFICATION, path, {"oem_points": "none"}), None)
+
+    assert response["statusCode"] == 400
+
+
+def test_list_pages_through_summaries(aws, api):
+    specification_ids = {create(api, product_name=f"Tee {i}") for i in range(5)}
+    sync_summaries(aws, api)
+
+    listed, cursor = [], None
+    while True:
+        query = {"limit": "2", **({"cursor": cursor} if cursor else {})}
+        response = api["list"].lambda_handler(api_event("GET", "/v1/specifications", query=query), None)
+        assert response["statusCode"] == 200
+        page = json.loads(response["body"])
+        assert len(page["specifications"]) <= 2
+        listed += page["specifications"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert {specification["specification_id"] for specification in listed} == specification_ids
+
+
+def test_list_rejects_cursor_from_another_tenant(aws, api):
+    for i in range(3):
+        create(api, product_name=f"Tee {i}")
+    sync_summaries(aws, api)
+    response = api["list"].lambda_handler(api_event("GET", "/v1/specifications", query={"limit": "1"}), None)
+    cursor = json.loads(response["body"])["next_cursor"]
+
+    event = api_event("GET", "/v1/specifications", query={"cursor": cursor}, tenant_id="tenant-2")
+    response = api["list"].lambda_handler(event, None)
+
+    assert response["statusCode"] == 400
+
+
+def test_batch_get_reports_missing_ids(aws, api):
+    specification_id = create(api)
+
+    event = api_event("POST", "/v1/specifications:batchGet", body={"specification_ids": [specification_id, "missing"]})
+    response = api["batch_get"].lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert [specification["specification_id"] for specification in body["specifications"]] == [specification_id]
+    assert body["not_found"] == ["missing"]
+
+
+def test_batch_get_rejects_more_than_the_maximum_ids(aws, api):
+    specification_id = create(api)
+    maximum = api["batch_get"].MAX_BATCH_GET_IDS
+    assert maximum == 50
+
+    ids = [specification_id] + [f"missing-{i}" for i in range(maximum - 1)]
+    event = api_event("POST", "/v1/specifications:batchGet", body={"specification_ids": ids})
+    response = api["batch_get"].lambda_handler(event, None)
+    assert response["statusCode"] == 200
+    assert len(json.loads(response["body"])["not_found"]) == maximum - 1
+
+    event = api_event("POST", "/v1/specifications:batchGet", body={"specification_ids": ids + ["one-more"]})
+    response = api["batch_get"].lambda_handler(event, None)
+    assert response["statusCode"] == 400
+
+
+def test_delete_removes_summary_and_queues_purge(aws, api):
+    specification_id = create(api)
+    sync_summaries(aws, api)
+    path = {"specification_id": specification_id}
+
+    response = api["delete"].lambda_handler(api_event("DELETE", SPECIFICATION, path), None)
+    assert response["statusCode"] == 200
+    sync_summaries(aws, api)
+
+    assert api["get"].lambda_handler(api_event("GET", SPECIFICATION, path), None)["statusCode"] == 404
+    listed = json.loads(api["list"].lambda_handler(api_event("GET", "/v1/specifications"), None)["body"])
+    assert listed["specifications"] == []
+    assert aws.sqs.messages(ENVIRONMENT["PURGE_SPECIFICATION_SQS_QUEUE_URL"]) == [
+        {"tenant_id": TENANT_ID, "specification_id": specification_id}
+    ]
+
+
+def conditional(event, etag):
+    event["headers"]["If-None-Match"] = etag
+    return event
+
+
+def test_get_returns_304_until_specification_changes(aws, api):
+    specification_id = create(api)
+    path = {"specification_id": specification_id}
+
+    response = api["get"].lambda_handler(api_event("GET", SPECIFICATION, path), None)
+    etag = response["headers"]["ETag"]
+    assert json.loads(response["body"])["version"] == 1
+
+    reads = aws.dynamodb.calls["get_item"]
+    response = api["get"].lambda_handler(conditional(api_event("GET", SPECIFICATION, path), etag), None)
+    assert response["statusCode"] == 304
+    assert "body" not in response
+    assert response["headers"]["ETag"] == etag
+    # 一致した場合は射影した1回の読み込みだけで返す
+    assert aws.dynamodb.calls["get_item"] == reads + 1
+
+    # PDFの作成はupdated_atを変えずに版数だけを上げる
+    aws.dynamodb.update_item(
+        TableName="specifications",
+        Key={"specification_id": {"S": specification_id}, "tenant_id": {"S": TENANT_ID}},
+        UpdateExpression="set specification_file = :specification_file add #version :one",
+        ExpressionAttributeNames={"#version": "version"},
+        ExpressionAttributeValues={":specification_file": {"M": {"object": {"S": "spec.pdf"}}}, ":one": {"N": "1"}}
+    )
+    response = api["get"].lambda_handler(conditional(api_event("GET", SPECIFICATION, path), etag), None)
+    assert response["statusCode"] == 200
+    assert response["headers"]["ETag"] != etag
+
+    etag = response["headers"]["ETag"]
+    api["put"].lambda_handler(api_event("PUT", SPECIFICATION, path, {"product_name": "Renamed"}), None)
+    response = api["get"].lambda_handler(conditional(api_event("GET", SPECIFICATION, path), etag), None)
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["version"] == 3
+
+
+def test_etag_depends_on_requested_fields(aws, api):
+    specification_id = create(api)
+    path = {"specification_id": specification_id}
+
+    full = api["get"].lambda_handler(api_event("GET", SPECIFICATION, path), None)
+    event = conditional(api_event("GET", SPECIFICATION, path, query={"fields": "product_name"}), full["headers"]["ETag"])
+    response = api["get"].lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    assert set(json.loads(response["body"])) == {"specification_id", "product_name", "updated_at", "version"}
+
+
+def test_list_returns_304_when_body_is_unchanged(aws, api):
+    create(api)
+    sync_summaries(aws, api)
+
+    response = api["list"].lambda_handler(api_event("GET", "/v1/specifications"), None)
+    event = conditional(api_event("GET", "/v1/specifications"), response["headers"]["ETag"])
+    assert api["list"].lambda_handler(event, None)["statusCode"] == 304
+
+    create(api)
+    sync_summaries(aws, api)
+    assert api["list"].lambda_handler(event, None)["statusCode"] == 200
+
+
+def test_list_is_compressed_when_client_accepts_gzip(aws, api):
+    for i in range(20):
+        create(api, product_name=f"Tee {i}")
+    sync_summaries(aws, api)
+
+    event = api_event("GET", "/v1/specifications")
+    event["headers"]["Accept-Encoding"] = "gzip, deflate, br;q=0"
+    response = api["list"].lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    assert response["isBase64Encoded"] is True
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    page = json.loads(gzip.decompress(base64.b64decode(response["body"])))
+    assert len(page["specifications"]) == 20
+
+    # ETagは圧縮の有無によらず同じ
+    plain = api["list"].lambda_handler(api_event("GET", "/v1/specifications"), None)
+    assert plain["headers"]["ETag"] == response["headers"]["ETag"]
+    assert json.loads(plain["body"]) == page
+
+
+def test_list_is_not_compressed_for_browser_fetch(aws, api):
+    for i in range(20):
+        create(api, product_name=f"Tee {i}")
+    sync_summaries(aws, api)
+
+    # fetchの既定のAcceptは*/*で、API Gatewayは本文をデコードしない
+    event = api_event("GET", "/v1/specifications")
+    event["headers"].update({"Accept": "*/*", "Accept-Encoding": "gzip, deflate, br"})
+    response = api["list"].lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    assert "Content-Encoding" not in response["headers"] and not response.get("isBase64Encoded")
+    assert len(json.loads(response["body"])["specifications"]) == 20
+
+
+def test_put_accepts_base64_encoded_body(aws, api):
+    specification_id = create(api)
+    path = {"specification_id": specification_id}
+    event = api_event("PUT", SPECIFICATION, path, {"product_name": "Renamed tee"})
+    event.update(body=base64.b64encode(event["body"].encode()).decode(), isBase64Encoded=True)
+
+    assert api["put"].lambda_handler(event, None)["statusCode"] == 200
+    response = api["get"].lambda_handler(api_event("GET", SPECIFICATION, path), None)
+    assert json.loads(response["body"])["product_name"] == "Renamed tee"
+
 
-    ret = app.lambda_handler(apigw_event, "")
-    data = json.loads(ret["body"])
+def test_duplicate_can_be_saved_with_put(aws, api):
+    specification_id = create(api, product_name="Heavyweight Tee")
+    response = api["duplicate"].lambda_handler(
+        api_event("POST", SPECIFICATION + "/duplicate", {"specification_id": specification_id}), None
+    )
+    assert response["statusCode"] == 201
+    path = {"specification_id": json.loads(response["body"])["specification_id"]}
+    duplicate = json.loads(api["get"].lambda_handler(api_event("GET", SPECIFICATION, path), None)["body"])
+    assert duplicate["product_name"] == "Heavyweight Tee (Copy)"
 
-    assert ret["statusCode"] == 200
-    assert "message" in ret["body"]
-    assert data["message"] == "hello world"
+    # 編集画面は取得した値をそのまま送り返す
+    body = {name: duplicate[name] for name in ("brand_name", "product_name", "product_code")}
+    for query in (None, {"mode": "autosave"}):
+        event = api_event("PUT", SPECIFICATION, path, {**body, "progress": 1}, query=query)
+        assert api["put"].lambda_handler(event, None)["statusCode"] in (200, 202)
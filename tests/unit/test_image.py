@@ -0,0 +1,67 @@
+import json
+import uuid
+
+import pytest
+
+from tests.events import TENANT_ID, api_event, seed_account
+
+SPECIFICATION_ID = str(uuid.uuid4())
+
+
+@pytest.fixture()
+def image(aws, load_handler):
+    seed_account(aws)
+    return load_handler("api/ApiImage", "post")
+
+
+def post(image, body):
+    response = image.lambda_handler(api_event("POST", "/v1/image", body=body), None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_single_key_response_is_unchanged(aws, image):
+    status, body = post(image, {"type": "specification", "specification_id": SPECIFICATION_ID, "key": "fit.png", "method": "get"})
+
+    assert status == 200
+    assert set(body) == {"pre_signed_url", "key"}
+    assert f"/{TENANT_ID}/{SPECIFICATION_ID}/fit.png?" in body["pre_signed_url"]
+
+
+def test_batch_signs_every_item_in_one_invocation(aws, image):
+    items = [{"key": f"oem-{i}.png", "method": "get"} for i in range(20)]
+    items += [{"method": "put", "image_type": "jpg"}, {"key": "tag.png", "method": "delete"}]
+
+    status, body = post(image, {"type": "specification", "specification_id": SPECIFICATION_ID, "items": items})
+
+    assert status == 200
+    assert [item["method"] for item in body["items"]] == ["get"] * 20 + ["put", "delete"]
+    assert body["items"][0]["key"] == "oem-0.png"
+    assert body["items"][20]["key"].endswith(".jpg")
+    assert aws.s3.calls["generate_presigned_url"] == 22
+
+
+def test_batch_is_rejected_when_any_key_is_invalid(aws, image):
+    items = [{"key": "fit.png", "method": "get"}, {"key": "../other-tenant/fit.png", "method": "get"}]
+
+    status, _ = post(image, {"type": "specification", "specification_id": SPECIFICATION_ID, "items": items})
+
+    assert status == 400
+    assert aws.s3.calls["generate_presigned_url"] == 0
+
+
+def test_brand_logo_batch_allows_only_get(aws, image):
+    aws.dynamodb.seed("tenants", [{"tenant_id": {"S": TENANT_ID}, "kind": {"S": "TENANT"}, "logo_key": {"S": "logo.png"}}])
+
+    status, body = post(image, {"type": "brand_logo", "items": [{"key": "logo.png", "method": "get"}]})
+    assert status == 200
+    assert f"static-assets-bucket.s3.amazonaws.com/{TENANT_ID}/logo/logo.png" in body["items"][0]["pre_signed_url"]
+
+    status, _ = post(image, {"type": "brand_logo", "items": [{"key": "logo.png", "method": "put", "image_type": "png"}]})
+    assert status == 400
+
+
+@pytest.mark.parametrize("items", [[], [{"key": "a.png", "method": "get"}] * 101, "fit.png"])
+def test_batch_size_is_bounded(image, items):
+    status, _ = post(image, {"type": "specification", "specification_id": SPECIFICATION_ID, "items": items})
+
+    assert status == 400
@@ -0,0 +1,54 @@
+import json
+
+from tests.conftest import ENVIRONMENT
+from tests.events import TENANT_ID
+from tests.unit.test_s3_transfer import fail_keys
+
+BUCKET = ENVIRONMENT["S3_BUCKET_SPECIFICATIONS"]
+
+
+def purge_event(*specification_ids):
+    return {"Records": [
+        {"messageId": f"m{i}", "body": json.dumps({"tenant_id": TENANT_ID, "specification_id": specification_id})}
+        for i, specification_id in enumerate(specification_ids)
+    ]}
+
+
+def put_objects(aws, specification_id, count):
+    for i in range(count):
+        aws.s3.put_object(Bucket=BUCKET, Key=f"{TENANT_ID}/{specification_id}/images/{i:04d}.png", Body=b"")
+
+
+def test_purge_deletes_objects_across_pages(aws, load_handler):
+    purge = load_handler("common/PurgeSpecification")
+    put_objects(aws, "spec-1", 1500)
+    put_objects(aws, "spec-2", 3)
+
+    assert purge.lambda_handler(purge_event("spec-1"), None) == {"batchItemFailures": []}
+
+    assert sorted(aws.s3.bucket(BUCKET)) == [f"{TENANT_ID}/spec-2/images/{i:04d}.png" for i in range(3)]
+    assert aws.s3.calls["delete_objects"] == 2
+
+
+def test_purge_retries_keys_reported_in_errors(aws, load_handler, monkeypatch):
+    purge = load_handler("common/PurgeSpecification")
+    monkeypatch.setattr("s3_transfer.time.sleep", lambda seconds: None)
+    put_objects(aws, "spec-1", 5)
+    fail_keys(aws.s3, [f"{TENANT_ID}/spec-1/images/0002.png"])
+
+    assert purge.lambda_handler(purge_event("spec-1"), None) == {"batchItemFailures": []}
+    assert aws.s3.bucket(BUCKET) == {}
+
+
+def test_purge_failure_is_retried_by_sqs(aws, load_handler, monkeypatch):
+    purge = load_handler("common/PurgeSpecification")
+    monkeypatch.setattr("s3_transfer.time.sleep", lambda seconds: None)
+    put_objects(aws, "spec-1", 5)
+    put_objects(aws, "spec-2", 5)
+    fail_keys(aws.s3, [f"{TENANT_ID}/spec-1/images/0002.png"], times=10)
+
+    result = purge.lambda_handler(purge_event("spec-1", "spec-2"), None)
+
+    # 失敗したメッセージだけを再試行させる
+    assert result == {"batchItemFailures": [{"itemIdentifier": "m0"}]}
+    assert list(aws.s3.bucket(BUCKET)) == [f"{TENANT_ID}/spec-1/images/0002.png"]
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src", "api"))
+
+import router  # noqa: E402
+from tests.conftest import ENVIRONMENT  # noqa: E402
+from tests.events import TENANT_ID, USER_ID, api_event, seed_account  # noqa: E402
+
+
+def test_every_route_points_at_an_existing_handler_module():
+    for function_dir, module_name in router.ROUTES.values():
+        assert os.path.isfile(os.path.join(os.path.dirname(router.__file__), function_dir, f"{module_name}.py"))
+
+
+@pytest.mark.parametrize("event, expected", [
+    ({"resource": "/v1/specifications/{specification_id}", "pathParameters": {"specification_id": "s1"}},
+     ("/v1/specifications/{specification_id}", {"specification_id": "s1"})),
+    ({"resource": "/{proxy+}", "path": "/v1/specifications/s1/duplicate/j1"},
+     ("/v1/specifications/{specification_id}/duplicate/{job_id}", {"specification_id": "s1", "job_id": "j1"})),
+    ({"resource": "/{proxy+}", "path": "/v1/specifications:batchGet"}, ("/v1/specifications:batchGet", None)),
+    ({"resource": "/{proxy+}", "path": "/v1/unknown"}, (None, None)),
+])
+def test_resolve_resource(event, expected):
+    assert router.resolve_resource(event) == expected
+
+
+def test_handlers_are_loaded_on_first_use(monkeypatch):
+    calls = []
+    monkeypatch.setattr(router, "_handlers", {("ApiTenant", "get"): lambda event, context: calls.append(event) or "ok"})
+
+    assert router.lambda_handler({"resource": "/{proxy+}", "path": "/v1/tenant", "httpMethod": "GET"}, None) == "ok"
+    assert calls[0]["resource"] == "/v1/tenant"
+    assert router.lambda_handler({"resource": "/{proxy+}", "path": "/v1/tenant", "httpMethod": "DELETE"}, None)["statusCode"] == 405
+    assert router.lambda_handler({"resource": "/{proxy+}", "path": "/v1/nope", "httpMethod": "GET"}, None)["statusCode"] == 404
+
+
+def test_renamed_user_is_seen_by_later_requests_in_the_same_container(aws, monkeypatch):
+    monkeypatch.setattr(router, "_handlers", {})
+    seed_account(aws)
+
+    def create():
+        body = {"specification_group_id": "group-1", "brand_name": "FLOOR", "product_name": "Tee",
+                "product_code": "FS-001", "progress": 0, "type": "TOPS"}
+        response = router.lambda_handler(api_event("POST", "/v1/specifications", body=body), None)
+        key = {"specification_id": {"S": json.loads(response["body"])["specification_id"]}, "tenant_id": {"S": TENANT_ID}}
+        item = aws.dynamodb.get_item(TableName=ENVIRONMENT["SPECIFICATIONS_TABLE_NAME"], Key=key)["Item"]
+        return item["updated_by"]["M"]["user_name"]["S"]
+
+    # 作成でユーザー情報がキャッシュされる
+    assert create() == "Editor"
+
+    event = api_event("PUT", "/v1/users/{user_id}", {"user_id": USER_ID}, {"user_name": "Renamed"})
+    response = router.lambda_handler(event, None)
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["user_name"] == "Renamed"
+
+    assert create() == "Renamed"
+
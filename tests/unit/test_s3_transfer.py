@@ -0,0 +1,148 @@
+import pytest
+from botocore.exceptions import ClientError
+
+import s3_transfer
+from tests.aws_fakes import FakeS3, client_error
+
+BUCKET = "bucket"
+
+
+@pytest.fixture()
+def s3(monkeypatch):
+    # 再試行の待機をなくし、小さいオブジェクトでもマルチパートコピーになるようにする
+    monkeypatch.setattr(s3_transfer.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(s3_transfer, "MAX_SINGLE_COPY_SIZE", 10)
+    monkeypatch.setattr(s3_transfer, "MULTIPART_PART_SIZE", 4)
+    return FakeS3()
+
+
+def fail(s3, operation, *errors):
+    """ Makes the next calls of an operation raise the given errors, then behave normally """
+    original = getattr(s3, operation)
+    remaining = list(errors)
+
+    def call(**kwargs):
+        if remaining:
+            raise remaining.pop(0)
+        return original(**kwargs)
+
+    setattr(s3, operation, call)
+
+
+def test_copy_objects_copies_every_object(s3):
+    for i in range(20):
+        s3.put_object(Bucket=BUCKET, Key=f"src/{i}", Body=b"data%d" % i)
+
+    s3_transfer.copy_objects(s3, BUCKET, [(f"src/{i}", f"dst/{i}", 5) for i in range(20)], max_workers=4)
+
+    assert {key: s3.bucket(BUCKET)[key]["Body"] for key in s3.bucket(BUCKET) if key.startswith("dst/")} == {
+        f"dst/{i}": b"data%d" % i for i in range(20)
+    }
+
+
+def test_transient_copy_errors_are_retried(s3):
+    s3.put_object(Bucket=BUCKET, Key="src/a", Body=b"a")
+    fail(s3, "copy_object", client_error("SlowDown", "Please reduce your request rate", "CopyObject", status=503))
+
+    s3_transfer.copy_objects(s3, BUCKET, [("src/a", "dst/a", 1)])
+
+    assert s3.bucket(BUCKET)["dst/a"]["Body"] == b"a"
+
+
+def test_permanent_copy_error_raises_copy_error(s3):
+    s3.put_object(Bucket=BUCKET, Key="src/a", Body=b"a")
+
+    with pytest.raises(s3_transfer.CopyError) as raised:
+        s3_transfer.copy_objects(s3, BUCKET, [("src/a", "dst/a", 1), ("src/missing", "dst/missing", 1)], max_workers=1)
+
+    assert "src/missing" in str(raised.value)
+    assert raised.value.__cause__.response["Error"]["Code"] == "NoSuchKey"
+
+
+def test_large_object_is_copied_in_parts(s3):
+    body = bytes(range(26))
+    s3.put_object(Bucket=BUCKET, Key="src/large", Body=body)
+
+    s3_transfer.copy_objects(s3, BUCKET, [("src/large", "dst/large", len(body))])
+
+    assert s3.bucket(BUCKET)["dst/large"]["Body"] == body
+    assert s3.calls["copy_object"] == 0
+    assert s3.calls["upload_part_copy"] == 7
+    assert s3.uploads == {}
+
+
+def test_failed_multipart_copy_is_aborted(s3):
+    s3.put_object(Bucket=BUCKET, Key="src/large", Body=bytes(26))
+    fail(s3, "upload_part_copy", client_error("AccessDenied", "Access Denied", "UploadPartCopy", status=403))
+
+    with pytest.raises(s3_transfer.CopyError) as raised:
+        s3_transfer.copy_objects(s3, BUCKET, [("src/large", "dst/large", 26)])
+
+    assert raised.value.__cause__.response["Error"]["Code"] == "AccessDenied"
+    assert s3.calls["abort_multipart_upload"] == 1
+    assert s3.uploads == {}
+    assert "dst/large" not in s3.bucket(BUCKET)
+
+
+def test_abort_failure_does_not_hide_the_copy_error(s3):
+    s3.put_object(Bucket=BUCKET, Key="src/large", Body=bytes(26))
+    fail(s3, "upload_part_copy", client_error("AccessDenied", "Access Denied", "UploadPartCopy", status=403))
+    fail(s3, "abort_multipart_upload", client_error("InternalError", "We encountered an internal error", "AbortMultipartUpload", status=500))
+
+    with pytest.raises(ClientError) as raised:
+        s3_transfer.copy_object(s3, BUCKET, "src/large", "dst/large", 26)
+
+    assert raised.value.response["Error"]["Code"] == "AccessDenied"
+
+
+def fail_keys(s3, keys, times=1):
+    """ Makes delete_objects report per-key errors for the given keys the first `times` times they are sent """
+    original = s3.delete_objects
+    remaining = {key: times for key in keys}
+
+    def delete_objects(Bucket, Delete, **kwargs):
+        failing = [entry for entry in Delete["Objects"] if remaining.get(entry["Key"], 0) > 0]
+        for entry in failing:
+            remaining[entry["Key"]] -= 1
+        response = original(Bucket=Bucket, Delete={**Delete, "Objects": [e for e in Delete["Objects"] if e not in failing]}, **kwargs)
+        if failing:
+            response["Errors"] = [{"Key": entry["Key"], "Code": "InternalError", "Message": "We encountered an internal error"}
+                                  for entry in failing]
+        return response
+
+    s3.delete_objects = delete_objects
+
+
+def test_delete_prefix_deletes_every_page(s3):
+    for i in range(2500):
+        s3.put_object(Bucket=BUCKET, Key=f"tenant/spec/{i:04d}", Body=b"")
+    s3.put_object(Bucket=BUCKET, Key="tenant/spec-2/keep", Body=b"")
+
+    result = s3_transfer.delete_prefix(s3, BUCKET, "tenant/spec/")
+
+    assert result == {"deleted": 2500, "batches": 3, "retried": 0}
+    assert list(s3.bucket(BUCKET)) == ["tenant/spec-2/keep"]
+    assert s3.calls["delete_objects"] == 3
+
+
+def test_keys_reported_in_errors_are_retried(s3):
+    for i in range(1200):
+        s3.put_object(Bucket=BUCKET, Key=f"tenant/spec/{i:04d}", Body=b"")
+    fail_keys(s3, ["tenant/spec/0003", "tenant/spec/1100"], times=2)
+
+    result = s3_transfer.delete_prefix(s3, BUCKET, "tenant/spec/")
+
+    assert result == {"deleted": 1200, "batches": 2, "retried": 4}
+    assert s3.bucket(BUCKET) == {}
+
+
+def test_keys_that_keep_failing_raise_delete_error(s3):
+    for i in range(3):
+        s3.put_object(Bucket=BUCKET, Key=f"tenant/spec/{i}", Body=b"")
+    fail_keys(s3, ["tenant/spec/1"], times=5)
+
+    with pytest.raises(s3_transfer.DeleteError) as raised:
+        s3_transfer.delete_prefix(s3, BUCKET, "tenant/spec/")
+
+    assert "tenant/spec/1" in str(raised.value.__cause__)
+    assert list(s3.bucket(BUCKET)) == ["tenant/spec/1"]
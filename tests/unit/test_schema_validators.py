@@ -0,0 +1,64 @@
+import os
+import json
+
+import jsonschema
+import pytest
+import yaml
+
+import schema_validators
+
+API_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "src", "api")
+FUNCTION_DIRS = sorted(
+    os.path.join(API_DIR, name) for name in os.listdir(API_DIR)
+    if os.path.exists(os.path.join(API_DIR, name, schema_validators.OPENAPI_SCHEMA_FILE))
+)
+
+
+@pytest.mark.parametrize("function_dir", FUNCTION_DIRS, ids=os.path.basename)
+def test_compiled_schemas_are_up_to_date(function_dir):
+    with open(os.path.join(function_dir, schema_validators.OPENAPI_SCHEMA_FILE)) as f:
+        expected = schema_validators.extract_operation_schemas(yaml.safe_load(f))
+    with open(os.path.join(function_dir, schema_validators.COMPILED_SCHEMAS_FILE)) as f:
+        assert json.load(f) == expected, "run python scripts/build_schemas.py"
+
+
+SAMPLES = [
+    {},
+    {"brand_name": "brand"},
+    {"brand_name": ""},
+    {"brand_name": "x" * 21},
+    {"brand_name": 1},
+    {"brand_name": "brand", "product_name": "tee", "product_code": "T-1", "type": "TOPS"},
+    {"user_name": "name"},
+    {"user_name": None},
+    {"status": ""},
+    {"fit": None, "oem_points": [{"x": 1}]},
+    {"fit": [], "oem_points": "a"},
+    {"oem_points": [1]},
+    {"specification_id": "s1"},
+    {"user_id": "u1", "image_url": "not a url"},
+    [],
+    None,
+]
+
+
+@pytest.mark.parametrize("function_dir", FUNCTION_DIRS, ids=os.path.basename)
+def test_compiled_validators_agree_with_jsonschema(function_dir):
+    for operation, schemas in schema_validators.load_operation_schemas(function_dir).items():
+        for kind, schema in schemas.items():
+            validate = schema_validators.compile_schema(schema)
+            for sample in SAMPLES:
+                expected_valid = jsonschema.Draft202012Validator(schema).is_valid(sample)
+                try:
+                    validate(sample)
+                    valid = True
+                except schema_validators.SchemaValidationError:
+                    valid = False
+                assert valid == expected_valid, (operation, kind, sample)
+
+
+def test_unsupported_keywords_fall_back_to_jsonschema():
+    validate = schema_validators.compile_schema({"type": "string", "pattern": "^a"})
+    validate("abc")
+    with pytest.raises(schema_validators.SchemaValidationError):
+        validate("bcd")
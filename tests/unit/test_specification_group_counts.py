@@ -0,0 +1,208 @@
+import json
+
+import pytest
+
+import specification_group_counts
+from tests.events import api_event, seed_account
+
+SPECIFICATION = "/v1/specifications/{specification_id}"
+GROUP = "/v1/specificationgroups/{specification_group_id}"
+
+
+@pytest.fixture()
+def api(aws, load_handler):
+    """ Specification and group handlers plus the stream processor that maintains the counters """
+    seed_account(aws)
+    aws.dynamodb.enable_stream("specifications")
+    return {
+        "create": load_handler("api/ApiSpecifications", "post"),
+        "put": load_handler("api/ApiSpecificationsSpecificationId", "put"),
+        "delete": load_handler("api/ApiSpecificationsSpecificationId", "delete"),
+        "batch_update_status": load_handler("api/ApiSpecificationsSpecificationId", "batch_update_status"),
+        "create_group": load_handler("api/ApiSpecificationGroups", "post"),
+        "list_groups": load_handler("api/ApiSpecificationGroups", "get"),
+        "delete_group": load_handler("api/ApiSpecificationGroupsSpecificationGroupId", "delete"),
+        "summary": load_handler("common/SpecificationSummary"),
+    }
+
+
+def sync(aws, api):
+    result = api["summary"].lambda_handler(aws.dynamodb.drain_stream("specifications"), None)
+    assert result == {"batchItemFailures": []}
+
+
+def create_group(api, name):
+    event = api_event("POST", "/v1/specificationgroups", body={"specification_group_name": name})
+    response = api["create_group"].lambda_handler(event, None)
+    assert response["statusCode"] in (200, 201)
+    return json.loads(response["body"])["specification_group_id"]
+
+
+def create(api, specification_group_id):
+    body = {"specification_group_id": specification_group_id, "brand_name": "FLOOR", "product_name": "Tee",
+            "product_code": "FS-001", "progress": 0, "type": "TOPS"}
+    response = api["create"].lambda_handler(api_event("POST", "/v1/specifications", body=body), None)
+    assert response["statusCode"] == 201
+    return json.loads(response["body"])["specification_id"]
+
+
+def counts(api):
+    response = api["list_groups"].lambda_handler(api_event("GET", "/v1/specificationgroups"), None)
+    assert response["statusCode"] == 200
+    return {group["specification_group_name"]: group["specification_counts"] for group in json.loads(response["body"])}
+
+
+def test_counts_follow_create_status_change_move_and_delete(aws, api):
+    spring, summer = create_group(api, "Spring"), create_group(api, "Summer")
+    ids = [create(api, spring) for _ in range(3)]
+    sync(aws, api)
+    assert counts(api) == {
+        "Spring": {"total": 3, "by_status": {"DRAFT": 3}},
+        "Summer": {"total": 0, "by_status": {}}
+    }
+
+    event = api_event("POST", "/v1/specifications:batchUpdateStatus", body={"specification_ids": ids[:2], "status": "COMPLETE"})
+    assert api["batch_update_status"].lambda_handler(event, None)["statusCode"] == 200
+    event = api_event("PUT", SPECIFICATION, {"specification_id": ids[2]}, {"specification_group_id": summer})
+    assert api["put"].lambda_handler(event, None)["statusCode"] == 200
+    sync(aws, api)
+    assert counts(api) == {
+        "Spring": {"total": 2, "by_status": {"COMPLETE": 2}},
+        "Summer": {"total": 1, "by_status": {"DRAFT": 1}}
+    }
+
+    assert api["delete"].lambda_handler(api_event("DELETE", SPECIFICATION, {"specification_id": ids[0]}), None)["statusCode"] == 200
+    sync(aws, api)
+    assert counts(api)["Spring"] == {"total": 1, "by_status": {"COMPLETE": 1}}
+
+
+def test_group_delete_is_refused_while_specifications_remain(aws, api):
+    group = create_group(api, "Spring")
+    specification_id = create(api, group)
+    path = {"specification_group_id": group}
+
+    # 仕様書数に反映される前もインデックスで確認する
+    response = api["delete_group"].lambda_handler(api_event("DELETE", GROUP, path), None)
+    assert response["statusCode"] == 409
+    sync(aws, api)
+    assert api["delete_group"].lambda_handler(api_event("DELETE", GROUP, path), None)["statusCode"] == 409
+
+    api["delete"].lambda_handler(api_event("DELETE", SPECIFICATION, {"specification_id": specification_id}), None)
+    sync(aws, api)
+    assert api["delete_group"].lambda_handler(api_event("DELETE", GROUP, path), None)["statusCode"] == 200
+    assert counts(api) == {}
+
+
+def test_group_delete_does_not_wait_for_the_counter(aws, api):
+    group = create_group(api, "Spring")
+    specification_id = create(api, group)
+    sync(aws, api)
+
+    # 仕様書の削除がまだ仕様書数に反映されていなくても削除できる
+    api["delete"].lambda_handler(api_event("DELETE", SPECIFICATION, {"specification_id": specification_id}), None)
+    response = api["delete_group"].lambda_handler(api_event("DELETE", GROUP, {"specification_group_id": group}), None)
+    assert response["statusCode"] == 200
+
+
+def test_redelivered_records_are_counted_once(aws, api):
+    spring, summer = create_group(api, "Spring"), create_group(api, "Summer")
+    ids = [create(api, spring) for _ in range(3)]
+    event = api_event("PUT", SPECIFICATION, {"specification_id": ids[0]}, {"specification_group_id": summer})
+    api["put"].lambda_handler(event, None)
+    api["delete"].lambda_handler(api_event("DELETE", SPECIFICATION, {"specification_id": ids[1]}), None)
+    # 同じ状態に戻る変更も版数で区別する
+    for status in ("COMPLETE", "DRAFT"):
+        event = api_event("POST", "/v1/specifications:batchUpdateStatus", body={"specification_ids": [ids[2]], "status": status})
+        api["batch_update_status"].lambda_handler(event, None)
+
+    # 失敗した呼び出しの再試行と同じく、同じレコードを2回処理する
+    records = aws.dynamodb.drain_stream("specifications")
+    for _ in range(2):
+        assert api["summary"].lambda_handler(records, None) == {"batchItemFailures": []}
+
+    assert counts(api) == {
+        "Spring": {"total": 1, "by_status": {"DRAFT": 1}},
+        "Summer": {"total": 1, "by_status": {"DRAFT": 1}}
+    }
+
+
+def test_group_delete_reads_at_most_one_specification(aws, api, monkeypatch):
+    group = create_group(api, "Spring")
+    for _ in range(5):
+        create(api, group)
+    sync(aws, api)
+
+    responses = []
+    query = aws.dynamodb.query
+    monkeypatch.setattr(aws.dynamodb, "query", lambda **kwargs: responses.append(query(**kwargs)) or responses[-1])
+    api["delete_group"].lambda_handler(api_event("DELETE", GROUP, {"specification_group_id": group}), None)
+
+    assert [response["ScannedCount"] for response in responses] == [1]
+    assert "Items" not in responses[0]
+
+
+def test_counts_of_deleted_groups_are_not_recreated(aws, api):
+    group = create_group(api, "Spring")
+    aws.dynamodb.table("specification-groups").items.clear()
+
+    create(api, group)
+    sync(aws, api)
+
+    assert aws.dynamodb.table("specification-groups").items == {}
+
+
+def test_backfill_recounts_drifted_groups(aws, api):
+    spring, summer = create_group(api, "Spring"), create_group(api, "Summer")
+    create(api, spring)
+    create(api, spring)
+    sync(aws, api)
+
+    # 仕様書数がずれた状態を作る
+    aws.dynamodb.update_item(
+        TableName="specification-groups",
+        Key={"specification_group_id": {"S": summer}, "tenant_id": {"S": "tenant-1"}},
+        **specification_group_counts.get_add_expression({"ARCHIVED": 4})
+    )
+
+    result = api["summary"].lambda_handler({}, None)
+
+    assert result["exclusive_start_key"] is None
+    assert counts(api) == {
+        "Spring": {"total": 2, "by_status": {"DRAFT": 2}},
+        "Summer": {"total": 0, "by_status": {}}
+    }
+
+
+def test_group_list_projects_only_the_returned_attributes(aws, api, monkeypatch):
+    group = create_group(api, "Spring")
+    create(api, group)
+    sync(aws, api)
+
+    queries = []
+    query = aws.dynamodb.query
+    monkeypatch.setattr(aws.dynamodb, "query", lambda **kwargs: queries.append(kwargs) or query(**kwargs))
+    response = api["list_groups"].lambda_handler(api_event("GET", "/v1/specificationgroups"), None)
+
+    assert "ProjectionExpression" in queries[0]
+    assert json.loads(response["body"]) == [{
+        "specification_group_id": group,
+        "specification_group_name": "Spring",
+        "specification_counts": {"total": 1, "by_status": {"DRAFT": 1}}
+    }]
+
+
+def test_groups_created_before_counting_are_counted_by_the_backfill(aws, api):
+    aws.dynamodb.seed("specification-groups", [{
+        "specification_group_id": {"S": "legacy"},
+        "tenant_id": {"S": "tenant-1"},
+        "specification_group_name": {"S": "Legacy"}
+    }])
+    create(api, "legacy")
+    sync(aws, api)
+    assert counts(api) == {"Legacy": {"total": 0, "by_status": {}}}
+
+    api["summary"].lambda_handler({}, None)
+    create(api, "legacy")
+    sync(aws, api)
+
+    assert counts(api) == {"Legacy": {"total": 2, "by_status": {"DRAFT": 2}}}
@@ -0,0 +1,138 @@
+import pytest
+
+import dynamo_codec
+
+
+class FakeSummariesTable:
+    """ Stand-in for the DynamoDB client calls made by the summary processor """
+
+    def __init__(self):
+        self.items = {}
+        self.writes = 0
+
+    def put_item(self, TableName, Item, **kwargs):
+        self.writes += 1
+        self.items[(Item["tenant_id"]["S"], Item["specification_id"]["S"])] = Item
+
+    def delete_item(self, TableName, Key):
+        self.writes += 1
+        self.items.pop((Key["tenant_id"]["S"], Key["specification_id"]["S"]), None)
+
+    def transact_write_items(self, TransactItems):
+        # 仕様書グループの仕様書数はtest_specification_group_countsで確認する
+        for transact_item in TransactItems:
+            if "Put" in transact_item:
+                self.put_item(transact_item["Put"]["TableName"], transact_item["Put"]["Item"])
+            elif "Delete" in transact_item:
+                self.delete_item(transact_item["Delete"]["TableName"], transact_item["Delete"]["Key"])
+
+
+class LocalStream:
+    """ Turns table writes into DynamoDB Streams records with NEW_AND_OLD_IMAGES """
+
+    def __init__(self):
+        self.table = {}
+        self.records = []
+
+    def _record(self, event_name, key, old, new):
+        change = {
+            "Keys": {"specification_id": {"S": key[0]}, "tenant_id": {"S": key[1]}},
+            "SequenceNumber": str(len(self.records) + 1)
+        }
+        if old is not None:
+            change["OldImage"] = old
+        if new is not None:
+            change["NewImage"] = new
+        self.records.append({"eventName": event_name, "dynamodb": change})
+
+    def put(self, item):
+        item = dynamo_codec.item_to_dynamo(item)
+        key = (item["specification_id"]["S"], item["tenant_id"]["S"])
+        old = self.table.get(key)
+        self.table[key] = item
+        self._record("MODIFY" if old else "INSERT", key, old, item)
+
+    def update(self, specification_id, tenant_id, **attributes):
+        current = dynamo_codec.item_to_python(self.table[(specification_id, tenant_id)])
+        self.put({**current, **attributes})
+
+    def delete(self, specification_id, tenant_id):
+        old = self.table.pop((specification_id, tenant_id))
+        self._record("REMOVE", (specification_id, tenant_id), old, None)
+
+    def drain(self):
+        records, self.records = self.records, []
+        return {"Records": records}
+
+
+@pytest.fixture()
+def summary_app(load_function_module):
+    app = load_function_module(
+        "common/SpecificationSummary",
+        SPECIFICATIONS_TABLE_NAME="specifications",
+        SPECIFICATION_SUMMARIES_TABLE_NAME="specification-summaries",
+        SPECIFICATION_GROUPS_TABLE_NAME="specification-groups"
+    )
+    app.dynamodb = FakeSummariesTable()
+    return app
+
+
+def specification(specification_id="spec-1", **attributes):
+    return {
+        "specification_id": specification_id,
+        "tenant_id": "tenant-1",
+        "tenant_id#status": "tenant-1#DRAFT",
+        "specification_group_id": "group-1",
+        "brand_name": "brand",
+        "product_name": "tee",
+        "product_code": "T-1",
+        "status": "DRAFT",
+        "progress": "INFORMATION",
+        "type": "T-SHIRT",
+        "updated_at": "2025-01-01T00:00:00+00:00",
+        "fabric": {"materials": [{"name": "cotton", "ratio": 100}]},
+        **attributes
+    }
+
+
+def test_summary_follows_create_update_and_delete(summary_app):
+    stream = LocalStream()
+    stream.put(specification())
+    stream.update("spec-1", "tenant-1", status="COMPLETE", **{"tenant_id#status": "tenant-1#COMPLETE"})
+
+    assert summary_app.lambda_handler(stream.drain(), None) == {"batchItemFailures": []}
+
+    summary = dynamo_codec.item_to_python(summary_app.dynamodb.items[("tenant-1", "spec-1")])
+    assert summary["status"] == "COMPLETE"
+    assert summary["tenant_id#status"] == "tenant-1#COMPLETE"
+    assert "fabric" not in summary
+
+    stream.delete("spec-1", "tenant-1")
+    summary_app.lambda_handler(stream.drain(), None)
+    assert summary_app.dynamodb.items == {}
+
+
+def test_section_only_edits_do_not_rewrite_summary(summary_app):
+    stream = LocalStream()
+    stream.put(specification())
+    summary_app.lambda_handler(stream.drain(), None)
+    writes = summary_app.dynamodb.writes
+
+    stream.update("spec-1", "tenant-1", fabric={"materials": []}, specification_file={"object": "spec-1.pdf"})
+    summary_app.lambda_handler(stream.drain(), None)
+
+    assert summary_app.dynamodb.writes == writes
+
+
+def test_failed_record_stops_the_batch(summary_app):
+    stream = LocalStream()
+    stream.put(specification("spec-1"))
+    stream.put(specification("spec-2"))
+
+    def failing_put_item(TableName, Item):
+        raise RuntimeError("throttled")
+
+    summary_app.dynamodb.put_item = failing_put_item
+
+    response = summary_app.lambda_handler(stream.drain(), None)
+    assert response == {"batchItemFailures": [{"itemIdentifier": "1"}]}